@@ -0,0 +1,237 @@
+from dataclasses import dataclass, field
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import traceback
+from typing import Callable, Optional
+from benchmarks.synthetic import Scale, SyntheticPhase, synthetic_phases
+from sim.rules import PICKABLE_CLASSES
+from sim.simulator import ABILITY, ATTACK, MOVE
+from strategy.strategy import Strategy
+
+DECIDE_METHODS = {
+    MOVE: "decide_moves",
+    ATTACK: "decide_attacks",
+    ABILITY: "decide_abilities",
+}
+
+# How much slower than its baseline a benchmark may get before it counts as a regression
+DEFAULT_TOLERANCE = 0.25
+# Slowdowns smaller than this are timer noise, not regressions
+MIN_REGRESSION_MS = 1.0
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    The timings of one strategy deciding one phase of one scale
+
+    samples_ms: How long each repetition of the decision took, in milliseconds
+    error: What the strategy raised, if it failed to decide
+    """
+
+    strategy: str
+    side: str
+    scale: str
+    phase: str
+    samples_ms: list[float] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.strategy}/{self.side}/{self.scale}/{self.phase}"
+
+    def median_ms(self) -> float:
+        return statistics.median(self.samples_ms) if self.samples_ms else 0.0
+
+    def serialize(self) -> dict[str, object]:
+        return {
+            "strategy": self.strategy,
+            "side": self.side,
+            "scale": self.scale,
+            "phase": self.phase,
+            "medianMs": self.median_ms(),
+            "minMs": min(self.samples_ms, default=0.0),
+            "maxMs": max(self.samples_ms, default=0.0),
+            "samplesMs": self.samples_ms,
+            "error": self.error,
+        }
+
+
+def time_decision(
+    factory: Callable[[], Strategy],
+    synthetic: SyntheticPhase,
+    repeat: int,
+    seed: int,
+    result: BenchmarkResult,
+) -> None:
+    """
+    Times a fresh strategy deciding synthetic repeat times, adding the timings to result
+
+    Only the decide call is timed. Every repetition seeds random the same way and starts from
+    a state with nothing computed on it, so repetitions and runs are comparable.
+    """
+    method = DECIDE_METHODS[synthetic.phase]
+
+    for _ in range(repeat):
+        random.seed(seed)
+        strategy = factory()
+        game_state = synthetic.fresh_game_state()
+        actions = synthetic.actions()
+
+        try:
+            strategy.on_game_start(synthetic.is_zombie)
+            strategy.on_turn_start(synthetic.turn, game_state)
+
+            start = time.perf_counter()
+            getattr(strategy, method)(actions, game_state)
+            took = time.perf_counter() - start
+        except Exception as e:
+            result.error = f"{e.__class__.__name__}: {e}"
+            traceback.print_exc(file=sys.stderr)
+            return
+
+        result.samples_ms.append(took * 1000)
+
+
+def _choices(
+    factory: Callable[[], Strategy], scale: Scale, seed: int
+) -> Optional[dict]:
+    random.seed(seed)
+    config = scale.config()
+
+    try:
+        choices = factory().decide_character_classes(
+            list(PICKABLE_CLASSES), config.num_to_pick, config.max_per_same_class
+        )
+    except Exception:
+        traceback.print_exc(file=sys.stderr)
+        return None
+
+    return choices if isinstance(choices, dict) else None
+
+
+def run_benchmarks(
+    scales: list[Scale],
+    strategies: dict[bool, dict[str, Callable[[], Strategy]]],
+    repeat: int = 5,
+    seed: int = 0,
+) -> list[BenchmarkResult]:
+    """
+    Times every strategy deciding every phase of its side, at every scale
+
+    Human strategies play with the classes they choose themselves, zombie strategies against
+    humans of every class.
+
+    strategies: For each side, whether it's the zombies, the strategies to time by name
+    """
+    results = []
+
+    for scale in scales:
+        zombie_phases = synthetic_phases(scale, seed)
+
+        for is_zombie in [False, True]:
+            side = "zombie" if is_zombie else "human"
+
+            for [name, factory] in strategies[is_zombie].items():
+                phases = zombie_phases
+                if not is_zombie:
+                    phases = synthetic_phases(
+                        scale, seed, _choices(factory, scale, seed)
+                    )
+
+                for synthetic in phases:
+                    if synthetic.is_zombie != is_zombie:
+                        continue
+
+                    result = BenchmarkResult(name, side, scale.name, synthetic.phase)
+                    print(f"Timing {result.key}...", file=sys.stderr)
+                    time_decision(factory, synthetic, repeat, seed, result)
+                    results.append(result)
+
+    return results
+
+
+def serialize_results(results: list[BenchmarkResult], repeat: int, seed: int) -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": repeat,
+        "seed": seed,
+        "results": dict(map(lambda result: (result.key, result.serialize()), results)),
+    }
+
+
+def write_results(path: str, serialized: dict) -> None:
+    with open(path, "w") as file:
+        json.dump(serialized, file, indent=2)
+        file.write("\n")
+
+
+def read_results(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(
+    results: list[BenchmarkResult],
+    baseline: dict,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[str]:
+    """
+    Returns a description of every regression of results from a baseline written by
+    serialize_results, which are benchmarks that got more than tolerance slower or started
+    failing
+
+    Benchmarks the baseline doesn't have are new, not regressions.
+    """
+    regressions = []
+    baseline_results = baseline.get("results", dict())
+
+    for result in results:
+        before = baseline_results.get(result.key)
+        if before is None:
+            continue
+
+        if result.error is not None:
+            if before["error"] is None:
+                regressions.append(f"{result.key} started failing: {result.error}")
+            continue
+        if before["error"] is not None:
+            continue
+
+        median = result.median_ms()
+        allowed = before["medianMs"] * (1 + tolerance)
+        if median > allowed and median - before["medianMs"] > MIN_REGRESSION_MS:
+            regressions.append(
+                f"{result.key} took {median:.2f}ms, up from {before['medianMs']:.2f}ms "
+                + f"({median / max(before['medianMs'], 1e-9) - 1:+.0%})"
+            )
+
+    return regressions
+
+
+def print_results(results: list[BenchmarkResult], baseline: Optional[dict]) -> None:
+    baseline_results = baseline.get("results", dict()) if baseline else dict()
+
+    width = max(map(lambda result: len(result.key), results), default=0)
+    print(f"{'benchmark'.ljust(width)}  {'median':>10}  {'baseline':>10}")
+
+    for result in results:
+        before = baseline_results.get(result.key)
+        before_text = (
+            f"{before['medianMs']:8.2f}ms"
+            if before is not None and before["error"] is None
+            else " " * 10
+        )
+
+        if result.error is not None:
+            print(f"{result.key.ljust(width)}  {'failed':>10}  {before_text}")
+            continue
+
+        print(f"{result.key.ljust(width)}  {result.median_ms():8.2f}ms  {before_text}")
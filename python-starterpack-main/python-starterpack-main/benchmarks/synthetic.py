@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+import random
+from typing import Optional
+from game.character.action.lazy_action_map import LazyActionMap
+from game.character.character_class_type import CharacterClassType
+from game.game_state import GameState
+from sim.rules import PICKABLE_CLASSES, SimConfig
+from sim.simulator import ATTACK, MOVE, Simulator
+
+
+@dataclass
+class Scale:
+    """
+    The size of the games a benchmark generates states from
+
+    terrain_count: How many cells of terrain the map starts with
+    board_size: The width and height of the board
+    warmup_turns: How many turns are played with random actions before the states are taken,
+    so characters have spread out and fought like in a real game
+    """
+
+    name: str
+    humans: int
+    zombies: int
+    terrain_count: int
+    board_size: int = 100
+    warmup_turns: int = 20
+
+    def config(self) -> SimConfig:
+        return SimConfig(
+            humans=self.humans,
+            zombies=self.zombies,
+            num_to_pick=self.humans,
+            max_per_same_class=self.humans,
+            terrain_count=self.terrain_count,
+            board_size=self.board_size,
+        )
+
+
+SCALES: dict[str, Scale] = {
+    # About the size of a real game
+    "default": Scale("default", humans=20, zombies=5, terrain_count=600),
+    # A late game, where most humans have been infected
+    "late": Scale("late", humans=6, zombies=19, terrain_count=600, warmup_turns=120),
+    # A real sized board with five times the terrain
+    "dense": Scale("dense", humans=20, zombies=5, terrain_count=3000),
+    # Boards bigger than the engine's, to see how strategies scale
+    "large": Scale("large", humans=80, zombies=20, terrain_count=2400, board_size=200),
+    "huge": Scale("huge", humans=320, zombies=80, terrain_count=9600, board_size=400),
+}
+
+
+@dataclass
+class SyntheticPhase:
+    """
+    A phase a strategy can be asked to decide, with the state and possible actions it gets
+
+    possible: The possible actions of each character, actions() wraps them for a strategy
+    """
+
+    is_zombie: bool
+    phase: str
+    turn: int
+    game_state: GameState
+    possible: dict[str, list]
+
+    def actions(self) -> LazyActionMap:
+        """
+        Returns the possible actions like main.py passes them to a strategy
+        """
+        return LazyActionMap(self.possible, lambda action: action)
+
+    def fresh_game_state(self) -> GameState:
+        """
+        Returns a copy of the state with nothing computed on it yet, so every decision starts
+        from scratch like the first phase of a turn
+        """
+        return GameState(
+            self.game_state.turn,
+            self.game_state.characters,
+            self.game_state.terrains,
+            grid=self.game_state.grid,
+        )
+
+
+def _random_actions(rng: random.Random, possible: dict[str, list]) -> list:
+    return list(
+        map(lambda actions: rng.choice(actions), filter(None, possible.values()))
+    )
+
+
+def _play_turn(simulator: Simulator, rng: random.Random) -> list[SyntheticPhase]:
+    phases = []
+    is_zombie = simulator.is_zombie_turn()
+
+    for phase in simulator.phases():
+        if phase == MOVE:
+            possible = simulator.possible_moves()
+        elif phase == ATTACK:
+            possible = simulator.possible_attacks()
+        else:
+            possible = simulator.possible_abilities()
+
+        phases.append(
+            SyntheticPhase(
+                is_zombie, phase, simulator.turn, simulator.game_state(), possible
+            )
+        )
+        actions = _random_actions(rng, possible)
+
+        if phase == MOVE:
+            simulator.apply_moves(actions)
+        elif phase == ATTACK:
+            simulator.apply_attacks(actions)
+        else:
+            simulator.apply_abilities(actions)
+
+    simulator.end_turn()
+
+    return phases
+
+
+def even_choices(scale: Scale) -> dict[CharacterClassType, int]:
+    """
+    Returns class choices that pick the same number of every class
+    """
+    return dict(
+        map(lambda c: (c, scale.humans // len(PICKABLE_CLASSES)), PICKABLE_CLASSES)
+    )
+
+
+def synthetic_phases(
+    scale: Scale,
+    seed: int = 0,
+    choices: Optional[dict[CharacterClassType, int]] = None,
+) -> list[SyntheticPhase]:
+    """
+    Generates one turn of phases for each side at scale, on a simulated game played randomly
+    for scale.warmup_turns first
+
+    The same scale, seed and choices always generate the same phases.
+
+    choices: The humans' classes, like decide_character_classes returns them, defaults to
+    even_choices
+    """
+    rng = random.Random(seed)
+    simulator = Simulator(seed, scale.config())
+    simulator.choose_classes(choices if choices is not None else even_choices(scale))
+
+    for _ in range(scale.warmup_turns):
+        if simulator.finished:
+            break
+        _play_turn(simulator, rng)
+
+    # One turn of each side, zombies and humans take turns
+    return _play_turn(simulator, rng) + _play_turn(simulator, rng)
@@ -1,20 +1,52 @@
+import argparse
 from fnmatch import fnmatch
+import hashlib
 from http.client import HTTPSConnection
-import io
 import json
 from os import path
 import os
+import shutil
+import tempfile
+import threading
 import time
+from typing import Callable, Optional
 from urllib import request
 import zipfile
 
 ENGINE_REPO = "MechMania-29/engine"
 USER_AGENT = "MechMania-29"
 FORMAT_ASSET_NAME = lambda version: f"engine-{version}.zip"
+ASSET_PATTERN = "engine-*.zip"
 GITHUB_RELEASE_CHECK_DELAY = 60
 ENGINE_DIR = "engine"
+ENGINE_PATH = path.join(ENGINE_DIR, "engine.jar")
 DATAFILE_NAME = "data.txt"
 DATAFILE_PATH = path.join(ENGINE_DIR, DATAFILE_NAME)
+# Every installed version is kept here as engine-<version>.jar, so going back is a copy away
+VERSIONS_DIR = path.join(ENGINE_DIR, "versions")
+KEPT_VERSIONS = 3
+# The version a background check downloaded, to swap in when the next run starts
+STAGED_PATH = path.join(ENGINE_DIR, "staged.txt")
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+DOWNLOAD_TIMEOUT = 60
+# How long to wait on GitHub's API when checking for a new release
+API_TIMEOUT = 10
+# How long a run waits on a background check when it's done, before leaving it unfinished
+UPDATE_WAIT = 30
+# Set to a release zip, a jar, or a directory of release zips to install from instead of GitHub
+ENGINE_SOURCE = os.environ.get("ENGINE_SOURCE")
+# The sha256 the ENGINE_SOURCE install must match, else a <release>.sha256 file next to it is used
+ENGINE_SHA256 = os.environ.get("ENGINE_SHA256")
+# The version to install ENGINE_SOURCE as, when its name isn't a release's like engine-1.0.0.zip
+ENGINE_VERSION = os.environ.get("ENGINE_VERSION")
+# How many seconds a check for a new engine counts as recent, before checking again
+raw_check_ttl_env = os.environ.get("ENGINE_CHECK_TTL")
+ENGINE_CHECK_TTL = (
+    float(raw_check_ttl_env) if raw_check_ttl_env else GITHUB_RELEASE_CHECK_DELAY
+)
+# Set to never check GitHub, and always run the installed engine
+raw_offline_env = os.environ.get("ENGINE_OFFLINE")
+ENGINE_OFFLINE = raw_offline_env == "1" or raw_offline_env == "true"
 
 
 def __get_current_data():
@@ -30,7 +62,7 @@ def __get_current_data():
 
 def __get_latest_release_data():
     try:
-        conn = HTTPSConnection("api.github.com")
+        conn = HTTPSConnection("api.github.com", timeout=API_TIMEOUT)
         path = f"/repos/{ENGINE_REPO}/releases/latest"
         conn.request(
             "GET",
@@ -53,32 +85,181 @@ def __get_latest_release_data():
         raise RuntimeError(f"Error: Failed to connect GitHub API, {e}")
 
 
-def __download(url):
-    if not path.exists(ENGINE_DIR):
-        os.makedirs(ENGINE_DIR, exist_ok=True)
+def __print_progress(done: int, total: Optional[int]) -> None:
+    if total:
+        print(
+            f"\r{done / 1e6:.1f}/{total / 1e6:.1f}MB ({done / total:.0%})",
+            end="",
+            flush=True,
+        )
+    else:
+        print(f"\r{done / 1e6:.1f}MB", end="", flush=True)
+
+
+def __stream(
+    source,
+    destination,
+    total: Optional[int],
+    progress: Callable[[int, Optional[int]], None],
+) -> str:
+    """
+    Copies source to destination in chunks, never holding more than one in memory, and
+    returns the sha256 of what was copied
+    """
+    digest = hashlib.sha256()
+    done = 0
+    last_reported = 0.0
+
+    for chunk in iter(lambda: source.read(DOWNLOAD_CHUNK_SIZE), b""):
+        destination.write(chunk)
+        digest.update(chunk)
+        done += len(chunk)
+
+        now = time.time()
+        if now - last_reported > 0.1:
+            progress(done, total)
+            last_reported = now
+
+    progress(done, total)
+
+    if total is not None and done != total:
+        raise RuntimeError(f"Got {done} bytes, but expected {total}")
+
+    return digest.hexdigest()
+
+
+def __fetch(
+    source: str,
+    destination,
+    size: Optional[int],
+    progress: Callable[[int, Optional[int]], None],
+) -> str:
+    """
+    Streams a url or a local file into destination, and returns its sha256
+    """
+    if path.exists(source):
+        with open(source, "rb") as file:
+            return __stream(file, destination, path.getsize(source), progress)
+
+    with request.urlopen(
+        request.Request(source, headers={"User-Agent": USER_AGENT}),
+        timeout=DOWNLOAD_TIMEOUT,
+    ) as response:
+        length = response.headers.get("Content-Length")
+        total = int(length) if length is not None else size
+
+        return __stream(response, destination, total, progress)
+
+
+def __extract_jar(archive_path: str, destination) -> None:
+    """
+    Copies the single jar in a release zip, or the jar itself, into destination
+    """
+    if not zipfile.is_zipfile(archive_path):
+        raise RuntimeError("Downloaded engine isn't a zip or a jar")
+
+    with zipfile.ZipFile(archive_path) as zip_file:
+        broken = zip_file.testzip()
+        if broken is not None:
+            raise RuntimeError(f"Downloaded engine is corrupt at `{broken}`")
+
+        names = zip_file.namelist()
+        if "META-INF/MANIFEST.MF" in names:
+            # Already a jar, which is a zip too
+            with open(archive_path, "rb") as file:
+                shutil.copyfileobj(file, destination)
+            return
+
+        jars = list(filter(lambda name: fnmatch(name, "*.jar"), names))
+        if len(jars) != 1:
+            raise RuntimeError(
+                f"Expected exactly one jar in the engine release, found {len(jars)}"
+            )
+
+        with zip_file.open(jars[0]) as jar:
+            shutil.copyfileobj(jar, destination, DOWNLOAD_CHUNK_SIZE)
+
+
+def __prune_versions(keep: str) -> None:
+    versions = sorted(
+        map(lambda name: path.join(VERSIONS_DIR, name), os.listdir(VERSIONS_DIR)),
+        key=path.getmtime,
+        reverse=True,
+    )
+
+    for old in versions[KEPT_VERSIONS:]:
+        if old != keep:
+            os.remove(old)
+
+
+def __versioned_path(version: str) -> str:
+    return path.join(VERSIONS_DIR, f"engine-{version}.jar")
+
+
+def __swap_in(versioned: str) -> None:
+    # Replaced through a copy, so the versioned jar stays when engine.jar is swapped
+    swap = ENGINE_PATH + ".part"
+    shutil.copyfile(versioned, swap)
+    os.replace(swap, ENGINE_PATH)
+
+
+def __download(
+    url: str,
+    version: str,
+    sha256: Optional[str] = None,
+    size: Optional[int] = None,
+    progress: Callable[[int, Optional[int]], None] = __print_progress,
+    install: bool = True,
+) -> None:
+    """
+    Downloads the engine release at url, a local path works too, and installs it as version
 
-    for filename in os.listdir(ENGINE_DIR):
-        if filename != DATAFILE_NAME:
-            os.remove(path.join(ENGINE_DIR, filename))
+    The release is streamed to a temporary file and checked against sha256 and size when
+    they're known. Only then is its jar copied to the versions directory and swapped in as
+    engine.jar in one rename, so a failed download leaves the current engine as it was.
 
-    print(f"Downloading engine from `{url}`...")
+    install: Whether to swap it in, or only keep it in the versions directory, quietly
+    """
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+
+    if install:
+        print(f"Downloading engine from `{url}`...")
+
+    # Kept in the engine directory, so the renames below never cross file systems
+    archive = tempfile.NamedTemporaryFile(dir=ENGINE_DIR, suffix=".part", delete=False)
+    jar = tempfile.NamedTemporaryFile(dir=ENGINE_DIR, suffix=".part", delete=False)
 
     try:
-        with request.urlopen(url) as response:
-            with io.BytesIO(response.read()) as zip_buffer:
-                with zipfile.ZipFile(zip_buffer, "r") as zip_file:
-                    zip_file.extractall(ENGINE_DIR)
-    except Exception as e:
-        print(f"Error downloading: {e}")
+        with archive:
+            digest = __fetch(url, archive, size, progress)
+        if install:
+            print()
 
-    for filename in os.listdir(ENGINE_DIR):
-        if filename != DATAFILE_NAME:
-            os.rename(
-                os.path.join(ENGINE_DIR, filename),
-                os.path.join(ENGINE_DIR, "engine.jar"),
+        if sha256 is not None and digest != sha256.lower():
+            raise RuntimeError(
+                f"Checksum of the download is {digest}, but expected {sha256}"
             )
 
-    print("Saved to `engine/engine.jar`")
+        with jar:
+            __extract_jar(archive.name, jar)
+
+        versioned = __versioned_path(version)
+        os.replace(jar.name, versioned)
+
+        if install:
+            __swap_in(versioned)
+            # Whatever a background check staged is older than this now
+            if path.exists(STAGED_PATH):
+                os.remove(STAGED_PATH)
+
+        __prune_versions(versioned)
+    finally:
+        for leftover in [archive.name, jar.name]:
+            if path.exists(leftover):
+                os.remove(leftover)
+
+    if install:
+        print(f"Saved to `{ENGINE_PATH}` (sha256 {digest})")
 
 
 def __mark_checked(checked, version):
@@ -89,7 +270,116 @@ def __mark_checked(checked, version):
         file.write(f"{checked};{version}")
 
 
+def __file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def __local_checksum(release: str) -> Optional[str]:
+    """
+    Returns the sha256 in the <release>.sha256 file next to release, like sha256sum writes
+    """
+    checksum_path = release + ".sha256"
+    if not path.exists(checksum_path):
+        return None
+
+    with open(checksum_path) as file:
+        fields = file.read().split()
+
+    if not fields:
+        raise RuntimeError(f"`{checksum_path}` is empty")
+
+    return fields[0]
+
+
+def __local_release(source: str) -> tuple[str, str]:
+    """
+    Returns the release file to install from a local source and its version
+
+    A directory is searched for the newest release zip in it. The version of anything not
+    named like a release, like a bare engine.jar, is made up from its sha256, so installing
+    a different file is never mistaken for the one already installed.
+    """
+    release = source
+    if path.isdir(source):
+        releases = list(
+            filter(lambda name: fnmatch(name, ASSET_PATTERN), os.listdir(source))
+        )
+        if not releases:
+            raise RuntimeError(
+                f"No engine release like `{ASSET_PATTERN}` in `{source}`"
+            )
+
+        release = max(
+            map(lambda name: path.join(source, name), releases), key=path.getmtime
+        )
+
+    name = path.basename(release)
+    if fnmatch(name, ASSET_PATTERN):
+        version = name[len("engine-") : -len(".zip")]
+    else:
+        version = f"local-{__file_sha256(release)[:12]}"
+
+    return release, version
+
+
+def install_local(
+    source: str, sha256: Optional[str] = None, version: Optional[str] = None
+) -> None:
+    """
+    Installs the engine from a local release zip, jar, or directory of release zips, for
+    working offline or from a mirror
+
+    sha256: What the release must match, defaults to the <release>.sha256 file next to it
+    version: The version to install it as, instead of the one in its name
+    """
+    data = __get_current_data()
+    current_version = data[1] if data else None
+
+    release, release_version = __local_release(source)
+    version = version or release_version
+    sha256 = sha256 or __local_checksum(release)
+
+    if version == current_version and path.exists(ENGINE_PATH):
+        print(f"Engine {version} from `{release}` already installed")
+        return
+
+    if sha256 is None:
+        print(f"No sha256 given for `{release}`, installing it unchecked")
+
+    __download(release, version, sha256)
+    __mark_checked(time.time(), version)
+
+
+def __release_asset(release: dict) -> tuple[str, Optional[str], Optional[int]]:
+    """
+    Returns the url of a release's engine zip, and its sha256 and size if GitHub lists them
+    """
+    asset_name = FORMAT_ASSET_NAME(release["tag_name"])
+    asset_url = (
+        f"https://github.com/{ENGINE_REPO}/releases/latest/download/{asset_name}"
+    )
+
+    # GitHub lists the size and sha256 of release assets, to check the download against
+    asset = next(
+        filter(lambda a: a.get("name") == asset_name, release.get("assets", [])), {}
+    )
+    digest = asset.get("digest") or ""
+    sha256 = digest[len("sha256:") :] if digest.startswith("sha256:") else None
+
+    return asset_url, sha256, asset.get("size")
+
+
 def update_if_not_latest():
+    if ENGINE_SOURCE:
+        install_local(ENGINE_SOURCE, ENGINE_SHA256, ENGINE_VERSION)
+        return
+
     print("Checking for latest engine...")
     data = __get_current_data()
 
@@ -97,28 +387,188 @@ def update_if_not_latest():
     current_version = data[1] if data else None
 
     checked = time.time()
-    if checked - last_checked < GITHUB_RELEASE_CHECK_DELAY:
+    if checked - last_checked < ENGINE_CHECK_TTL:
         print("Already checked recently")
         return
 
-    release = __get_latest_release_data()
-    latest_version = release["tag_name"]
+    try:
+        release = __get_latest_release_data()
+    except RuntimeError as e:
+        if not path.exists(ENGINE_PATH):
+            raise
 
-    __mark_checked(checked, latest_version)
+        print(f"{e}\nUsing the installed engine ({current_version})")
+        return
 
-    if latest_version == current_version:
+    latest_version = release["tag_name"]
+
+    if latest_version == current_version and path.exists(ENGINE_PATH):
+        __mark_checked(checked, current_version)
         print("Latest engine already downloaded")
         return
 
     print(f"New engine is available ({current_version}->{latest_version})")
 
-    asset_url = f"https://github.com/{ENGINE_REPO}/releases/latest/download/{FORMAT_ASSET_NAME(latest_version)}"
+    asset_url, sha256, size = __release_asset(release)
 
-    if not path.exists(ENGINE_DIR):
-        os.makedirs(ENGINE_DIR, exist_ok=True)
+    try:
+        __download(asset_url, latest_version, sha256, size)
+    except Exception as e:
+        if not path.exists(ENGINE_PATH):
+            raise RuntimeError(f"Error downloading: {e}")
+
+        print(f"Error downloading: {e}\nKeeping the current engine ({current_version})")
+        return
+
+    # Only marked once it's installed, so a failed download is retried next time
+    __mark_checked(checked, latest_version)
+
+
+def __stage_in_background():
+    """
+    Downloads a new engine, if there is one, without touching the installed one, for the
+    next run to swap in
+
+    The engine may be running from engine.jar meanwhile, and its output is being printed, so
+    this only prints a line once it's done.
+    """
+    data = __get_current_data()
+    current_version = data[1] if data else None
+    checked = time.time()
+
+    try:
+        release = __get_latest_release_data()
+        latest_version = release["tag_name"]
+
+        if latest_version != current_version:
+            asset_url, sha256, size = __release_asset(release)
+            __download(
+                asset_url,
+                latest_version,
+                sha256,
+                size,
+                progress=lambda done, total: None,
+                install=False,
+            )
+
+            with open(STAGED_PATH, "w") as file:
+                file.write(latest_version)
+    except Exception as e:
+        print(f"Couldn't check for a new engine: {e}")
+        return
+
+    __mark_checked(checked, current_version)
+
+    if latest_version != current_version:
+        print(f"Downloaded engine {latest_version}, the next run will use it")
+
+
+def __install_staged() -> None:
+    """
+    Swaps in the engine a background check downloaded, before anything runs engine.jar
+    """
+    if not path.exists(STAGED_PATH):
+        return
+
+    with open(STAGED_PATH) as file:
+        version = file.read().strip()
+    os.remove(STAGED_PATH)
+
+    versioned = __versioned_path(version)
+    if not path.exists(versioned):
+        return
+
+    data = __get_current_data()
+    __swap_in(versioned)
+    __mark_checked(data[0] if data else time.time(), version)
+
+    print(f"Switched to engine {version}, downloaded during the last run")
+
+
+def ensure_engine(offline: bool = False) -> Optional[threading.Thread]:
+    """
+    Makes sure there's an engine to run, only waiting on GitHub if none is installed yet
+
+    An installed engine is used right away. If it was last checked more than ENGINE_CHECK_TTL
+    seconds ago, GitHub is checked for a new one in the background. engine.jar is never
+    replaced while this run may be using it, a new engine is downloaded next to it and swapped
+    in when the next run starts. Offline, or with ENGINE_OFFLINE set, GitHub is never checked.
+
+    Returns the background check if one was started, pass it to wait_for_update before
+    exiting so a download can finish
+    """
+    if ENGINE_SOURCE:
+        install_local(ENGINE_SOURCE, ENGINE_SHA256, ENGINE_VERSION)
+        return None
+
+    offline = offline or ENGINE_OFFLINE
+
+    __install_staged()
+
+    if not path.exists(ENGINE_PATH):
+        if offline:
+            raise RuntimeError(
+                f"No engine installed at `{ENGINE_PATH}` to run offline, install one with "
+                + "`python engine.py --source <release zip>` first"
+            )
+
+        update_if_not_latest()
+        return None
+
+    if offline:
+        print("Offline, using the installed engine")
+        return None
+
+    data = __get_current_data()
+    last_checked = float(data[0]) if data else 0
+    if time.time() - last_checked < ENGINE_CHECK_TTL:
+        return None
+
+    # A daemon, so a check stuck on the network never keeps the run from exiting
+    check = threading.Thread(
+        target=__stage_in_background, name="engine-update", daemon=True
+    )
+    check.start()
+
+    return check
+
+
+def wait_for_update(check: Optional[threading.Thread]) -> None:
+    """
+    Gives a background check from ensure_engine up to UPDATE_WAIT seconds to finish
+
+    An unfinished download is dropped, nothing is staged until one completes, so the next
+    run checks again.
+    """
+    if check is None:
+        return
+
+    check.join(UPDATE_WAIT)
 
-    __download(asset_url)
+    if check.is_alive():
+        print("Gave up waiting on the engine download, the next run will try again")
 
 
 if __name__ == "__main__":
-    update_if_not_latest()
+    parser = argparse.ArgumentParser(description="Install the latest engine")
+    parser.add_argument(
+        "--source",
+        default=ENGINE_SOURCE,
+        help="A release zip, a jar, or a directory of release zips to install instead of downloading",
+    )
+    parser.add_argument(
+        "--sha256",
+        default=ENGINE_SHA256,
+        help="The sha256 the --source release must match, defaults to a <release>.sha256 file next to it",
+    )
+    parser.add_argument(
+        "--version",
+        default=ENGINE_VERSION,
+        help="The version to install --source as, defaults to the one in its name",
+    )
+    args = parser.parse_args()
+
+    if args.source:
+        install_local(args.source, args.sha256, args.version)
+    else:
+        update_if_not_latest()
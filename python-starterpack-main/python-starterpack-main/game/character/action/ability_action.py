@@ -0,0 +1,54 @@
+from dataclasses import asdict, dataclass
+from typing import Optional
+from game.character.action.ability_action_type import AbilityActionType
+from game.util.schema import Schema, SchemaField
+from game.util.position import Position
+
+
+@dataclass
+class AbilityAction:
+    """
+    An attack action from one character to an object
+    """
+
+    __slots__ = (
+        "executing_character_id",
+        "character_id_target",
+        "positional_target",
+        "type",
+    )
+
+    executing_character_id: str
+    character_id_target: Optional[int]
+    positional_target: Optional[Position]
+    type: AbilityActionType
+
+    def deserialize(blob: object) -> "AbilityAction":
+        return ABILITY_ACTION_SCHEMA.decode(blob)
+
+    def serialize(self) -> dict[str, object]:
+        return {
+            "executingCharacterId": self.executing_character_id,
+            "characterIdTarget": self.character_id_target,
+            "positionalTarget": self.positional_target.serialize()
+            if self.positional_target
+            else None,
+            "type": self.type.value,
+        }
+
+
+ABILITY_ACTION_SCHEMA = Schema(
+    AbilityAction,
+    "AbilityAction",
+    [
+        SchemaField("executingCharacterId", str),
+        SchemaField("characterIdTarget", optional=True),
+        SchemaField("positionalTarget", decoder=Position.deserialize, optional=True),
+        SchemaField(
+            "type",
+            str,
+            enum=AbilityActionType,
+            enum_error="Invalid attack action type",
+        ),
+    ],
+)
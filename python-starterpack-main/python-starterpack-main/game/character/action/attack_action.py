@@ -0,0 +1,42 @@
+from dataclasses import asdict, dataclass
+from game.character.action.attack_action_type import AttackActionType
+from game.util.schema import Schema, SchemaField
+
+
+@dataclass
+class AttackAction:
+    """
+    An attack action from one character to an object
+    """
+
+    __slots__ = ("executing_character_id", "attacking_id", "type")
+
+    executing_character_id: str
+    attacking_id: str
+    type: AttackActionType
+
+    def deserialize(blob: object) -> "AttackAction":
+        return ATTACK_ACTION_SCHEMA.decode(blob)
+
+    def serialize(self) -> dict[str, object]:
+        return {
+            "executingCharacterId": self.executing_character_id,
+            "attackingId": self.attacking_id,
+            "type": self.type.value,
+        }
+
+
+ATTACK_ACTION_SCHEMA = Schema(
+    AttackAction,
+    "AttackAction",
+    [
+        SchemaField("executingCharacterId", str),
+        SchemaField("attackingId", str),
+        SchemaField(
+            "type",
+            str,
+            enum=AttackActionType,
+            enum_error="Invalid attack action type",
+        ),
+    ],
+)
@@ -0,0 +1,67 @@
+from collections.abc import Mapping
+from typing import Callable, Generic, Iterator, Optional, TypeVar
+
+Action = TypeVar("Action")
+
+
+class LazyActionMap(Mapping, Generic[Action]):
+    """
+    Maps character id to its possible actions, like a dict[str, list[Action]], but only decodes
+    a character's actions from json the first time they're accessed
+
+    Use has_actions or action_count to check a character without decoding its actions at all.
+
+    decode: Decodes one action
+    wrap: Wraps the function that decodes all of a character's actions at once, like to time
+        it, which is much cheaper than wrapping decode for every action
+    """
+
+    def __init__(
+        self,
+        raw: dict[str, list],
+        decode: Callable[[object], Action],
+        wrap: Optional[
+            Callable[[Callable[[list], list[Action]]], Callable[[list], list[Action]]]
+        ] = None,
+    ) -> None:
+        self.raw = raw
+        self.decode = decode
+        self.decode_all: Callable[[list], list[Action]] = lambda raw_actions: list(
+            map(decode, raw_actions)
+        )
+        if wrap is not None:
+            self.decode_all = wrap(self.decode_all)
+        self.decoded: dict[str, list[Action]] = dict()
+
+    def __getitem__(self, character_id: str) -> list[Action]:
+        actions = self.decoded.get(character_id)
+
+        if actions is None:
+            actions = self.decode_all(self.raw[character_id])
+            self.decoded[character_id] = actions
+
+        return actions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.raw)
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __contains__(self, character_id: object) -> bool:
+        return character_id in self.raw
+
+    def has_actions(self, character_id: str) -> bool:
+        """
+        Returns whether the character has any possible actions, without decoding them
+        """
+        return len(self.raw.get(character_id, ())) > 0
+
+    def action_count(self, character_id: str) -> int:
+        """
+        Returns how many possible actions the character has, without decoding them
+        """
+        return len(self.raw.get(character_id, ()))
+
+    def __repr__(self) -> str:
+        return f"LazyActionMap({len(self.raw)} characters, {len(self.decoded)} decoded)"
@@ -0,0 +1,35 @@
+from dataclasses import asdict, dataclass
+import json
+from game.util.schema import Schema, SchemaField
+from game.util.position import Position
+
+
+@dataclass
+class MoveAction:
+    """
+    Defines where a character will move
+    """
+
+    __slots__ = ("executing_character_id", "destination")
+
+    executing_character_id: str
+    destination: Position
+
+    def deserialize(blob: object) -> "MoveAction":
+        return MOVE_ACTION_SCHEMA.decode(blob)
+
+    def serialize(self) -> dict[str, object]:
+        return {
+            "executingCharacterId": self.executing_character_id,
+            "destination": self.destination.serialize(),
+        }
+
+
+MOVE_ACTION_SCHEMA = Schema(
+    MoveAction,
+    "MoveAction",
+    [
+        SchemaField("executingCharacterId", str),
+        SchemaField("destination", dict, decoder=Position.deserialize),
+    ],
+)
@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+from game.character.character_class_type import CharacterClassType
+from game.util.schema import Schema, SchemaField
+from game.util.position import Position
+
+
+@dataclass
+class Character:
+    """
+    Represents a character, can be a zombie or human
+    """
+
+    __slots__ = ("id", "position", "is_zombie", "class_type", "health", "is_stunned")
+
+    id: str
+    position: Position
+    is_zombie: bool
+    class_type: CharacterClassType
+    health: int
+    is_stunned: bool
+
+    def deserialize(blob: object) -> "Character":
+        return CHARACTER_SCHEMA.decode(blob)
+
+    def serialize(self) -> dict[str, object]:
+        return {
+            "id": self.id,
+            "position": self.position.serialize(),
+            "zombie": self.is_zombie,
+            "class": self.class_type.value,
+            "health": self.health,
+            "stunned": self.is_stunned,
+        }
+
+
+CHARACTER_SCHEMA = Schema(
+    Character,
+    "Character",
+    [
+        SchemaField("id", str),
+        SchemaField("position", dict, decoder=Position.deserialize),
+        SchemaField("zombie", bool),
+        SchemaField(
+            "class", str, enum=CharacterClassType, enum_error="Invalid class type"
+        ),
+        SchemaField("health", int),
+        SchemaField("stunned", bool),
+    ],
+)
@@ -0,0 +1,142 @@
+from array import array
+from typing import Iterable
+from game.character.character import Character
+from game.character.character_class_type import CharacterClassType
+
+try:
+    import numpy
+except ImportError:
+    # numpy is optional, everything here also works without it, just without vectorizing
+    numpy = None
+
+# The code stored in class_codes for each class type, and the class type for each code
+CLASS_CODES: dict[CharacterClassType, int] = dict(
+    map(lambda x: (x[1], x[0]), enumerate(CharacterClassType))
+)
+CLASS_TYPES: list[CharacterClassType] = list(CharacterClassType)
+
+NO_CHARACTER = -1
+
+
+class CharacterColumns:
+    """
+    The characters of a game state stored column by column, one flat array per attribute,
+    so math over every character can run as batched array operations
+
+    Character i has id ids[i], and index_of maps an id back to i. The columns are arrays from
+    the standard library, so they can be wrapped by numpy without copying, see to_numpy.
+
+    x, y, health: Integer columns
+    is_zombie, is_stunned: 0 or 1 for every character
+    class_codes: The CLASS_CODES code of every character's class
+    """
+
+    def __init__(self, characters: Iterable[Character]) -> None:
+        self.ids: list[str] = []
+        self.index_of: dict[str, int] = dict()
+        self.x = array("i")
+        self.y = array("i")
+        self.health = array("i")
+        self.is_zombie = array("b")
+        self.is_stunned = array("b")
+        self.class_codes = array("b")
+
+        for character in characters:
+            self.index_of[character.id] = len(self.ids)
+            self.ids.append(character.id)
+            self.x.append(character.position.x)
+            self.y.append(character.position.y)
+            self.health.append(character.health)
+            self.is_zombie.append(character.is_zombie)
+            self.is_stunned.append(character.is_stunned)
+            self.class_codes.append(CLASS_CODES[character.class_type])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def to_numpy(self) -> dict[str, "numpy.ndarray"]:
+        """
+        Returns every column as a numpy array that shares memory with the column
+
+        Requires numpy to be installed.
+        """
+        if numpy is None:
+            raise RuntimeError("to_numpy requires numpy, install it with pip")
+
+        return {
+            "x": numpy.frombuffer(self.x, dtype=numpy.intc),
+            "y": numpy.frombuffer(self.y, dtype=numpy.intc),
+            "health": numpy.frombuffer(self.health, dtype=numpy.intc),
+            "is_zombie": numpy.frombuffer(self.is_zombie, dtype=numpy.int8),
+            "is_stunned": numpy.frombuffer(self.is_stunned, dtype=numpy.int8),
+            "class_codes": numpy.frombuffer(self.class_codes, dtype=numpy.int8),
+        }
+
+    def manhattan_to(self, x: int, y: int) -> list[int]:
+        """
+        Returns the Manhattan distance from (x, y) to every character, by index
+        """
+        if numpy is not None and len(self) > 0:
+            columns = self.to_numpy()
+
+            return (numpy.abs(columns["x"] - x) + numpy.abs(columns["y"] - y)).tolist()
+
+        return list(
+            map(lambda i: abs(self.x[i] - x) + abs(self.y[i] - y), range(len(self)))
+        )
+
+    def nearest_opponents(self) -> list[tuple[int, int]]:
+        """
+        Returns, for every character by index, the index of the closest character on the
+        other team and the Manhattan distance to it
+
+        Ties go to the lowest index. If there's nobody on the other team, returns
+        (NO_CHARACTER, NO_CHARACTER) for that character.
+        """
+        count = len(self)
+
+        if numpy is not None and count > 0:
+            columns = self.to_numpy()
+            xs = columns["x"].astype(numpy.int64)
+            ys = columns["y"].astype(numpy.int64)
+            zombies = columns["is_zombie"].astype(bool)
+
+            # Every character against every character, at once
+            distances = numpy.abs(xs[:, None] - xs[None, :]) + numpy.abs(
+                ys[:, None] - ys[None, :]
+            )
+            same_team = zombies[:, None] == zombies[None, :]
+            distances = numpy.where(same_team, numpy.iinfo(numpy.int64).max, distances)
+
+            closest = numpy.argmin(distances, axis=1)
+            closest_distances = distances[numpy.arange(count), closest]
+            has_opponent = ~numpy.all(same_team, axis=1)
+
+            return list(
+                map(
+                    lambda i: (
+                        (int(closest[i]), int(closest_distances[i]))
+                        if has_opponent[i]
+                        else (NO_CHARACTER, NO_CHARACTER)
+                    ),
+                    range(count),
+                )
+            )
+
+        found = []
+        for i in range(count):
+            closest = NO_CHARACTER
+            closest_distance = NO_CHARACTER
+
+            for j in range(count):
+                if self.is_zombie[i] == self.is_zombie[j]:
+                    continue
+
+                distance = abs(self.x[i] - self.x[j]) + abs(self.y[i] - self.y[j])
+                if closest == NO_CHARACTER or distance < closest_distance:
+                    closest = j
+                    closest_distance = distance
+
+            found.append((closest, closest_distance))
+
+        return found
@@ -0,0 +1,222 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Optional
+from game.character.character import Character
+from game.character_columns import CharacterColumns
+from game.occupancy_grid import OccupancyGrid
+from game.pathfinding import FieldCache, Pathfinder
+from game.spatial_index import SpatialIndex
+from game.state_changes import StateChanges
+from game.terrain.terrain import Terrain
+from game.util.assert_blob_has_key_of_type import assert_blob_has_key_of_type
+
+
+@dataclass
+class GameState:
+    turn: int
+    characters: dict[str, Character]
+    terrains: dict[str, Terrain]
+    grid: Optional[OccupancyGrid] = field(default=None, repr=False, compare=False)
+    field_cache: Optional[FieldCache] = field(default=None, repr=False, compare=False)
+    blob: Optional[dict] = field(default=None, repr=False, compare=False)
+    changes: Optional[StateChanges] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Built once here so every strategy can share it instead of rebuilding obstacle sets
+        if self.grid is None:
+            self.grid = OccupancyGrid.build(
+                self.characters.values(), self.terrains.values()
+            )
+
+    @cached_property
+    def pathfinder(self) -> Pathfinder:
+        """
+        A pathfinder on this state's grid, shared by everything deciding moves on it
+
+        If the state was given a field cache, fields are reused from and saved to it.
+        """
+        return Pathfinder(self.grid, self.field_cache)
+
+    @cached_property
+    def spatial_index(self) -> SpatialIndex:
+        """
+        An index of this state's characters for nearest-character queries
+        """
+        return SpatialIndex(self.characters.values(), self.grid.width, self.grid.height)
+
+    @cached_property
+    def columns(self) -> CharacterColumns:
+        """
+        This state's characters as columns of arrays, for batched math over every character
+        """
+        return CharacterColumns(self.characters.values())
+
+    def deserialize(
+        blob: object,
+        field_cache: Optional[FieldCache] = None,
+        previous: Optional["GameState"] = None,
+    ) -> "GameState":
+        """
+        Builds a game state from the engine's json
+
+        If previous is given, characters and terrain whose json didn't change since then are
+        reused instead of being rebuilt, the grid is patched instead of rebuilt, and changes
+        holds what changed. Reused objects are shared between both states, so don't modify them.
+        """
+        try:
+            assert_blob_has_key_of_type(blob, "turn", int)
+            assert_blob_has_key_of_type(blob, "characterStates", dict)
+            assert_blob_has_key_of_type(blob, "terrainStates", dict)
+
+            turn = blob["turn"]
+
+            raw_characters: dict = blob["characterStates"]
+            raw_terrain: dict = blob["terrainStates"]
+
+            if previous is not None and previous.blob is not None:
+                return GameState._deserialize_changes(
+                    blob, raw_characters, raw_terrain, field_cache, previous
+                )
+
+            characters: dict[str, Character] = dict()
+            terrains: dict[str, Terrain] = dict()
+
+            for [id, character_blob] in raw_characters.items():
+                character = Character.deserialize(character_blob)
+
+                if character:
+                    characters[id] = character
+
+            for [id, terrain_blob] in raw_terrain.items():
+                terrain = Terrain.deserialize(terrain_blob)
+
+                if terrain:
+                    terrains[id] = terrain
+        except:
+            print("Failed to validate Game State json")
+            raise
+
+        return GameState(turn, characters, terrains, field_cache=field_cache, blob=blob)
+
+    def _deserialize_changes(
+        blob: dict,
+        raw_characters: dict,
+        raw_terrain: dict,
+        field_cache: Optional[FieldCache],
+        previous: "GameState",
+    ) -> "GameState":
+        previous_raw_characters: dict = previous.blob["characterStates"]
+        previous_raw_terrain: dict = previous.blob["terrainStates"]
+        changes = StateChanges()
+
+        characters: dict[str, Character] = dict()
+        terrains: dict[str, Terrain] = dict()
+
+        for [id, character_blob] in raw_characters.items():
+            previous_character = previous.characters.get(id)
+
+            if (
+                previous_character is not None
+                and previous_raw_characters.get(id) == character_blob
+            ):
+                characters[id] = previous_character
+                continue
+
+            character = Character.deserialize(character_blob)
+
+            if not character:
+                continue
+
+            characters[id] = character
+
+            if previous_character is None:
+                changes.characters_added.append(id)
+                continue
+
+            if character.position != previous_character.position:
+                changes.characters_moved.append(id)
+            if character.is_zombie and not previous_character.is_zombie:
+                changes.characters_infected.append(id)
+            if (
+                character.health != previous_character.health
+                or character.is_stunned != previous_character.is_stunned
+                or character.class_type != previous_character.class_type
+            ):
+                changes.characters_updated.append(id)
+
+        for id in previous.characters:
+            if id not in characters:
+                changes.characters_removed.append(id)
+
+        for [id, terrain_blob] in raw_terrain.items():
+            previous_terrain = previous.terrains.get(id)
+
+            if (
+                previous_terrain is not None
+                and previous_raw_terrain.get(id) == terrain_blob
+            ):
+                terrains[id] = previous_terrain
+                continue
+
+            terrain = Terrain.deserialize(terrain_blob)
+
+            if not terrain:
+                continue
+
+            terrains[id] = terrain
+
+            if previous_terrain is None:
+                changes.terrain_added.append(id)
+            elif (
+                terrain.position != previous_terrain.position
+                or terrain.can_attack_through != previous_terrain.can_attack_through
+            ):
+                # Treat terrain that changed shape as destroyed and rebuilt
+                changes.terrain_destroyed.append(id)
+                changes.terrain_added.append(id)
+            elif terrain.health != previous_terrain.health:
+                changes.terrain_damaged.append(id)
+
+        for id in previous.terrains:
+            if id not in terrains:
+                changes.terrain_destroyed.append(id)
+
+        # Only patch the terrain cells that changed, so the terrain version (and every distance
+        # field cached for it) carries over when nothing appeared or disappeared
+        grid = previous.grid.copy_terrain()
+
+        cleared = set()
+        for id in changes.terrain_destroyed:
+            position = previous.terrains[id].position
+            grid.clear_terrain(position.x, position.y)
+            cleared.add((position.x, position.y))
+
+        added = list(map(lambda id: terrains[id], changes.terrain_added))
+        if cleared:
+            # Another piece of terrain could still be standing on a cleared cell
+            added.extend(
+                filter(
+                    lambda terrain: (terrain.position.x, terrain.position.y) in cleared,
+                    terrains.values(),
+                )
+            )
+
+        for terrain in added:
+            grid.set_terrain(
+                terrain.position.x, terrain.position.y, terrain.can_attack_through
+            )
+
+        for character in characters.values():
+            grid.add_occupant(
+                character.position.x, character.position.y, character.is_zombie
+            )
+
+        return GameState(
+            blob["turn"],
+            characters,
+            terrains,
+            grid,
+            field_cache,
+            blob=blob,
+            changes=changes,
+        )
@@ -0,0 +1,137 @@
+from typing import Iterable
+from game.character.character import Character
+from game.terrain.terrain import Terrain
+from game.util.position import BOARD_SIZE
+
+# Terrain layer flags
+TERRAIN_NONE = 0
+TERRAIN_BLOCKING = 1
+TERRAIN_ATTACK_THROUGH = 2
+
+# Occupant layer flags, a cell can hold both if humans and zombies share it
+OCCUPANT_NONE = 0
+OCCUPANT_HUMAN = 1
+OCCUPANT_ZOMBIE = 2
+
+
+class OccupancyGrid:
+    """
+    A compact view of what is on every cell of the board, built once per game state
+
+    Cells are stored row-major in flat bytearrays, so the cell (x, y) lives at
+    index y * width + x. Every lookup is a bounds check and a single byte read,
+    which makes it cheap enough to call from inside a search loop.
+
+    terrain: TERRAIN_* flags for every cell
+    occupants: OCCUPANT_* flags for every cell
+    """
+
+    def __init__(self, width: int = BOARD_SIZE, height: int = BOARD_SIZE) -> None:
+        self.width = width
+        self.height = height
+        self.terrain = bytearray(width * height)
+        self.occupants = bytearray(width * height)
+        self._terrain_version = None
+
+    def build(
+        characters: Iterable[Character],
+        terrains: Iterable[Terrain],
+        width: int = BOARD_SIZE,
+        height: int = BOARD_SIZE,
+    ) -> "OccupancyGrid":
+        grid = OccupancyGrid(width, height)
+
+        for terrain in terrains:
+            grid.set_terrain(
+                terrain.position.x, terrain.position.y, terrain.can_attack_through
+            )
+
+        for character in characters:
+            grid.add_occupant(
+                character.position.x, character.position.y, character.is_zombie
+            )
+
+        return grid
+
+    def copy_terrain(self) -> "OccupancyGrid":
+        """
+        Returns a new grid with the same terrain as this one and no characters
+        """
+        grid = OccupancyGrid(self.width, self.height)
+        grid.terrain[:] = self.terrain
+        grid._terrain_version = self._terrain_version
+
+        return grid
+
+    def index(self, x: int, y: int) -> int:
+        """
+        Returns the flat index of the cell (x, y), which must be in bounds
+        """
+        return y * self.width + x
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def has_terrain(self, x: int, y: int) -> bool:
+        """
+        Returns whether there is terrain on (x, y), out of bounds cells have none
+        """
+        return self.in_bounds(x, y) and self.terrain[y * self.width + x] != 0
+
+    def is_walkable(self, x: int, y: int) -> bool:
+        """
+        Returns whether (x, y) is on the board and not blocked by terrain
+        """
+        return self.in_bounds(x, y) and self.terrain[y * self.width + x] == 0
+
+    def occupant(self, x: int, y: int) -> int:
+        """
+        Returns the OCCUPANT_* flags of (x, y), out of bounds cells are empty
+        """
+        if not self.in_bounds(x, y):
+            return OCCUPANT_NONE
+
+        return self.occupants[y * self.width + x]
+
+    def has_character(self, x: int, y: int) -> bool:
+        return self.occupant(x, y) != OCCUPANT_NONE
+
+    def set_terrain(self, x: int, y: int, can_attack_through: bool = False) -> None:
+        if not self.in_bounds(x, y):
+            return
+
+        flags = TERRAIN_BLOCKING
+        if can_attack_through:
+            flags |= TERRAIN_ATTACK_THROUGH
+
+        self.terrain[y * self.width + x] = flags
+        self._terrain_version = None
+
+    def clear_terrain(self, x: int, y: int) -> None:
+        if not self.in_bounds(x, y):
+            return
+
+        self.terrain[y * self.width + x] = TERRAIN_NONE
+        self._terrain_version = None
+
+    def add_occupant(self, x: int, y: int, is_zombie: bool) -> None:
+        if not self.in_bounds(x, y):
+            return
+
+        self.occupants[y * self.width + x] |= (
+            OCCUPANT_ZOMBIE if is_zombie else OCCUPANT_HUMAN
+        )
+
+    @property
+    def terrain_version(self) -> int:
+        """
+        A key that is equal for any two grids with the same size and terrain layout,
+        use it to tell whether something computed from the terrain is still valid
+        """
+        if self._terrain_version is None:
+            self._terrain_version = hash((self.width, self.height, bytes(self.terrain)))
+
+        return self._terrain_version
+
+    def __repr__(self) -> str:
+        return f"OccupancyGrid(width={self.width}, height={self.height})"
@@ -0,0 +1,264 @@
+from array import array
+from collections import OrderedDict
+import threading
+from typing import Iterable, Optional
+from game.occupancy_grid import OccupancyGrid
+from game.util.position import Position
+
+UNREACHABLE = -1
+MAX_CACHED_FIELDS = 64
+
+
+class DistanceField:
+    """
+    The walking distance from every cell on the board to the closest goal, avoiding terrain
+
+    One field answers "where should I move next" for any number of characters heading to
+    the same goal, so compute it once and share it instead of searching per character.
+    A field can be seeded from many goals at once, in which case every cell also knows
+    which goal is the closest one to it.
+
+    grid: The grid the field was computed on
+    goals: The goals the field was seeded from
+    distances: Flat, row-major distances to the closest goal, UNREACHABLE if there is no path
+    sources: Flat, row-major index into goals of the closest goal, UNREACHABLE if there is no path
+    """
+
+    def __init__(
+        self,
+        grid: OccupancyGrid,
+        goals: list[Position],
+        distances: array,
+        sources: array,
+    ) -> None:
+        self.grid = grid
+        self.goals = goals
+        self.distances = distances
+        self.sources = sources
+
+    def compute(grid: OccupancyGrid, goals: Iterable[Position]) -> "DistanceField":
+        width = grid.width
+        height = grid.height
+        terrain = grid.terrain
+        goals = list(goals)
+        distances = array("i", [UNREACHABLE]) * (width * height)
+        sources = array("i", [UNREACHABLE]) * (width * height)
+
+        # The frontier is a flat list of cell indexes read in order, so a dequeue is just
+        # moving the head forward instead of popping off the front of a list
+        frontier = []
+        for [goal_index, goal] in enumerate(goals):
+            if grid.in_bounds(goal.x, goal.y):
+                index = grid.index(goal.x, goal.y)
+
+                if distances[index] == UNREACHABLE:
+                    distances[index] = 0
+                    sources[index] = goal_index
+                    frontier.append(index)
+
+        head = 0
+        while head < len(frontier):
+            index = frontier[head]
+            head += 1
+            next_distance = distances[index] + 1
+            source = sources[index]
+            x = index % width
+
+            if x > 0:
+                neighbor = index - 1
+                if distances[neighbor] == UNREACHABLE and not terrain[neighbor]:
+                    distances[neighbor] = next_distance
+                    sources[neighbor] = source
+                    frontier.append(neighbor)
+            if x < width - 1:
+                neighbor = index + 1
+                if distances[neighbor] == UNREACHABLE and not terrain[neighbor]:
+                    distances[neighbor] = next_distance
+                    sources[neighbor] = source
+                    frontier.append(neighbor)
+            if index >= width:
+                neighbor = index - width
+                if distances[neighbor] == UNREACHABLE and not terrain[neighbor]:
+                    distances[neighbor] = next_distance
+                    sources[neighbor] = source
+                    frontier.append(neighbor)
+            if index < width * (height - 1):
+                neighbor = index + width
+                if distances[neighbor] == UNREACHABLE and not terrain[neighbor]:
+                    distances[neighbor] = next_distance
+                    sources[neighbor] = source
+                    frontier.append(neighbor)
+
+        return DistanceField(grid, goals, distances, sources)
+
+    def distance(self, x: int, y: int) -> int:
+        """
+        Returns the walking distance from (x, y) to the closest goal, or UNREACHABLE
+        """
+        if not self.grid.in_bounds(x, y):
+            return UNREACHABLE
+
+        return self.distances[self.grid.index(x, y)]
+
+    def closest_goal(self, x: int, y: int) -> Optional[Position]:
+        """
+        Returns the goal with the shortest walk from (x, y), or None if no goal can be reached
+        """
+        if not self.grid.in_bounds(x, y):
+            return None
+
+        source = self.sources[self.grid.index(x, y)]
+        if source == UNREACHABLE:
+            return None
+
+        return self.goals[source]
+
+    def _closest_neighbor(self, index: int) -> Optional[int]:
+        width = self.grid.width
+        height = self.grid.height
+        distances = self.distances
+        x = index % width
+
+        neighbors = []
+        if x > 0:
+            neighbors.append(index - 1)
+        if x < width - 1:
+            neighbors.append(index + 1)
+        if index < width * (height - 1):
+            neighbors.append(index + width)
+        if index >= width:
+            neighbors.append(index - width)
+
+        closest = None
+        for neighbor in neighbors:
+            if distances[neighbor] != UNREACHABLE and (
+                closest is None or distances[neighbor] < distances[closest]
+            ):
+                closest = neighbor
+
+        return closest
+
+    def next_step(self, start: Position, move_speed: int) -> Optional[Position]:
+        """
+        Returns the cell a character on start should move to, walking at most move_speed
+        cells along a shortest path towards the goal
+
+        Returns the goal itself if it is within move_speed, and None if there is no path.
+        """
+        grid = self.grid
+        if not grid.in_bounds(start.x, start.y):
+            return None
+
+        distances = self.distances
+        current = grid.index(start.x, start.y)
+
+        for _ in range(move_speed):
+            if distances[current] == 0:
+                break
+
+            closest = self._closest_neighbor(current)
+
+            if closest is None:
+                # Nothing around start leads anywhere, we can't reach the goal
+                if current == grid.index(start.x, start.y):
+                    return None
+                break
+
+            current = closest
+
+        return Position.at(current % grid.width, current // grid.width)
+
+
+class FieldCache:
+    """
+    A bounded cache of distance fields that can outlive a single game state
+
+    Keep one for a whole game and hand it to every game state's pathfinder, so fields for
+    goals that are still relevant are reused across phases and turns while the terrain
+    stays the same. The least recently used fields are dropped once it is full.
+
+    It can be shared with a background thread filling it ahead of time, see IdleWorker.
+    """
+
+    def __init__(self, max_fields: int = MAX_CACHED_FIELDS) -> None:
+        self.max_fields = max_fields
+        self.fields: OrderedDict[object, DistanceField] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: object) -> Optional[DistanceField]:
+        with self.lock:
+            field = self.fields.get(key)
+
+            if field is not None:
+                self.fields.move_to_end(key)
+
+            return field
+
+    def __setitem__(self, key: object, field: DistanceField) -> None:
+        with self.lock:
+            self.fields[key] = field
+            self.fields.move_to_end(key)
+
+            while len(self.fields) > self.max_fields:
+                self.fields.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.fields.clear()
+
+
+class Pathfinder:
+    """
+    Computes distance fields on a grid and remembers them, so every character heading to
+    the same goal on the same terrain shares a single search
+
+    Fields are keyed by the goal and the grid's terrain version, so a cache can be handed
+    to the pathfinder of a later game state and only be reused while the terrain matches.
+    """
+
+    def __init__(self, grid: OccupancyGrid, cache: Optional[FieldCache] = None) -> None:
+        self.grid = grid
+        self.cache = cache if cache is not None else FieldCache()
+
+    def distance_field(self, goal: Position) -> DistanceField:
+        key = (goal.x, goal.y, self.grid.terrain_version)
+        field = self.cache.get(key)
+
+        if field is None:
+            field = DistanceField.compute(self.grid, [goal])
+            self.cache[key] = field
+
+        return field
+
+    def flow_field(self, goals: Iterable[Position]) -> DistanceField:
+        """
+        Returns a field seeded from every goal at once, so any number of characters can
+        find and walk towards their closest goal with one search over the board
+        """
+        goals = list(goals)
+        key = (
+            tuple((goal.x, goal.y) for goal in goals),
+            self.grid.terrain_version,
+        )
+        field = self.cache.get(key)
+
+        if field is None:
+            field = DistanceField.compute(self.grid, goals)
+            self.cache[key] = field
+
+        return field
+
+    def next_step(
+        self, goal: Position, start: Position, move_speed: int
+    ) -> Optional[Position]:
+        """
+        Returns the cell a character on start should move to, walking at most move_speed
+        cells along a shortest path towards goal, or None if goal can't be reached
+        """
+        if goal.x == start.x and goal.y == start.y:
+            return goal
+
+        return self.distance_field(goal).next_step(start, move_speed)
@@ -0,0 +1,121 @@
+from typing import Iterable, Optional
+from game.character.character import Character
+from game.occupancy_grid import BOARD_SIZE
+from game.util.position import Position
+
+BUCKET_SIZE = 8
+
+
+class SpatialIndex:
+    """
+    Buckets characters by team into a uniform grid of squares, so nearest-character queries
+    only look at the buckets around a position instead of every character on the map
+
+    Distances are Manhattan distances, and ties go to whichever character came first in the
+    characters passed in, the same result as scanning game_state.characters in order.
+    """
+
+    def __init__(
+        self,
+        characters: Iterable[Character],
+        width: int = BOARD_SIZE,
+        height: int = BOARD_SIZE,
+        bucket_size: int = BUCKET_SIZE,
+    ) -> None:
+        self.bucket_size = bucket_size
+        self.columns = max(1, -(-width // bucket_size))
+        self.rows = max(1, -(-height // bucket_size))
+
+        # Maps is_zombie to a flat list of buckets, each holding (order, character)
+        self.buckets: dict[bool, list[list[tuple[int, Character]]]] = {
+            False: [[] for _ in range(self.columns * self.rows)],
+            True: [[] for _ in range(self.columns * self.rows)],
+        }
+
+        for [order, character] in enumerate(characters):
+            column, row = self._bucket_of(character.position)
+            self.buckets[character.is_zombie][row * self.columns + column].append(
+                (order, character)
+            )
+
+    def _bucket_of(self, position: Position) -> tuple[int, int]:
+        column = min(max(position.x // self.bucket_size, 0), self.columns - 1)
+        row = min(max(position.y // self.bucket_size, 0), self.rows - 1)
+
+        return column, row
+
+    def _search(
+        self,
+        position: Position,
+        is_zombie: bool,
+        k: Optional[int],
+        radius: Optional[int],
+    ) -> list[Character]:
+        buckets = self.buckets[is_zombie]
+        column, row = self._bucket_of(position)
+        max_ring = max(column, self.columns - 1 - column, row, self.rows - 1 - row)
+        found: list[tuple[int, int, Character]] = []
+
+        for ring in range(max_ring + 1):
+            # Anything in this ring of buckets is at least this far away
+            closest_possible = 0 if ring == 0 else (ring - 1) * self.bucket_size + 1
+
+            if radius is not None and closest_possible > radius:
+                break
+            if k is not None and len(found) >= k and closest_possible > found[k - 1][0]:
+                break
+
+            for ring_row in range(row - ring, row + ring + 1):
+                if ring_row < 0 or ring_row >= self.rows:
+                    continue
+
+                on_edge = ring_row == row - ring or ring_row == row + ring
+                step = 1 if on_edge else 2 * ring
+
+                for ring_column in range(
+                    column - ring, column + ring + 1, max(step, 1)
+                ):
+                    if ring_column < 0 or ring_column >= self.columns:
+                        continue
+
+                    for [order, character] in buckets[
+                        ring_row * self.columns + ring_column
+                    ]:
+                        distance = abs(character.position.x - position.x) + abs(
+                            character.position.y - position.y
+                        )
+
+                        if radius is None or distance <= radius:
+                            found.append((distance, order, character))
+
+            found.sort(key=lambda x: (x[0], x[1]))
+
+        if k is not None:
+            found = found[:k]
+
+        return list(map(lambda x: x[2], found))
+
+    def nearest(self, position: Position, is_zombie: bool) -> Optional[Character]:
+        """
+        Returns the closest zombie (or human if is_zombie is False) to position, or None if there are none
+        """
+        found = self._search(position, is_zombie, 1, None)
+
+        return found[0] if found else None
+
+    def k_nearest(self, position: Position, is_zombie: bool, k: int) -> list[Character]:
+        """
+        Returns up to k of the closest zombies (or humans), closest first
+        """
+        if k <= 0:
+            return []
+
+        return self._search(position, is_zombie, k, None)
+
+    def within_radius(
+        self, position: Position, is_zombie: bool, radius: int
+    ) -> list[Character]:
+        """
+        Returns every zombie (or human) within radius of position, closest first
+        """
+        return self._search(position, is_zombie, None, radius)
@@ -0,0 +1,39 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class StateChanges:
+    """
+    What changed between two consecutive game states, as lists of character and terrain ids
+
+    Use it to update whatever you keep across phases instead of rebuilding it from scratch.
+    """
+
+    terrain_added: list[str] = field(default_factory=list)
+    terrain_destroyed: list[str] = field(default_factory=list)
+    terrain_damaged: list[str] = field(default_factory=list)
+    characters_added: list[str] = field(default_factory=list)
+    characters_removed: list[str] = field(default_factory=list)
+    characters_moved: list[str] = field(default_factory=list)
+    characters_infected: list[str] = field(default_factory=list)
+    characters_updated: list[str] = field(default_factory=list)
+
+    @property
+    def terrain_layout_changed(self) -> bool:
+        """
+        Whether terrain appeared or disappeared anywhere, which is what pathfinding depends on
+        """
+        return len(self.terrain_added) > 0 or len(self.terrain_destroyed) > 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (
+            self.terrain_added
+            or self.terrain_destroyed
+            or self.terrain_damaged
+            or self.characters_added
+            or self.characters_removed
+            or self.characters_moved
+            or self.characters_infected
+            or self.characters_updated
+        )
@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+from game.util.schema import Schema, SchemaField
+from game.util.position import Position
+
+
+@dataclass
+class Terrain:
+    """
+    Represents a piece of terrain
+    """
+
+    __slots__ = ("id", "position", "health", "can_attack_through")
+
+    id: str
+    position: Position
+    health: int
+    can_attack_through: bool
+
+    def deserialize(blob: object) -> "Terrain":
+        return TERRAIN_SCHEMA.decode(blob)
+
+    def serialize(self) -> dict[str, object]:
+        return {
+            "id": self.id,
+            "position": self.position.serialize(),
+            "health": self.health,
+            "canAttackThrough": self.can_attack_through,
+        }
+
+
+TERRAIN_SCHEMA = Schema(
+    Terrain,
+    "Terrain",
+    [
+        SchemaField("id", str),
+        SchemaField("position", dict, decoder=Position.deserialize),
+        SchemaField("health", int),
+        SchemaField("canAttackThrough", bool),
+    ],
+)
@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+
+from game.util.schema import Schema, SchemaField
+
+BOARD_SIZE = 100
+
+
+@dataclass(frozen=True)
+class Position:
+    """
+    Represents a position in a two-dimensional space
+
+    Positions can't be modified, so the same object can be shared by everything at those
+    coordinates. Use Position.at to get the shared one for a position on the board.
+    """
+
+    __slots__ = ("x", "y")
+
+    x: int
+    y: int
+
+    def at(x: int, y: int) -> "Position":
+        """
+        Returns the shared position for (x, y), only creating a new one if it's off the board
+        """
+        if 0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE:
+            return INTERNED_POSITIONS[y * BOARD_SIZE + x]
+
+        return Position(x, y)
+
+    def deserialize(blob: object) -> "Position":
+        return POSITION_SCHEMA.decode(blob)
+
+    def serialize(self) -> dict[str, object]:
+        return {
+            "x": self.x,
+            "y": self.y,
+        }
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if other.__class__ is not Position:
+            return NotImplemented
+
+        return self.x == other.x and self.y == other.y
+
+    def __reduce__(self):
+        # Positions are frozen, so rebuild them through at instead of setting their slots
+        return (Position.at, (self.x, self.y))
+
+
+# One position per cell of the board, in row-major order
+INTERNED_POSITIONS = [
+    Position(x, y) for y in range(BOARD_SIZE) for x in range(BOARD_SIZE)
+]
+
+POSITION_SCHEMA = Schema(
+    Position,
+    "Position",
+    [
+        SchemaField("x", int),
+        SchemaField("y", int),
+    ],
+    constructor=Position.at,
+)
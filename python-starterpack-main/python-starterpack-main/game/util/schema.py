@@ -0,0 +1,146 @@
+from dataclasses import dataclass
+from enum import Enum
+import os
+from typing import Callable, Optional
+
+STRICT = "strict"
+FAST = "fast"
+DECODE_MODES = [STRICT, FAST]
+
+# Set DECODE_MODE=fast to skip validation when you trust the engine's json
+DECODE_MODE = os.environ.get("DECODE_MODE", STRICT)
+
+# Every schema created, so the decode mode can be switched for all of them at once
+SCHEMAS: list["Schema"] = []
+
+
+@dataclass
+class SchemaField:
+    """
+    One constructor argument of a class decoded from json
+
+    key: The key of the value in the json
+    expected_type: The type the value must have in strict mode
+    decoder: Decodes the value if it's a nested object, like Position.deserialize
+    enum: Converts the value to a member of this enum, looked up by value
+    enum_error: The message to fail strict validation with if the value isn't in enum
+    optional: Whether the key can be missing or None, which decodes to None
+    """
+
+    key: str
+    expected_type: type = object
+    decoder: Optional[Callable[[object], object]] = None
+    enum: Optional[type[Enum]] = None
+    enum_error: str = "Invalid enum value"
+    optional: bool = False
+
+
+class Schema:
+    """
+    Decodes json into a class by calling its constructor with one argument per field, in order
+
+    constructor defaults to the class itself, but can be anything that returns an instance,
+    like a function that hands out shared instances.
+
+    A decoder function is generated for each mode, specialized to the fields, so decoding an
+    object is one function call with no loops over the fields. Strict mode validates every
+    field like assert_blob_has_key_of_type and prints which class failed, fast mode trusts
+    the json and only builds the object.
+    """
+
+    def __init__(
+        self,
+        cls: type,
+        name: str,
+        fields: list[SchemaField],
+        constructor: Optional[Callable[..., object]] = None,
+    ) -> None:
+        self.cls = cls
+        self.name = name
+        self.fields = fields
+        self.constructor = constructor if constructor is not None else cls
+        self.decoders = dict(
+            map(lambda mode: (mode, self._compile(mode)), DECODE_MODES)
+        )
+        self.decode = self.decoders[
+            DECODE_MODE if DECODE_MODE in DECODE_MODES else STRICT
+        ]
+
+        SCHEMAS.append(self)
+
+    def _compile(self, mode: str) -> Callable[[object], object]:
+        namespace = {"constructor": self.constructor}
+        lines = []
+        arguments = []
+
+        for [i, field] in enumerate(self.fields):
+            key = repr(field.key)
+            value = f"value{i}"
+            namespace[f"type{i}"] = field.expected_type
+
+            if field.optional:
+                lines.append(f"{value} = blob.get({key})")
+            else:
+                if mode == STRICT:
+                    lines.append(
+                        f"assert {key} in blob and isinstance(blob[{key}], type{i}), "
+                        + f'f"{field.key} should be of type {field.expected_type.__name__} in blob: {{blob}}"'
+                    )
+                lines.append(f"{value} = blob[{key}]")
+
+            if field.enum is not None:
+                # Precomputed, so checking and converting a value is one dictionary lookup
+                namespace[f"enum{i}"] = dict(
+                    map(lambda item: (item.value, item), field.enum)
+                )
+                if mode == STRICT:
+                    lines.append(f"assert {value} in enum{i}, {field.enum_error!r}")
+                lines.append(f"{value} = enum{i}[{value}]")
+
+            if field.decoder is not None:
+                namespace[f"decoder{i}"] = field.decoder
+                if field.optional:
+                    lines.append(
+                        f"{value} = decoder{i}({value}) if {value} is not None else None"
+                    )
+                else:
+                    lines.append(f"{value} = decoder{i}({value})")
+
+            arguments.append(value)
+
+        lines.append(f"return constructor({', '.join(arguments)})")
+
+        if mode == STRICT:
+            body = (
+                ["try:"]
+                + list(map(lambda line: "    " + line, lines))
+                + [
+                    "except:",
+                    f"    print({('Failed to validate ' + self.name + ' json')!r})",
+                    "    raise",
+                ]
+            )
+        else:
+            body = lines
+
+        source = "def decode(blob):\n" + "\n".join(
+            map(lambda line: "    " + line, body)
+        )
+        exec(compile(source, f"<{self.name} {mode} decoder>", "exec"), namespace)
+
+        return namespace["decode"]
+
+
+def set_decode_mode(mode: str) -> None:
+    """
+    Switches every schema to the decoders of mode, one of DECODE_MODES
+    """
+    global DECODE_MODE
+
+    if mode not in DECODE_MODES:
+        raise ValueError(f"Unknown decode mode {mode}, expected one of {DECODE_MODES}")
+
+    DECODE_MODE = mode
+
+    for schema in SCHEMAS:
+        schema.decode = schema.decoders[mode]
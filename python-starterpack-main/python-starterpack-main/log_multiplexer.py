@@ -0,0 +1,149 @@
+import gzip
+import os
+import selectors
+import threading
+import time
+from typing import IO, Optional, TextIO
+
+# How much is read from a pipe at once
+READ_CHUNK_SIZE = 1 << 16
+# The longest line kept in memory, anything longer is split into several lines
+MAX_LINE_BYTES = 1 << 16
+
+# Selectors can't wait on pipes on Windows, so each pipe gets a thread there instead
+USE_SELECTORS = os.name != "nt"
+
+
+class LogMultiplexer:
+    """
+    Streams the output of several processes to the terminal and to one log file per process,
+    line by line as it arrives, instead of collecting everything until the processes exit
+
+    Only a partial line per pipe is ever kept in memory, at most MAX_LINE_BYTES of it.
+
+    names: The name of each process, used to prefix its lines and to name its log file
+    directory: Where the log files go, named after each process in lowercase
+    compress: Whether to gzip the log files
+    echo: Whether to also print every line to the terminal
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        directory: str,
+        compress: bool = False,
+        echo: bool = True,
+    ) -> None:
+        self.names = names
+        self.echo = echo
+        self.start = time.time()
+        self.last_echoed: Optional[int] = None
+        self.lock = threading.Lock()
+        self.pipes: list[tuple[IO[bytes], int]] = []
+
+        os.makedirs(directory, exist_ok=True)
+
+        extension = ".txt.gz" if compress else ".txt"
+        self.filenames = list(
+            map(lambda name: os.path.join(directory, name.lower() + extension), names)
+        )
+        self.files: list[TextIO] = list(
+            map(
+                lambda filename: (
+                    gzip.open(filename, "wt") if compress else open(filename, "w")
+                ),
+                self.filenames,
+            )
+        )
+
+    def add(self, pipe: IO[bytes], index: int) -> None:
+        """
+        Adds a binary pipe, like the stdout of a process opened with stdout=subprocess.PIPE,
+        whose lines belong to the process at index of names
+        """
+        self.pipes.append((pipe, index))
+
+    def _emit(self, index: int, raw_line: bytes) -> None:
+        line = raw_line.decode(errors="replace").rstrip()
+
+        with self.lock:
+            self.files[index].write(f"[{time.time() - self.start:9.3f}] {line}\n")
+
+            if self.echo:
+                if index != self.last_echoed:
+                    self.last_echoed = index
+                    print(f"[{self.names[index]}]:")
+
+                print(f"\t{line}", flush=True)
+
+    def _split(self, index: int, pending: bytearray) -> None:
+        """
+        Emits every complete line in pending and removes it, and splits a line that got too long
+        """
+        while True:
+            end = pending.find(b"\n")
+
+            if end == -1:
+                if len(pending) >= MAX_LINE_BYTES:
+                    self._emit(index, bytes(pending[:MAX_LINE_BYTES]))
+                    del pending[:MAX_LINE_BYTES]
+                    continue
+
+                return
+
+            self._emit(index, bytes(pending[:end]))
+            del pending[: end + 1]
+
+    def _run_selectors(self) -> None:
+        selector = selectors.DefaultSelector()
+        for [pipe, index] in self.pipes:
+            selector.register(pipe, selectors.EVENT_READ, (index, bytearray()))
+
+        open_pipes = len(self.pipes)
+        while open_pipes > 0:
+            for [key, _] in selector.select():
+                index, pending = key.data
+                chunk = os.read(key.fd, READ_CHUNK_SIZE)
+
+                if not chunk:
+                    if pending:
+                        self._emit(index, bytes(pending))
+
+                    selector.unregister(key.fileobj)
+                    open_pipes -= 1
+                    continue
+
+                pending += chunk
+                self._split(index, pending)
+
+        selector.close()
+
+    def _run_threads(self) -> None:
+        def read(pipe: IO[bytes], index: int) -> None:
+            for line in iter(lambda: pipe.readline(MAX_LINE_BYTES), b""):
+                self._emit(index, line)
+
+        threads = list(
+            map(
+                lambda x: threading.Thread(target=read, args=x, daemon=True),
+                self.pipes,
+            )
+        )
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run(self) -> None:
+        """
+        Streams every pipe until all of them are closed, then closes the log files
+        """
+        try:
+            if USE_SELECTORS:
+                self._run_selectors()
+            else:
+                self._run_threads()
+        finally:
+            for file in self.files:
+                file.close()
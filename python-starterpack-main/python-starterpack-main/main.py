@@ -1,24 +1,47 @@
 import argparse
+import asyncio
+import importlib
+import inspect
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from enum import Enum
 import json
 import os
+import random
+import socket
 import subprocess
 import threading
 import time
 import traceback
-from typing import IO
+from typing import Callable, Optional, Union
 import engine
+from log_multiplexer import LogMultiplexer
 import sys
 from game.character.action.ability_action import AbilityAction
 from game.character.action.attack_action import AttackAction
+from game.character.action.lazy_action_map import LazyActionMap
 from game.character.action.move_action import MoveAction
 from game.character.character_class_type import CharacterClassType
 from game.game_state import GameState
+from game.pathfinding import MAX_CACHED_FIELDS, FieldCache
 
+from network.async_client import AsyncClient
 from network.client import Client
 from network.received_message import ReceivedMessage
-from strategy.choose_strategy import choose_strategy
+from network.session_recorder import SessionRecorder, read_sessions
+from network.latency import LatencyStats
+from network.memory_tracker import MemoryTracker
+from network.phase_timer import PhaseTimer, parse_turns
+from network.tagged_output import TaggedOutput, tag_thread
+from strategy.choose_strategy import (
+    HUMAN_STRATEGIES,
+    ZOMBIE_STRATEGIES,
+    choose_strategy,
+)
+from strategy.idle_worker import IdleWorker
+from strategy.strategy import Strategy
+from strategy.turn_budget import DEFAULT_TURN_BUDGET, TurnBudget
 
 raw_debug_env = os.environ.get("DEBUG")
 DEBUG = raw_debug_env == "1" or raw_debug_env == "true"
@@ -38,25 +61,46 @@ class RunOpponent(Enum):
     ZOMBIE_COMPUTER = "zombieComputer"
 
 
+# The ports run uses, a tournament picks free ones for every match instead
+HUMAN_PORT = 9001
+ZOMBIE_PORT = 9002
+
+# Commands are formatted with the human_port and zombie_port of the game
 COMMANDS_FOR_OPPONENT: dict[RunOpponent, list[tuple[str, str]]] = {
     RunOpponent.SELF: [
-        ("Engine", "java -jar engine/engine.jar 9001 9002"),
-        ("Human", "python main.py serve 9001"),
-        ("Zombie", "python main.py serve 9002"),
+        ("Engine", "java -jar engine/engine.jar {human_port} {zombie_port}"),
+        # Both sides from one process, sharing what they work out about the map
+        ("Bots", "python main.py serve {human_port} {zombie_port} --async"),
     ],
     RunOpponent.HUMAN_COMPUTER: [
-        ("Engine", "java -jar engine/engine.jar 0 9002"),
-        ("Zombie", "python main.py serve 9002"),
+        ("Engine", "java -jar engine/engine.jar 0 {zombie_port}"),
+        ("Zombie", "python main.py serve {zombie_port}"),
     ],
     RunOpponent.ZOMBIE_COMPUTER: [
-        ("Engine", "java -jar engine/engine.jar 9001 0"),
-        ("Human", "python main.py serve 9001"),
+        ("Engine", "java -jar engine/engine.jar {human_port} 0"),
+        ("Human", "python main.py serve {human_port}"),
     ],
 }
 
+# If set, each session writes the FINISH message it gets to humans.json or zombies.json here
+FINISH_OUTPUT_DIR = os.environ.get("FINISH_OUTPUT_DIR")
+
+# If set, each session writes how long every phase took, split into spans, to
+# timings.humans.csv/json or timings.zombies.csv/json here
+TIMINGS_DIR = os.environ.get("TIMINGS_DIR")
+# Turns to profile with cProfile, like "10,20-25", printed with DEBUG and saved in TIMINGS_DIR
+PROFILE_TURNS = parse_turns(os.environ.get("PROFILE_TURNS"))
+
+# Set to trace memory with tracemalloc, reported at the end of the game and saved in TIMINGS_DIR
+raw_memory_trace_env = os.environ.get("MEMORY_TRACE")
+MEMORY_TRACE = raw_memory_trace_env == "1" or raw_memory_trace_env == "true"
+
+# How long a single tournament match may take before it's killed
+MATCH_TIMEOUT = 600
+
 
-def run(opponent: RunOpponent):
-    engine.update_if_not_latest()
+def run(opponent: RunOpponent, compress_logs: bool = False, offline: bool = False):
+    engine_update = engine.ensure_engine(offline)
 
     print(
         f"Running against opponent {opponent.value}... (might take a minute, please wait)"
@@ -64,7 +108,12 @@ def run(opponent: RunOpponent):
 
     info = COMMANDS_FOR_OPPONENT[opponent]
     prefixes = list(map(lambda x: x[0], info))
-    commands = list(map(lambda x: x[1], info))
+    commands = list(
+        map(
+            lambda x: x[1].format(human_port=HUMAN_PORT, zombie_port=ZOMBIE_PORT),
+            info,
+        )
+    )
 
     now = datetime.now()
     formatted_now = now.strftime("%Y_%m_%d__%H_%M_%S")
@@ -72,6 +121,8 @@ def run(opponent: RunOpponent):
     output_loc = f"gamelogs/{gamelog_name}.json"
     new_env = os.environ.copy()
     new_env["OUTPUT"] = output_loc
+    # Python buffers output written to a pipe, which would hold the bots' lines back
+    new_env["PYTHONUNBUFFERED"] = "1"
 
     # Launch each command in a separate terminal
     processes: list[subprocess.Popen] = []
@@ -80,231 +131,971 @@ def run(opponent: RunOpponent):
             command,
             shell=True,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True,
-            bufsize=1,
-            text=True,
+            stderr=subprocess.STDOUT,
             env=new_env,
         )
         processes.append(process)
 
-    outputs: list[list[tuple[bool, int, int, str]]] = []
+    # Output is shown and written to the log files as it arrives
+    multiplexer = LogMultiplexer(prefixes, f"logs/{gamelog_name}", compress_logs)
+    for [i, process] in enumerate(processes):
+        multiplexer.add(process.stdout, i)
 
-    def run_and_output(io: IO, i: int, is_err: True):
-        list = []
-        for line in iter(io.readline, ""):
-            line: str
-            list.append((is_err, time.time_ns(), i, line.strip()))
+    multiplexer.run()
 
-        outputs.append(list)
+    for process in processes:
+        process.wait()
 
-    threads: list[threading.Thread] = []
-    for i in range(len(processes) - 1, -1, -1):
-        process = processes[i]
+    print(f"\nFor separated output, see: {', '.join(multiplexer.filenames)}")
 
-        thread_stdout = threading.Thread(
-            target=run_and_output, args=(process.stdout, i, False)
-        )
-        thread_stderr = threading.Thread(
-            target=run_and_output, args=(process.stderr, i, True)
+    engine.wait_for_update(engine_update)
+
+
+@dataclass
+class MatchResult:
+    """
+    How one tournament match went, from the FINISH message the bot received
+
+    error: Why the match has no result, like the engine crashing or timing out
+    """
+
+    match: int
+    seconds: float
+    gamelog: str
+    humans_score: int = 0
+    zombies_score: int = 0
+    turns: int = 0
+    humans_left: int = 0
+    zombies_left: int = 0
+    human_errors: int = 0
+    zombie_errors: int = 0
+    error: Optional[str] = None
+
+
+# Ports handed to matches that are still running, so concurrent matches never share one
+reserved_ports: set[int] = set()
+reserved_ports_lock = threading.Lock()
+
+
+def free_ports(count: int) -> list[int]:
+    """
+    Returns ports nothing is listening on right now, by letting the OS pick them
+
+    The OS may pick a port again once its socket is closed, before the match it was picked
+    for listens on it, so they stay reserved until passed to release_ports.
+    """
+    with reserved_ports_lock:
+        sockets = []
+        ports = []
+        while len(ports) < count:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("localhost", 0))
+            # Kept open until we're done, so the OS can't pick the same port twice here
+            sockets.append(sock)
+
+            port = sock.getsockname()[1]
+            if port not in reserved_ports:
+                ports.append(port)
+
+        for sock in sockets:
+            sock.close()
+
+        reserved_ports.update(ports)
+
+    return ports
+
+
+def release_ports(ports: list[int]) -> None:
+    with reserved_ports_lock:
+        reserved_ports.difference_update(ports)
+
+
+def play_match(opponent: RunOpponent, match: int, directory: str) -> MatchResult:
+    match_directory = os.path.join(directory, f"match_{match}")
+    os.makedirs(match_directory, exist_ok=True)
+
+    human_port, zombie_port = free_ports(2)
+    gamelog = os.path.join(match_directory, "gamelog.json")
+    new_env = os.environ.copy()
+    new_env["OUTPUT"] = gamelog
+    new_env["FINISH_OUTPUT_DIR"] = match_directory
+    if new_env.get("TIMINGS_DIR"):
+        # Every match keeps its own timings, instead of matches overwriting each other's
+        new_env["TIMINGS_DIR"] = match_directory
+
+    start = time.time()
+    processes: list[subprocess.Popen] = []
+    log_files = []
+    for [prefix, command] in COMMANDS_FOR_OPPONENT[opponent]:
+        log_file = open(os.path.join(match_directory, f"{prefix.lower()}.txt"), "w")
+        log_files.append(log_file)
+        processes.append(
+            subprocess.Popen(
+                command.format(human_port=human_port, zombie_port=zombie_port),
+                shell=True,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                env=new_env,
+            )
         )
-        thread_stdout.start()
-        thread_stderr.start()
-        threads.append(thread_stdout)
-        threads.append(thread_stderr)
 
-    for thread in threads:
-        thread.join()
+    error = None
+    try:
+        for process in processes:
+            process.wait(timeout=max(0, MATCH_TIMEOUT - (time.time() - start)))
+    except subprocess.TimeoutExpired:
+        error = f"Timed out after {MATCH_TIMEOUT}s"
+        for process in processes:
+            process.kill()
+            process.wait()
+    finally:
+        for log_file in log_files:
+            log_file.close()
+        release_ports([human_port, zombie_port])
+
+    result = MatchResult(match, time.time() - start, gamelog, error=error)
+
+    # Every side gets the same FINISH message, use whichever was written
+    finish_files = filter(
+        os.path.exists,
+        map(
+            lambda side: os.path.join(match_directory, f"{side}.json"),
+            ["humans", "zombies"],
+        ),
+    )
+    finish_file = next(finish_files, None)
+
+    if finish_file is None:
+        if result.error is None:
+            result.error = (
+                f"No FINISH message received, see the logs in {match_directory}"
+            )
+        return result
 
-    all = []
+    with open(finish_file) as file:
+        record_finish(result, json.load(file))
 
-    for output in outputs:
-        for data in output:
-            all.append(data)
+    return result
 
-    all.sort(key=lambda x: x[1])
 
-    last = -1
+def record_finish(result: MatchResult, message: dict) -> None:
+    """
+    Fills in result from the message of a FINISH phase
+    """
+    result.humans_score = message["scores"]["humans"]
+    result.zombies_score = message["scores"]["zombies"]
+    result.turns = message["stats"]["turns"]
+    result.humans_left = message["stats"]["humansLeft"]
+    result.zombies_left = message["stats"]["zombiesLeft"]
+    result.human_errors = len(message["errors"]["humanErrors"])
+    result.zombie_errors = len(message["errors"]["zombieErrors"])
 
-    for data in all:
-        is_err, time_ns, i, line = data
 
-        if i != last:
-            last = i
-            print(f"[{prefixes[i]}]:")
+def simulate_game(game: int) -> MatchResult:
+    # Only imported by the commands that need it, so the others start faster
+    import sim.simulator
 
-        print(f"\t{line}")
+    # Seeded by the game's number, so every game can be played again the same way
+    random.seed(game)
+    start = time.time()
 
-    files = []
+    finish_message = sim.simulator.play(
+        choose_strategy(False), choose_strategy(True), seed=game
+    )
 
-    prefix = f"logs/{gamelog_name}/"
-    if not os.path.exists(prefix):
-        os.makedirs(prefix, exist_ok=True)
+    result = MatchResult(game, time.time() - start, "")
+    record_finish(result, finish_message)
 
-    for i in range(len(processes)):
-        filename = f"{prefix}{prefixes[i].lower()}.txt"
-        files.append(filename)
-        output = list(map(lambda x: x[3], filter(lambda x: x[2] == i, all)))
+    return result
 
-        with open(filename, "w") as file:
-            file.write("\n".join(output))
 
+def simulate(games: int, workers: int):
     print(
-        "\nNote that output above may not be in the exact order it was output, due to terminal limitations.\n"
-        + f"For separated ordered output, see: {', '.join(files)}"
+        f"Simulating {games} games of your bot against itself, {workers} at a time...\n"
+        + "Note that the simulator only approximates the engine's rules, see sim/rules.py."
     )
 
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(simulate_game, range(games)))
+
+    print_tournament_summary(results)
+
+
+def print_tournament_summary(results: list[MatchResult]) -> None:
+    header = [
+        "Match",
+        "Score (H-Z)",
+        "Turns",
+        "Humans",
+        "Zombies",
+        "Errors (H/Z)",
+        "Time",
+    ]
+    rows = []
+    for result in results:
+        if result.error is not None:
+            rows.append([str(result.match), result.error])
+            continue
+
+        rows.append(
+            [
+                str(result.match),
+                f"{result.humans_score}-{result.zombies_score}",
+                str(result.turns),
+                str(result.humans_left),
+                str(result.zombies_left),
+                f"{result.human_errors}/{result.zombie_errors}",
+                f"{result.seconds:.1f}s",
+            ]
+        )
 
-def serve(port: int):
-    print(f"Connecting to server on port {port}...")
+    widths = list(
+        map(
+            lambda i: max(
+                map(lambda row: len(row[i]) if len(row) == len(header) else 0, rows),
+                default=0,
+            ),
+            range(len(header)),
+        )
+    )
+    widths = list(map(lambda x: max(x[0], len(x[1])), zip(widths, header)))
 
-    client = Client(port)
+    print("  ".join(map(lambda x: x[1].ljust(x[0]), zip(widths, header))))
+    for row in rows:
+        print("  ".join(map(lambda x: x[1].ljust(x[0]), zip(widths, row))))
 
-    client.connect()
+    finished = list(filter(lambda result: result.error is None, results))
+    print(f"\n{len(finished)} of {len(results)} matches finished")
 
-    print(f"Connected to server on port {port}")
+    if len(finished) == 0:
+        return
 
-    while True:
-        raw_received = client.read()
+    human_wins = len(list(filter(lambda r: r.humans_score > r.zombies_score, finished)))
+    zombie_wins = len(
+        list(filter(lambda r: r.zombies_score > r.humans_score, finished))
+    )
+    mean = lambda values: sum(values) / len(finished)
 
-        if raw_received:
-            try:
-                received = json.loads(raw_received)
-                received_message = ReceivedMessage.deserialize(received)
-                is_zombie = received_message.is_zombie
-                phase = received_message.phase
-                message = received_message.message
-                turn = message["turn"]
-
-                if phase != "CHOOSE_CLASSES" and phase != "FINISH":
-                    game_state = GameState.deserialize(message)
-
-                if phase != "FINISH":
-                    if DEBUG:
-                        print(
-                            f"[TURN {turn}]: Getting your bot's response to {phase} phase..."
+    print(
+        f"Wins: {human_wins} humans, {zombie_wins} zombies, {len(finished) - human_wins - zombie_wins} draws\n"
+        + f"Mean score: {mean(map(lambda r: r.humans_score, finished)):.2f}-{mean(map(lambda r: r.zombies_score, finished)):.2f} (H-Z)\n"
+        + f"Mean turns: {mean(map(lambda r: r.turns, finished)):.1f}, "
+        + f"mean left: {mean(map(lambda r: r.humans_left, finished)):.1f} humans, {mean(map(lambda r: r.zombies_left, finished)):.1f} zombies\n"
+        + f"Errors: {sum(map(lambda r: r.human_errors, finished))} human, {sum(map(lambda r: r.zombie_errors, finished))} zombie"
+    )
+
+
+def tournament(
+    opponent: RunOpponent, matches: int, concurrency: int, offline: bool = False
+):
+    engine_update = engine.ensure_engine(offline)
+
+    print(
+        f"Running {matches} matches against opponent {opponent.value}, {concurrency} at a time... (might take a while, please wait)"
+    )
+
+    now = datetime.now()
+    formatted_now = now.strftime("%Y_%m_%d__%H_%M_%S")
+    directory = f"logs/tournament_{formatted_now}"
+    os.makedirs(directory, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(
+            executor.map(
+                lambda match: play_match(opponent, match, directory), range(matches)
+            )
+        )
+
+    print_tournament_summary(results)
+
+    with open(os.path.join(directory, "summary.json"), "w") as file:
+        json.dump(list(map(asdict, results)), file, indent=2)
+
+    print(f"\nFor each match's logs and gamelog, see: {directory}")
+
+    engine.wait_for_update(engine_update)
+
+
+def accepts_budget(method: Callable) -> bool:
+    """
+    Returns whether a strategy method takes a budget, strategies written before budgets existed
+    don't, and are called without one
+    """
+    try:
+        parameters = inspect.signature(method).parameters.values()
+    except (TypeError, ValueError):
+        return False
+
+    return any(
+        map(
+            lambda p: p.name == "budget" or p.kind == inspect.Parameter.VAR_KEYWORD,
+            parameters,
+        )
+    )
+
+
+class BotSession:
+    """
+    The state of your bot for one game: a single strategy instance that is kept for every phase,
+    and caches that should outlive the game state of a single phase
+
+    field_cache: Distance fields to share with other sessions in this process playing on the same
+        map, otherwise the session gets its own
+    recorder: Records every message and response to a session file, for main.py replay
+    strategy_factory: Picks the strategy once the session knows its side, choose_strategy if
+        not given
+    trace_memory: Whether to trace the memory of every phase, MEMORY_TRACE if not given
+    """
+
+    def __init__(
+        self,
+        field_cache: Optional[FieldCache] = None,
+        recorder: Optional[SessionRecorder] = None,
+        strategy_factory: Callable[[bool], Strategy] = choose_strategy,
+        trace_memory: bool = MEMORY_TRACE,
+    ) -> None:
+        self.recorder = recorder
+        self.strategy_factory = strategy_factory
+        self.strategy: Optional[Strategy] = None
+        self.worker: Optional[IdleWorker] = None
+        self.field_cache = field_cache if field_cache is not None else FieldCache()
+        self.game_state: Optional[GameState] = None
+        self.turn: Optional[int] = None
+        self.finished = False
+        self.timer = PhaseTimer(PROFILE_TURNS)
+        # Which side the session plays, once the first message says, to tag its output with
+        self.side: Optional[str] = None
+        # The decide methods of the strategy that take a budget
+        self.budget_methods: set[str] = set()
+        self.memory = MemoryTracker() if trace_memory else None
+
+    def respond(self, raw_received: Union[str, bytes]) -> Optional[str]:
+        """
+        Handles one message received from the engine
+
+        Returns the response to send back, or None if the engine doesn't expect one
+        """
+        # Sessions can take turns on the same thread, so its output is tagged for every message
+        tag_thread(self.side)
+
+        try:
+            if self.recorder is None:
+                return self._respond(raw_received)
+
+            self.recorder.received(raw_received)
+            response = self._respond(raw_received)
+
+            if response is not None:
+                self.recorder.sent(response)
+            if self.finished:
+                self.recorder.close()
+
+            return response
+        finally:
+            tag_thread(None)
+
+    def _respond(self, raw_received: Union[str, bytes]) -> Optional[str]:
+        # Started before decoding, so the strategy knows how much time is actually left
+        budget = TurnBudget()
+        timer = self.timer
+        timer.begin()
+        memory = self.memory
+        if memory is not None:
+            memory.begin()
+
+        # Don't let background work for a phase that already arrived compete with responding
+        if self.worker is not None:
+            self.worker.cancel_pending()
+
+        try:
+            received = json.loads(raw_received)
+            received_message = ReceivedMessage.deserialize(received)
+            is_zombie = received_message.is_zombie
+            phase = received_message.phase
+            message = received_message.message
+            turn = message["turn"]
+
+            if self.side is None:
+                self.side = "Zombies" if is_zombie else "Humans"
+                tag_thread(self.side)
+
+            timer.lap("json_loads")
+            if phase != "FINISH":
+                timer.phase(turn, phase)
+
+            if phase != "CHOOSE_CLASSES" and phase != "FINISH":
+                # Only the parts that changed since the last phase are rebuilt
+                game_state = GameState.deserialize(
+                    message, self.field_cache, self.game_state
+                )
+                self.game_state = game_state
+                timer.lap("deserialize")
+
+            if memory is not None and phase != "FINISH":
+                memory.deciding(turn, phase)
+                # Like in _decided, the snapshot isn't the strategy's time
+                timer.skip()
+
+            if phase != "FINISH":
+                if DEBUG:
+                    print(
+                        f"[TURN {turn}]: Getting your bot's response to {phase} phase..."
+                    )
+
+                if self.strategy is None:
+                    self.strategy = self.strategy_factory(is_zombie)
+                    # Checked once, instead of on every call
+                    self.budget_methods = set(
+                        filter(
+                            lambda name: accepts_budget(getattr(self.strategy, name)),
+                            ["decide_moves", "decide_attacks", "decide_abilities"],
                         )
-                    strategy = choose_strategy(is_zombie)
+                    )
+                    self.worker = IdleWorker()
+                    tag_thread(self.side, self.worker.thread)
+                    self.strategy.on_game_start(is_zombie)
+
+                strategy = self.strategy
+
+                if phase != "CHOOSE_CLASSES" and turn != self.turn:
+                    self.turn = turn
+                    strategy.on_turn_start(turn, game_state)
+
+            if phase == "CHOOSE_CLASSES":
+                raw_possible_classes: list = message["choices"]
+                possible_classes: list[CharacterClassType] = list(
+                    map(lambda x: CharacterClassType[x], raw_possible_classes)
+                )
+                num_to_pick = message["numToPick"]
+                max_per_same_class = message["maxPerSameClass"]
+
+                raw_output = strategy.decide_character_classes(
+                    possible_classes, num_to_pick, max_per_same_class
+                )
+                self._decided()
+
+                if raw_output == None:
+                    raise RuntimeError(
+                        "Your decide_character_classes strategy returned nothing (None)!"
+                    )
 
-                if phase == "CHOOSE_CLASSES":
-                    raw_possible_classes: list = message["choices"]
-                    possible_classes: list[CharacterClassType] = list(
-                        map(lambda x: CharacterClassType[x], raw_possible_classes)
+                output = dict()
+
+                for [class_type, num] in raw_output.items():
+                    output[class_type.value] = num
+
+                response = json.dumps(output)
+            elif phase == "MOVE":
+                raw_possible_moves: dict = message["possibleMoves"]
+                possible_moves = LazyActionMap(
+                    raw_possible_moves,
+                    MoveAction.deserialize,
+                    # Decoded while the strategy runs, but counted separately
+                    lambda decode_all: timer.timed("decode_actions", decode_all),
+                )
+
+                output = strategy.decide_moves(
+                    possible_moves, game_state, **self._budget("decide_moves", budget)
+                )
+                self._decided()
+
+                if output == None:
+                    raise RuntimeError(
+                        "Your decide_moves strategy returned nothing (None)!"
                     )
-                    num_to_pick = message["numToPick"]
-                    max_per_same_class = message["maxPerSameClass"]
 
-                    raw_output = strategy.decide_character_classes(
-                        possible_classes, num_to_pick, max_per_same_class
+                response = json.dumps(list(map(MoveAction.serialize, output)))
+            elif phase == "ATTACK":
+                raw_possible_attacks: dict = message["possibleAttacks"]
+                possible_attacks = LazyActionMap(
+                    raw_possible_attacks,
+                    AttackAction.deserialize,
+                    # Decoded while the strategy runs, but counted separately
+                    lambda decode_all: timer.timed("decode_actions", decode_all),
+                )
+
+                output = strategy.decide_attacks(
+                    possible_attacks,
+                    game_state,
+                    **self._budget("decide_attacks", budget),
+                )
+                self._decided()
+
+                if output == None:
+                    raise RuntimeError(
+                        "Your decide_attacks strategy returned nothing (None)!"
                     )
 
-                    if raw_output == None:
-                        raise RuntimeError(
-                            "Your decide_character_classes strategy returned nothing (None)!"
-                        )
+                response = json.dumps(list(map(AttackAction.serialize, output)))
+            elif phase == "ABILITY":
+                raw_possible_abilities: dict = message["possibleAbilities"]
+                possible_abilities = LazyActionMap(
+                    raw_possible_abilities,
+                    AbilityAction.deserialize,
+                    # Decoded while the strategy runs, but counted separately
+                    lambda decode_all: timer.timed("decode_actions", decode_all),
+                )
+
+                output = strategy.decide_abilities(
+                    possible_abilities,
+                    game_state,
+                    **self._budget("decide_abilities", budget),
+                )
+                self._decided()
+
+                if output == None:
+                    raise RuntimeError(
+                        "Your decide_abilities strategy returned nothing (None)!"
+                    )
+
+                response = json.dumps(list(map(AbilityAction.serialize, output)))
+            elif phase == "FINISH":
+                humans_score = message["scores"]["humans"]
+                zombies_score = message["scores"]["zombies"]
+                humans_left = message["stats"]["humansLeft"]
+                zombies_left = message["stats"]["zombiesLeft"]
+                turn = message["stats"]["turns"]
+                errors = message["errors"]
+                your_errors = errors["zombieErrors" if is_zombie else "humanErrors"]
+                formatted_errors = "\n".join(your_errors)
+                formatted_errors_message = (
+                    f"Your bot had {len(your_errors)} errors:\n${formatted_errors}"
+                    if len(your_errors) > 0
+                    else "Your bot had no errors."
+                )
+
+                print(
+                    f"\n{formatted_errors_message}\n\n"
+                    f"Finished game on turn {turn} with {humans_left} humans and {zombies_left} zombies.\n"
+                    + f"Score: {humans_score}-{zombies_score} (H-Z). You were the {'humans' if not is_zombie else 'zombies'}."
+                )
+
+                self.finished = True
+
+                if FINISH_OUTPUT_DIR:
+                    with open(
+                        os.path.join(
+                            FINISH_OUTPUT_DIR,
+                            f"{'zombies' if is_zombie else 'humans'}.json",
+                        ),
+                        "w",
+                    ) as file:
+                        json.dump(message, file)
+
+                if self.worker is not None:
+                    self.worker.stop()
+
+                if self.strategy is not None:
+                    self.strategy.on_game_end(message)
+
+                self.report_performance(is_zombie)
+
+                return None
+            else:
+                raise RuntimeError(f"Unknown phase type {phase}")
+
+            timer.lap("serialize")
+
+            if DEBUG:
+                print(f"[TURN {turn}]: Send response to {phase} phase to server!")
+
+            return response
+        except Exception as e:
+            print(f"Something went wrong running your bot: {e}", file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
+            return "null"
+        finally:
+            timer.end()
+
+    def _decided(self) -> None:
+        """
+        Ends the strategy span, and the traced memory of the phase right away, so building the
+        response isn't counted as memory the strategy retained
+        """
+        self.timer.lap("strategy")
+
+        if self.memory is not None:
+            self.memory.decided()
+            # Not part of any span, tracing only slows things down while it's on
+            self.timer.skip()
+
+    def _budget(self, method: str, budget: TurnBudget) -> dict[str, TurnBudget]:
+        return {"budget": budget} if method in self.budget_methods else dict()
+
+    def report_performance(self, is_zombie: bool) -> None:
+        """
+        Prints where the game's time went with DEBUG and its memory with MEMORY_TRACE, and saves
+        them to TIMINGS_DIR if it's set
+        """
+        side = "zombies" if is_zombie else "humans"
+
+        if self.memory is not None:
+            print(self.memory.summary())
+
+            if TIMINGS_DIR:
+                self.memory.dump(TIMINGS_DIR, f"memory.{side}")
+
+        if DEBUG:
+            print(self.timer.summary())
+
+            profile = self.timer.profile_summary()
+            if profile is not None:
+                print(f"Profile of turns {sorted(PROFILE_TURNS)}:\n{profile}")
+
+        if TIMINGS_DIR:
+            self.timer.dump(TIMINGS_DIR, f"timings.{side}")
+
+    def idle(self) -> None:
+        """
+        Lets the strategy start background work for the next phase, call it once the response
+        to the last phase has been sent
+        """
+        if self.finished or self.strategy is None or self.game_state is None:
+            return
+
+        tag_thread(self.side)
+
+        try:
+            self.strategy.on_idle(self.game_state, self.worker)
+        except Exception as e:
+            print(f"Something went wrong in your bot's on_idle: {e}", file=sys.stderr)
+            traceback.print_exc(file=sys.stderr)
+        finally:
+            tag_thread(None)
 
-                    output = dict()
 
-                    for [class_type, num] in raw_output.items():
-                        output[class_type.value] = num
+def serve(port: int, unix_socket: Optional[str] = None, record: Optional[str] = None):
+    address = f"socket {unix_socket}" if unix_socket is not None else f"port {port}"
+    print(f"Connecting to server on {address}...")
 
-                    response = json.dumps(output)
+    client = Client(port, unix_socket)
 
-                    client.write(response)
-                elif phase == "MOVE":
-                    raw_possible_moves: dict = message["possibleMoves"]
-                    possible_moves = dict()
+    client.connect()
 
-                    for [id, possibles] in raw_possible_moves.items():
-                        actions: list[MoveAction] = list()
-                        for possible in possibles:
-                            actions.append(MoveAction.deserialize(possible))
+    print(f"Connected to server on {address}")
 
-                        possible_moves[id] = actions
+    session = BotSession(recorder=SessionRecorder(record) if record else None)
 
-                    output = strategy.decide_moves(possible_moves, game_state)
+    while not session.finished:
+        # Kept as bytes, json.loads decodes them itself
+        raw_received = client.read_bytes()
 
-                    if output == None:
-                        raise RuntimeError(
-                            "Your decide_moves strategy returned nothing (None)!"
-                        )
+        if raw_received:
+            response = session.respond(raw_received)
 
-                    response = json.dumps(list(map(MoveAction.serialize, output)))
+            if response is not None:
+                start = time.perf_counter()
+                client.write(response)
+                session.timer.add("write", time.perf_counter() - start)
 
-                    client.write(response)
-                elif phase == "ATTACK":
-                    raw_possible_attacks: dict = message["possibleAttacks"]
-                    possible_attacks = dict()
+            session.idle()
 
-                    for [id, possibles] in raw_possible_attacks.items():
-                        actions: list[AttackAction] = list()
-                        for possible in possibles:
-                            actions.append(AttackAction.deserialize(possible))
+    if DEBUG:
+        print(client.stats.summary())
 
-                        possible_attacks[id] = actions
 
-                    output = strategy.decide_attacks(possible_attacks, game_state)
+async def respond_in_time(response: asyncio.Future, address: str) -> Optional[str]:
+    """
+    Waits for a response being computed, warning once if it's taking longer than the engine
+    likely allows
+    """
+    done, _ = await asyncio.wait({response}, timeout=DEFAULT_TURN_BUDGET)
 
-                    if output == None:
-                        raise RuntimeError(
-                            "Your decide_attacks strategy returned nothing (None)!"
-                        )
+    if not done:
+        print(
+            f"Your bot has taken more than {DEFAULT_TURN_BUDGET}s to respond on {address}, the engine may time out!",
+            file=sys.stderr,
+        )
 
-                    response = json.dumps(list(map(AttackAction.serialize, output)))
+    return await response
 
-                    client.write(response)
-                elif phase == "ABILITY":
-                    raw_possible_abilities: dict = message["possibleAbilities"]
-                    possible_abilities = dict()
 
-                    for [id, possibles] in raw_possible_abilities.items():
-                        actions: list[AbilityAction] = list()
-                        for possible in possibles:
-                            actions.append(AbilityAction.deserialize(possible))
+async def serve_connection(
+    port: int,
+    unix_socket: Optional[str],
+    executor: Executor,
+    field_cache: Optional[FieldCache] = None,
+    record: Optional[str] = None,
+    trace_memory: bool = MEMORY_TRACE,
+) -> None:
+    address = f"socket {unix_socket}" if unix_socket is not None else f"port {port}"
+    print(f"Connecting to server on {address}...")
 
-                        possible_abilities[id] = actions
+    client = AsyncClient(port, unix_socket)
 
-                    output = strategy.decide_abilities(possible_abilities, game_state)
+    await client.connect()
 
-                    if output == None:
-                        raise RuntimeError(
-                            "Your decide_abilities strategy returned nothing (None)!"
-                        )
+    print(f"Connected to server on {address}")
 
-                    response = json.dumps(list(map(AbilityAction.serialize, output)))
-
-                    client.write(response)
-                elif phase == "FINISH":
-                    humans_score = message["scores"]["humans"]
-                    zombies_score = message["scores"]["zombies"]
-                    humans_left = message["stats"]["humansLeft"]
-                    zombies_left = message["stats"]["zombiesLeft"]
-                    turn = message["stats"]["turns"]
-                    errors = message["errors"]
-                    your_errors = errors["zombieErrors" if is_zombie else "humanErrors"]
-                    formatted_errors = "\n".join(your_errors)
-                    formatted_errors_message = (
-                        f"Your bot had {len(your_errors)} errors:\n${formatted_errors}"
-                        if len(your_errors) > 0
-                        else "Your bot had no errors."
-                    )
+    session = BotSession(
+        field_cache,
+        SessionRecorder(record) if record else None,
+        trace_memory=trace_memory,
+    )
+    loop = asyncio.get_running_loop()
 
-                    print(
-                        f"\n{formatted_errors_message}\n\n"
-                        f"Finished game on turn {turn} with {humans_left} humans and {zombies_left} zombies.\n"
-                        + f"Score: {humans_score}-{zombies_score} (H-Z). You were the {'humans' if not is_zombie else 'zombies'}."
+    while not session.finished:
+        raw_received = await client.read_bytes()
+
+        if not raw_received and client.closed():
+            break
+
+        if raw_received:
+            # Decoding and running the strategy happen off the event loop, so it keeps reading
+            # from every other connection in the meantime
+            response = await respond_in_time(
+                loop.run_in_executor(executor, session.respond, raw_received),
+                address,
+            )
+
+            if response is not None:
+                start = time.perf_counter()
+                await client.write(response)
+                session.timer.add("write", time.perf_counter() - start)
+
+            session.idle()
+
+    await client.disconnect()
+
+    if DEBUG:
+        # Printed from the event loop, which every session shares
+        tag_thread(session.side)
+        print(client.stats.summary())
+        tag_thread(None)
+
+
+def serve_async(
+    ports: list[int], unix_socket: Optional[str] = None, record: Optional[str] = None
+):
+    """
+    Serves your bot to an engine on every port at once from one process, each with its own
+    session, like both sides of a game against yourself
+
+    Every port is expected to play on the same map, so the sessions share one field cache and
+    a distance field found by one side is reused by the other.
+
+    When recording with several ports, each one records to the record path followed by the port.
+    MEMORY_TRACE is ignored with several ports, since tracemalloc can't tell their games apart.
+    With several ports, every line the sessions print starts with their side. A port whose
+    connection fails is reported once the others are done, and the process exits with 1.
+    """
+    field_cache = FieldCache(MAX_CACHED_FIELDS * len(ports))
+
+    trace_memory = MEMORY_TRACE and len(ports) == 1
+    if MEMORY_TRACE and not trace_memory:
+        print(
+            "MEMORY_TRACE only works with one game per process, not tracing memory",
+            file=sys.stderr,
+        )
+
+    if len(ports) > 1:
+        sys.stdout = TaggedOutput(sys.stdout)
+        sys.stderr = TaggedOutput(sys.stderr)
+
+    async def serve_all() -> list:
+        with ThreadPoolExecutor(max_workers=len(ports)) as executor:
+            # A connection that fails doesn't take the games on the others down with it
+            return await asyncio.gather(
+                *map(
+                    lambda port: serve_connection(
+                        port,
+                        unix_socket,
+                        executor,
+                        field_cache,
+                        (f"{record}.{port}" if record and len(ports) > 1 else record),
+                        trace_memory,
+                    ),
+                    ports,
+                ),
+                return_exceptions=True,
+            )
+
+    results = asyncio.run(serve_all())
+
+    failed = 0
+    for [port, result] in zip(ports, results):
+        if isinstance(result, BaseException):
+            failed += 1
+            address = (
+                f"socket {unix_socket}" if unix_socket is not None else f"port {port}"
+            )
+            print(f"Serving on {address} failed: {result!r}", file=sys.stderr)
+            traceback.print_exception(
+                type(result), result, result.__traceback__, file=sys.stderr
+            )
+
+    if failed:
+        sys.exit(1)
+
+
+def replay(
+    path: str,
+    strategy_factory: Callable[[bool], Strategy] = choose_strategy,
+    repeat: int = 1,
+):
+    sessions = read_sessions(path)
+    print(
+        f"Replaying {sum(map(len, sessions))} messages in {len(sessions)} session(s) from "
+        + f"{path}, {repeat} time(s)..."
+    )
+
+    latencies: dict[str, LatencyStats] = dict()
+    recorded_latencies: dict[str, LatencyStats] = dict()
+    differences = []
+
+    for repetition in range(repeat):
+        for phases in sessions:
+            # Every recorded session gets a fresh one, like it did while recording
+            session = BotSession(strategy_factory=strategy_factory)
+
+            for recorded in phases:
+                # Read outside of the timing, the session decodes the message itself
+                received = json.loads(recorded.received)
+                phase = received["phase"]
+                turn = received["message"]["turn"]
+
+                start = time.perf_counter()
+                response = session.respond(recorded.received)
+                took = time.perf_counter() - start
+                session.idle()
+
+                latencies.setdefault(phase, LatencyStats()).add(took)
+
+                if repetition > 0:
+                    continue
+
+                if recorded.responded_at is not None:
+                    recorded_latencies.setdefault(phase, LatencyStats()).add(
+                        recorded.responded_at - recorded.received_at
                     )
-                    break
-                else:
-                    raise RuntimeError(f"Unknown phase type {phase}")
 
-                if DEBUG:
-                    print(f"[TURN {turn}]: Send response to {phase} phase to server!")
+                if response != recorded.response:
+                    differences.append((turn, phase, recorded.response, response))
+
+            if session.worker is not None:
+                session.worker.stop()
+
+    print("\nDecision latency by phase (replayed, then as recorded):")
+    for [phase, stats] in latencies.items():
+        print(f"  {phase}: {stats.summary()}")
+        if phase in recorded_latencies:
+            print(f"  {' ' * len(phase)}  {recorded_latencies[phase].summary()}")
+
+    if not differences:
+        print("\nEvery response matched the recording.")
+        return
+
+    print(
+        f"\n{len(differences)} responses differ from the recording "
+        + "(expected if your strategy is random or has changed since):"
+    )
+    for [turn, phase, recorded_response, response] in differences[:10]:
+        print(f"  [TURN {turn}] {phase}:")
+        print(f"    recorded: {str(recorded_response)[:200]}")
+        print(f"    replayed: {str(response)[:200]}")
+
+
+def mock_engine(
+    port: int,
+    is_zombie: bool,
+    turns: int,
+    phases: list[str],
+    scale: float,
+    seed: int,
+    spawn_bot: bool,
+):
+    from network.mock_engine import MockEngine
 
-            except Exception as e:
-                print(f"Something went wrong running your bot: {e}", file=sys.stderr)
-                traceback.print_exc(file=sys.stderr)
-                client.write("null")
+    engine = MockEngine(port, is_zombie, turns, phases, scale, seed)
+
+    print(
+        f"Mock engine listening on port {port} for a {'zombie' if is_zombie else 'human'} bot, "
+        + f"{turns} turns of {', '.join(phases)} at {scale}x scale..."
+    )
+
+    bot = None
+    if spawn_bot:
+        bot = subprocess.Popen(
+            [sys.executable, "main.py", "serve", str(port)],
+            stdout=subprocess.DEVNULL,
+        )
+
+    report = engine.run()
+
+    if bot is not None:
+        bot.wait()
+
+    print(report.summary())
+
+
+def benchmark(
+    scales: list[str],
+    strategies: Optional[list[str]],
+    repeat: int,
+    seed: int,
+    output: str,
+    baseline_path: str,
+    save_baseline: bool,
+    tolerance: Optional[float] = None,
+    require_baseline: bool = False,
+):
+    from benchmarks import suite
+    from benchmarks.synthetic import SCALES
+
+    if tolerance is None:
+        tolerance = suite.DEFAULT_TOLERANCE
+
+    missing_baseline = not save_baseline and not os.path.exists(baseline_path)
+    if missing_baseline:
+        # Said up front too, so it isn't missed after minutes of timing
+        print(
+            f"Warning: no baseline in {baseline_path}, so this run can't find regressions. "
+            + "Save one with --save-baseline first.",
+            file=sys.stderr,
+        )
+        if require_baseline:
+            sys.exit(1)
+
+    chosen = {False: HUMAN_STRATEGIES, True: ZOMBIE_STRATEGIES}
+    if strategies is not None:
+        for [is_zombie, registry] in list(chosen.items()):
+            chosen[is_zombie] = dict(
+                filter(lambda x: x[0] in strategies, registry.items())
+            )
+
+    results = suite.run_benchmarks(
+        list(map(lambda name: SCALES[name], scales)), chosen, repeat, seed
+    )
+    serialized = suite.serialize_results(results, repeat, seed)
+    suite.write_results(output, serialized)
+
+    if save_baseline:
+        suite.write_results(baseline_path, serialized)
+        suite.print_results(results, None)
+        print(f"\nSaved the results as the baseline in {baseline_path}")
+        return
+
+    baseline = suite.read_results(baseline_path) if not missing_baseline else None
+    suite.print_results(results, baseline)
+    print(f"\nWrote the results to {output}")
+
+    if baseline is None:
+        print(
+            f"\nWarning: nothing was compared, there's no baseline in {baseline_path}. "
+            + "Save one with --save-baseline, timings only compare on the same machine.",
+            file=sys.stderr,
+        )
+        return
+
+    regressions = suite.compare(results, baseline, tolerance)
+    if not regressions:
+        print("No regressions from the baseline")
+        return
+
+    print(f"\n{len(regressions)} regressions from the baseline:")
+    for regression in regressions:
+        print(f"  {regression}")
+    sys.exit(1)
 
 
 def main():
@@ -315,7 +1106,42 @@ def main():
         "serve",
         help="Serves your bot to an engine on the port passed, requires engine to be running there",
     )
-    serve_parser.add_argument("port", type=int, help="Port to connect to")
+    serve_parser.add_argument(
+        "port",
+        type=int,
+        nargs="+",
+        help="Port to connect to, or several ports to serve a game on each at once with --async",
+    )
+    serve_parser.add_argument(
+        "--unix-socket",
+        help="Connect to an engine on this machine through the Unix domain socket at this path instead of the port",
+    )
+    serve_parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Serve with asyncio, running your bot in a thread pool so reading from the engine never waits on it",
+    )
+    serve_parser.add_argument(
+        "--record",
+        help="Record every message and response of the game to this gzipped session file, to replay it later",
+    )
+
+    replay_parser = subparsers.add_parser(
+        "replay",
+        help="Feed the messages of a recorded session to your bot again, without an engine, and time it",
+    )
+    replay_parser.add_argument("file", help="Session file recorded with serve --record")
+    replay_parser.add_argument(
+        "--strategy",
+        help="Strategy class to replay with, like strategy.random_strategy:RandomStrategy, defaults to choose_strategy",
+    )
+    replay_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="How many times to replay the session, to get steadier timings",
+    )
 
     run_parser = subparsers.add_parser("run", help="Run your bot against an opponent")
     run_parser.add_argument(
@@ -323,16 +1149,223 @@ def main():
         choices=list(map(lambda opponent: opponent.value, list(RunOpponent))),
         help="Opponent to put your bot against, where self is your own bot or computer is against a simple computer bot",
     )
+    run_parser.add_argument(
+        "--compress-logs",
+        action="store_true",
+        help="Gzip the log files of each process",
+    )
+    run_parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Don't check for a new engine, just run the installed one",
+    )
+
+    tournament_parser = subparsers.add_parser(
+        "tournament",
+        help="Run many matches against an opponent at once and summarize the results",
+    )
+    tournament_parser.add_argument(
+        "opponent",
+        choices=list(map(lambda opponent: opponent.value, list(RunOpponent))),
+        help="Opponent to put your bot against in every match, like for run",
+    )
+    tournament_parser.add_argument(
+        "--matches", type=int, default=10, help="How many matches to run"
+    )
+    tournament_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 2),
+        help="How many matches to run at once, defaults to half the CPU cores since each runs an engine and a bot",
+    )
+    tournament_parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Don't check for a new engine, just run the installed one",
+    )
+
+    simulate_parser = subparsers.add_parser(
+        "simulate",
+        help="Play many quick games of your bot against itself on the built in simulator, no engine needed",
+    )
+    simulate_parser.add_argument(
+        "--games", type=int, default=100, help="How many games to play"
+    )
+    simulate_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="How many processes to play games on, defaults to one per CPU core",
+    )
+
+    benchmark_parser = subparsers.add_parser(
+        "benchmark",
+        help="Time how long every registered strategy takes to decide each phase on generated states of several sizes",
+    )
+    benchmark_parser.add_argument(
+        "--scales",
+        help="Comma separated scales to generate states at, from benchmarks/synthetic.py, defaults to all of them",
+    )
+    benchmark_parser.add_argument(
+        "--strategies",
+        help="Comma separated names of the strategies to time, from strategy/choose_strategy.py, defaults to all of them",
+    )
+    benchmark_parser.add_argument(
+        "--repeat", type=int, default=5, help="How many times to time each decision"
+    )
+    benchmark_parser.add_argument(
+        "--seed", type=int, default=0, help="Seed of the generated states"
+    )
+    benchmark_parser.add_argument(
+        "--output",
+        default=os.path.join("benchmarks", "results.json"),
+        help="Where to write the results as json",
+    )
+    benchmark_parser.add_argument(
+        "--baseline",
+        default=os.path.join("benchmarks", "baseline.json"),
+        help="Results to compare to, the benchmark fails if anything got slower than them",
+    )
+    benchmark_parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Save the results as the new baseline instead of comparing to it",
+    )
+    benchmark_parser.add_argument(
+        "--require-baseline",
+        action="store_true",
+        help="Fail right away if there's no baseline to compare to, instead of only warning",
+    )
+    benchmark_parser.add_argument(
+        "--tolerance",
+        type=float,
+        help="How much slower than the baseline is still fine, 0.25 is 25%% slower, defaults to DEFAULT_TOLERANCE in benchmarks/suite.py",
+    )
+
+    mock_engine_parser = subparsers.add_parser(
+        "mock-engine",
+        help="Run a lightweight stand-in engine on a port, to load test a bot served to it and time its responses",
+    )
+    mock_engine_parser.add_argument("port", type=int, help="Port to listen on")
+    mock_engine_parser.add_argument(
+        "--zombie",
+        action="store_true",
+        help="Have the bot play zombies instead of humans",
+    )
+    mock_engine_parser.add_argument(
+        "--turns", type=int, default=20, help="How many of the bot's turns to play"
+    )
+    mock_engine_parser.add_argument(
+        "--phases",
+        default="MOVE,ATTACK,ABILITY",
+        help="Comma separated phases to send each turn, in order",
+    )
+    mock_engine_parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="How many times more characters and terrain than a normal game to send",
+    )
+    mock_engine_parser.add_argument(
+        "--seed", type=int, default=0, help="Seed of the map and spawns"
+    )
+    mock_engine_parser.add_argument(
+        "--spawn-bot",
+        action="store_true",
+        help="Also start your bot with serve, instead of waiting for one to connect",
+    )
 
     args = parser.parse_args()
 
     # Match to a valid command
     if args.command == "serve":
-        return serve(args.port)
+        if len(args.port) > 1 and (not args.use_async or args.unix_socket):
+            parser.error(
+                "Serving several ports at once requires --async and no --unix-socket"
+            )
+
+        if args.use_async:
+            return serve_async(args.port, args.unix_socket, args.record)
+
+        return serve(args.port[0], args.unix_socket, args.record)
+    elif args.command == "replay":
+        if args.repeat < 1:
+            parser.error("--repeat must be at least 1")
+
+        strategy_factory = choose_strategy
+        if args.strategy:
+            module_name, _, class_name = args.strategy.partition(":")
+            strategy_class = getattr(importlib.import_module(module_name), class_name)
+            strategy_factory = lambda is_zombie: strategy_class()
+
+        return replay(args.file, strategy_factory, args.repeat)
     elif args.command == "run":
         for opponent in list(RunOpponent):
             if opponent.value == args.opponent:
-                return run(opponent)
+                return run(opponent, args.compress_logs, args.offline)
+    elif args.command == "tournament":
+        if args.matches < 1 or args.concurrency < 1:
+            parser.error("--matches and --concurrency must be at least 1")
+
+        for opponent in list(RunOpponent):
+            if opponent.value == args.opponent:
+                return tournament(
+                    opponent, args.matches, args.concurrency, args.offline
+                )
+    elif args.command == "mock-engine":
+        from network.mock_engine import PHASE_ACTIONS
+
+        phases = list(filter(None, map(str.strip, args.phases.split(","))))
+        if not phases or any(map(lambda phase: phase not in PHASE_ACTIONS, phases)):
+            parser.error(f"--phases must be some of {', '.join(PHASE_ACTIONS)}")
+        if args.turns < 1 or args.scale <= 0:
+            parser.error("--turns and --scale must be positive")
+
+        return mock_engine(
+            args.port,
+            args.zombie,
+            args.turns,
+            phases,
+            args.scale,
+            args.seed,
+            args.spawn_bot,
+        )
+    elif args.command == "benchmark":
+        from benchmarks.synthetic import SCALES
+
+        scales = list(SCALES)
+        if args.scales is not None:
+            scales = list(filter(None, map(str.strip, args.scales.split(","))))
+        if not scales or any(map(lambda scale: scale not in SCALES, scales)):
+            parser.error(f"--scales must be some of {', '.join(SCALES)}")
+
+        strategies = None
+        if args.strategies:
+            strategies = list(filter(None, map(str.strip, args.strategies.split(","))))
+            known = set(HUMAN_STRATEGIES) | set(ZOMBIE_STRATEGIES)
+            if any(map(lambda name: name not in known, strategies)):
+                parser.error(f"--strategies must be some of {', '.join(sorted(known))}")
+        if args.repeat < 1 or (args.tolerance is not None and args.tolerance < 0):
+            parser.error(
+                "--repeat must be at least 1 and --tolerance can't be negative"
+            )
+
+        return benchmark(
+            scales,
+            strategies,
+            args.repeat,
+            args.seed,
+            args.output,
+            args.baseline,
+            args.save_baseline,
+            args.tolerance,
+            args.require_baseline,
+        )
+    elif args.command == "simulate":
+        if args.games < 1 or args.workers < 1:
+            parser.error("--games and --workers must be at least 1")
+
+        return simulate(args.games, args.workers)
 
     # If no valid command, print help
     parser.print_help()
@@ -0,0 +1,105 @@
+import asyncio
+import socket
+import time
+from typing import Optional
+from network.client import (
+    INITIAL_TIMEOUT,
+    NEWLINE,
+    SERVER_TURN_TIMEOUT,
+    TransportStats,
+)
+
+# The most a single message may be, well above the largest game state
+STREAM_LIMIT = 1 << 26
+
+
+class AsyncClient:
+    """
+    The asyncio version of Client, reading and writing through streams so the event loop can
+    do other things while waiting for the engine
+
+    port_number: The engine's port on localhost
+    unix_socket: Path of a Unix domain socket to connect to instead
+    """
+
+    def __init__(self, port_number: int, unix_socket: Optional[str] = None) -> None:
+        self.port_number = port_number
+        self.unix_socket = unix_socket
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.stats = TransportStats()
+        self.connected = False
+
+    async def connect(self) -> None:
+        start = time.time()
+        while not self.connected:
+            if time.time() - start > INITIAL_TIMEOUT:
+                raise RuntimeError(
+                    f"Timeout when trying to connect to engine at {self.unix_socket or self.port_number}"
+                )
+
+            try:
+                if self.unix_socket is not None:
+                    self.reader, self.writer = await asyncio.open_unix_connection(
+                        self.unix_socket, limit=STREAM_LIMIT
+                    )
+                else:
+                    self.reader, self.writer = await asyncio.open_connection(
+                        "localhost", self.port_number, limit=STREAM_LIMIT
+                    )
+                    self.writer.get_extra_info("socket").setsockopt(
+                        socket.IPPROTO_TCP, socket.TCP_NODELAY, 1
+                    )
+                self.connected = True
+            except (ConnectionRefusedError, FileNotFoundError):
+                await asyncio.sleep(1)
+
+    def closed(self) -> bool:
+        """
+        Returns whether the engine closed the connection and everything it sent has been read
+        """
+        return self.reader is not None and self.reader.at_eof()
+
+    async def read_bytes(self) -> bytes:
+        """
+        Returns the next message without its newline and surrounding whitespace, or empty bytes
+        if the engine closed the connection
+        """
+        start = time.perf_counter()
+
+        try:
+            line = await asyncio.wait_for(
+                self.reader.readuntil(NEWLINE), SERVER_TURN_TIMEOUT
+            )
+        except asyncio.IncompleteReadError as e:
+            # The engine is gone, whatever is left is all we'll get
+            return e.partial.strip()
+
+        message = line.strip()
+        waited = time.perf_counter() - start
+        self.stats.messages_received += 1
+        self.stats.bytes_received += len(message)
+        self.stats.read_wait_seconds += waited
+        self.stats.last_message_bytes = len(message)
+        self.stats.last_read_wait_seconds = waited
+
+        return message
+
+    async def write_bytes(self, message: bytes) -> None:
+        start = time.perf_counter()
+        self.writer.write(message + NEWLINE)
+        await asyncio.wait_for(self.writer.drain(), SERVER_TURN_TIMEOUT)
+
+        self.stats.messages_sent += 1
+        self.stats.bytes_sent += len(message) + 1
+        self.stats.write_seconds += time.perf_counter() - start
+
+    async def write(self, message: str) -> None:
+        await self.write_bytes(message.encode())
+
+    async def disconnect(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+        self.connected = False
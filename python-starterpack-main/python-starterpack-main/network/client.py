@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+import socket
+import time
+from typing import Optional
+
+INITIAL_TIMEOUT = 15
+SERVER_TURN_TIMEOUT = 30
+
+# How much is read from the socket at once, big enough for most game states in one call
+RECV_BUFFER_SIZE = 1 << 16
+NEWLINE = b"\n"
+
+
+@dataclass
+class TransportStats:
+    """
+    Counters for the messages sent and received by a Client
+
+    read_wait_seconds: Time spent blocked waiting for the engine in read, which is mostly the
+        engine (and your opponent) taking their turn
+    write_seconds: Time spent handing responses to the socket
+    """
+
+    messages_received: int = 0
+    bytes_received: int = 0
+    read_wait_seconds: float = 0.0
+    last_message_bytes: int = 0
+    last_read_wait_seconds: float = 0.0
+    messages_sent: int = 0
+    bytes_sent: int = 0
+    write_seconds: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Received {self.messages_received} messages ({self.bytes_received} bytes, "
+            + f"waited {self.read_wait_seconds:.2f}s), sent {self.messages_sent} messages "
+            + f"({self.bytes_sent} bytes, took {self.write_seconds:.3f}s)"
+        )
+
+
+class Client:
+    """
+    Talks to the engine over a socket, one newline terminated message at a time
+
+    Messages are read with recv_into into one reusable buffer and split on newlines as
+    bytes, so a large game state is never decoded to text or copied line by line before
+    json.loads gets it.
+
+    port_number: The engine's port on localhost
+    unix_socket: Path of a Unix domain socket to connect to instead, for an engine on the same
+        machine that listens on one
+    """
+
+    def __init__(self, port_number: int, unix_socket: Optional[str] = None) -> None:
+        self.port_number = port_number
+        self.unix_socket = unix_socket
+
+        if unix_socket is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # Responses are small and sent in one go, don't wait to batch them
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        self.buffer = bytearray(RECV_BUFFER_SIZE)
+        self.buffer_view = memoryview(self.buffer)
+        # Bytes received after the end of the last message read
+        self.pending = bytearray()
+        self.stats = TransportStats()
+        self.connected = False
+
+    def connect(self):
+        start = time.time()
+        while not self.connected:
+            if time.time() - start > INITIAL_TIMEOUT:
+                raise RuntimeError(
+                    f"Timeout when trying to connect to engine at {self.unix_socket or self.port_number}"
+                )
+            address = (
+                self.unix_socket
+                if self.unix_socket is not None
+                else (
+                    "localhost",
+                    self.port_number,
+                )
+            )
+
+            try:
+                self.socket.connect(address)
+                self.connected = True
+            except (ConnectionRefusedError, FileNotFoundError):
+                time.sleep(1)
+
+        # Every read and write uses the same timeout, so it's only set once
+        self.socket.settimeout(SERVER_TURN_TIMEOUT)
+
+    def read_bytes(self) -> bytes:
+        """
+        Returns the next message without its newline and surrounding whitespace, or empty bytes
+        if the engine closed the connection
+        """
+        start = time.perf_counter()
+        searched = 0
+
+        while True:
+            end = self.pending.find(NEWLINE, searched)
+
+            if end != -1:
+                with memoryview(self.pending) as pending_view:
+                    message = pending_view[:end].tobytes().strip()
+                del self.pending[: end + 1]
+                break
+
+            # Only look at what's new next time, the rest has no newline in it
+            searched = len(self.pending)
+            received = self.socket.recv_into(self.buffer_view)
+
+            if received == 0:
+                # The engine is gone, whatever is left is all we'll get
+                message = bytes(self.pending).strip()
+                self.pending.clear()
+
+                return message
+
+            self.pending += self.buffer_view[:received]
+
+        waited = time.perf_counter() - start
+        self.stats.messages_received += 1
+        self.stats.bytes_received += len(message)
+        self.stats.read_wait_seconds += waited
+        self.stats.last_message_bytes = len(message)
+        self.stats.last_read_wait_seconds = waited
+
+        return message
+
+    def read(self) -> str:
+        return self.read_bytes().decode()
+
+    def write_bytes(self, message: bytes) -> None:
+        start = time.perf_counter()
+        self.socket.sendall(message + NEWLINE)
+
+        self.stats.messages_sent += 1
+        self.stats.bytes_sent += len(message) + 1
+        self.stats.write_seconds += time.perf_counter() - start
+
+    def write(self, message: str) -> None:
+        self.write_bytes(message.encode())
+
+    def disconnect(self):
+        self.socket.close()
+        self.connected = False
@@ -0,0 +1,46 @@
+import math
+
+
+class LatencyStats:
+    """
+    Collects how long something took each time, to report percentiles over all of them
+    """
+
+    def __init__(self) -> None:
+        self.samples: list[float] = []
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def total(self) -> float:
+        return sum(self.samples)
+
+    def mean(self) -> float:
+        return self.total() / len(self.samples) if self.samples else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Returns the sample that percent of all samples are at or below, 0 if there are none
+        """
+        if not self.samples:
+            return 0.0
+
+        ordered = sorted(self.samples)
+        rank = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+
+        return ordered[min(rank, len(ordered) - 1)]
+
+    def summary(self) -> str:
+        """
+        Returns the count, mean and percentiles in milliseconds, on one line
+        """
+        return (
+            f"n={len(self)} mean={self.mean() * 1000:.2f}ms "
+            + f"p50={self.percentile(50) * 1000:.2f}ms "
+            + f"p95={self.percentile(95) * 1000:.2f}ms "
+            + f"p99={self.percentile(99) * 1000:.2f}ms "
+            + f"max={self.percentile(100) * 1000:.2f}ms"
+        )
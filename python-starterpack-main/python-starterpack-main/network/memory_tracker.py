@@ -0,0 +1,177 @@
+import gc
+import json
+import os
+import tracemalloc
+from typing import Optional
+from game.character.action.ability_action import AbilityAction
+from game.character.action.attack_action import AttackAction
+from game.character.action.move_action import MoveAction
+from game.character.character import Character
+from game.terrain.terrain import Terrain
+from game.util.position import Position
+
+# The types whose live instances are counted after every phase
+COUNTED_TYPES = [Position, Character, Terrain, MoveAction, AttackAction, AbilityAction]
+
+# The strategy method that decides each phase, which its allocations are reported under
+PHASE_METHODS = {
+    "CHOOSE_CLASSES": "decide_character_classes",
+    "MOVE": "decide_moves",
+    "ATTACK": "decide_attacks",
+    "ABILITY": "decide_abilities",
+}
+
+# Allocations made by tracing and timing themselves, which would only hide the ones that matter
+IGNORED_FILES = [
+    tracemalloc.__file__,
+    __file__,
+    os.path.join(os.path.dirname(__file__), "phase_timer.py"),
+    "<frozen importlib._bootstrap>",
+]
+
+
+class MemoryTracker:
+    """
+    Tracks how much memory each phase takes with tracemalloc, which lines allocated the memory
+    the strategy retained while deciding it, and how many game objects are alive after it
+
+    Retained memory is what was allocated while the strategy ran and is still alive when it
+    returns, which is what builds up over a game. Memory it only used for a moment shows in the
+    peak instead.
+
+    Tracing slows everything down a lot, so only use it to find what to slim down, never in a
+    real game. tracemalloc sees the whole process and can't tell threads apart, so only trace a
+    process serving a single game.
+
+    Call begin when a message arrives, deciding once the state is decoded and the strategy is
+    about to decide, and decided as soon as it returns.
+
+    top: How many call sites to keep for every strategy method
+    """
+
+    def __init__(self, top: int = 10) -> None:
+        self.top = top
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        # One row per phase, with its turn, phase, memory and object counts
+        self.rows: list[dict[str, object]] = []
+        self.row: Optional[dict[str, object]] = None
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        # The traced bytes of the snapshot held while the strategy decides, and the peak before
+        # it was taken, so the tracker's own memory isn't reported as the phase's
+        self.overhead = 0
+        self.peak_before = 0
+        # For each strategy method, the bytes and blocks each call site retained, over the
+        # whole game
+        self.sites: dict[str, dict[str, list[int]]] = dict()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            list(map(lambda file: tracemalloc.Filter(False, file), IGNORED_FILES))
+        )
+
+    def begin(self) -> None:
+        tracemalloc.reset_peak()
+        self.row = None
+        self.snapshot = None
+
+    def deciding(self, turn: int, phase: str) -> None:
+        self.row = {"turn": turn, "phase": phase}
+
+        before, self.peak_before = tracemalloc.get_traced_memory()
+        self.snapshot = self._snapshot()
+        self.overhead = tracemalloc.get_traced_memory()[0] - before
+        # Taking the snapshot peaks too, which is the tracker's and not the phase's
+        tracemalloc.reset_peak()
+
+    def decided(self) -> None:
+        """
+        Ends the phase once the strategy returns, before the response is built
+        """
+        if self.row is None:
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        self.row["currentBytes"] = current - self.overhead
+        self.row["peakBytes"] = max(self.peak_before, peak - self.overhead)
+
+        method = PHASE_METHODS.get(self.row["phase"], self.row["phase"])
+        sites = self.sites.setdefault(method, dict())
+        for stat in self._snapshot().compare_to(self.snapshot, "lineno"):
+            if stat.size_diff <= 0:
+                continue
+
+            frame = stat.traceback[0]
+            site = sites.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+            site[0] += stat.size_diff
+            site[1] += stat.count_diff
+
+        counts = dict(map(lambda t: (t, 0), COUNTED_TYPES))
+        for obj in gc.get_objects():
+            if type(obj) in counts:
+                counts[type(obj)] += 1
+        self.row["objects"] = dict(map(lambda x: (x[0].__name__, x[1]), counts.items()))
+
+        self.rows.append(self.row)
+        self.row = None
+        self.snapshot = None
+
+    def top_sites(self, method: str) -> list[tuple[str, int, int]]:
+        """
+        Returns the call sites that allocated the most memory method retained over the game,
+        biggest first, as their file and line, bytes and blocks
+        """
+        sites = self.sites.get(method, dict())
+        ordered = sorted(sites.items(), key=lambda x: x[1][0], reverse=True)
+
+        return list(map(lambda x: (x[0], x[1][0], x[1][1]), ordered[: self.top]))
+
+    def summary(self) -> str:
+        lines = [
+            "Memory by phase (peak, then still allocated when the strategy returned):"
+        ]
+
+        phases: dict[str, list[dict]] = dict()
+        for row in self.rows:
+            phases.setdefault(row["phase"], []).append(row)
+
+        for [phase, rows] in phases.items():
+            peak = max(rows, key=lambda row: row["peakBytes"])
+            lines.append(
+                f"  {phase}: peak {peak['peakBytes'] / 1e6:.2f}MB on turn {peak['turn']}, "
+                + f"at most {max(map(lambda row: row['currentBytes'], rows)) / 1e6:.2f}MB kept"
+            )
+
+        lines.append("Most live objects after a strategy call:")
+        for counted in COUNTED_TYPES:
+            most = max(
+                map(lambda row: row["objects"][counted.__name__], self.rows), default=0
+            )
+            lines.append(f"  {counted.__name__}: {most}")
+
+        for method in self.sites:
+            lines.append(f"Memory retained by {method}, by where it was allocated:")
+            for [site, size, count] in self.top_sites(method):
+                lines.append(f"  {size / 1e3:10.1f}KB in {count:7} blocks  {site}")
+
+        return "\n".join(lines)
+
+    def dump(self, directory: str, name: str) -> None:
+        """
+        Writes every phase's memory and object counts, and the call sites of the most memory
+        every strategy method retained, to name.json in directory
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        retained = dict()
+        for method in self.sites:
+            retained[method] = list(
+                map(
+                    lambda x: {"site": x[0], "bytes": x[1], "blocks": x[2]},
+                    self.top_sites(method),
+                )
+            )
+
+        with open(os.path.join(directory, f"{name}.json"), "w") as file:
+            json.dump({"phases": self.rows, "retained": retained}, file, indent=2)
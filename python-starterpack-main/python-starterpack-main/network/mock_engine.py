@@ -0,0 +1,231 @@
+from dataclasses import dataclass, field
+import json
+import socket
+import time
+from typing import Callable, Optional
+from game.character.action.ability_action import AbilityAction
+from game.character.action.attack_action import AttackAction
+from game.character.action.move_action import MoveAction
+from game.character.character_class_type import CharacterClassType
+from network.latency import LatencyStats
+from sim.rules import PICKABLE_CLASSES, SimConfig
+from sim.simulator import ABILITY, ATTACK, MOVE, Simulator
+
+CHOOSE_CLASSES = "CHOOSE_CLASSES"
+FINISH = "FINISH"
+
+# The key of the possible actions in the message of each phase, and how to read the bot's
+# response to it
+PHASE_ACTIONS: dict[str, tuple[str, Callable[[object], object]]] = {
+    MOVE: ("possibleMoves", MoveAction.deserialize),
+    ATTACK: ("possibleAttacks", AttackAction.deserialize),
+    ABILITY: ("possibleAbilities", AbilityAction.deserialize),
+}
+
+
+@dataclass
+class MockEngineReport:
+    """
+    What a mock engine measured while playing against a bot
+
+    round_trips: For each phase, the time from sending a message to having the whole response
+    """
+
+    round_trips: dict[str, LatencyStats] = field(default_factory=dict)
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    seconds: float = 0.0
+    unusable_responses: int = 0
+
+    def summary(self) -> str:
+        every = LatencyStats()
+        for stats in self.round_trips.values():
+            every.samples.extend(stats.samples)
+
+        lines = ["Round trip latency by phase:"]
+        for [phase, stats] in self.round_trips.items():
+            lines.append(f"  {phase}: {stats.summary()}")
+        lines.append(f"  All: {every.summary()}")
+
+        seconds = max(self.seconds, 1e-9)
+        lines.append(
+            f"{len(every)} messages in {self.seconds:.2f}s ({len(every) / seconds:.1f}/s), "
+            + f"sent {self.bytes_sent / 1e6:.2f}MB ({self.bytes_sent / 1e6 / seconds:.2f}MB/s), "
+            + f"received {self.bytes_received / 1e6:.2f}MB"
+        )
+        lines.append(f"{self.unusable_responses} responses couldn't be used")
+
+        return "\n".join(lines)
+
+
+class MockEngine:
+    """
+    A lightweight engine for load and latency testing a bot, speaking the engine's protocol
+
+    The game is played on the simulator, so the states and possible actions are realistic and
+    move along with the bot's responses. Only the bot's side plays, the other side passes, and
+    only the phases in phases are sent.
+
+    The board keeps its size, since bots are built for it, so scale makes states bigger by
+    multiplying how many characters and how much terrain there is instead.
+
+    port: The port to listen on for the bot
+    is_zombie: The side the bot plays
+    turns: How many of the bot's turns to play, unless the game ends first
+    phases: The phases to send each turn, in order
+    scale: How many times bigger than a default game to make the state
+    seed: Seeds the simulator's map and spawns
+    """
+
+    def __init__(
+        self,
+        port: int,
+        is_zombie: bool = False,
+        turns: int = 20,
+        phases: Optional[list[str]] = None,
+        scale: float = 1.0,
+        seed: int = 0,
+    ) -> None:
+        self.is_zombie = is_zombie
+        self.turns = turns
+        self.phases = phases if phases is not None else [MOVE, ATTACK, ABILITY]
+        self.seed = seed
+
+        defaults = SimConfig()
+        self.config = SimConfig(
+            humans=max(1, round(defaults.humans * scale)),
+            zombies=max(1, round(defaults.zombies * scale)),
+            num_to_pick=max(1, round(defaults.num_to_pick * scale)),
+            max_per_same_class=max(1, round(defaults.max_per_same_class * scale)),
+            # The board must keep room to spawn everyone
+            terrain_count=min(round(defaults.terrain_count * scale), 5000),
+        )
+
+        # Listening from the start, so a bot can be launched right away
+        self.server = socket.create_server(("localhost", port))
+        self.report = MockEngineReport()
+
+    def _round_trip(self, phase: str, message: dict) -> Optional[object]:
+        data = (
+            json.dumps({"isZombie": self.is_zombie, "phase": phase, "message": message})
+            + "\n"
+        ).encode()
+
+        start = time.perf_counter()
+        self.connection.sendall(data)
+        self.report.bytes_sent += len(data)
+
+        if phase == FINISH:
+            return None
+
+        response = self.reader.readline()
+        self.report.round_trips.setdefault(phase, LatencyStats()).add(
+            time.perf_counter() - start
+        )
+        self.report.bytes_received += len(response)
+
+        try:
+            return json.loads(response)
+        except ValueError:
+            self.report.unusable_responses += 1
+            return None
+
+    def _state(self, simulator: Simulator) -> dict:
+        return {
+            "turn": simulator.turn,
+            "characterStates": dict(
+                map(lambda c: (c.id, c.serialize()), simulator.characters.values())
+            ),
+            "terrainStates": dict(
+                map(lambda t: (t.id, t.serialize()), simulator.terrains.values())
+            ),
+        }
+
+    def _choose_classes(self, simulator: Simulator) -> None:
+        if self.is_zombie:
+            simulator.choose_classes(dict())
+            return
+
+        response = self._round_trip(
+            CHOOSE_CLASSES,
+            {
+                "turn": 0,
+                "choices": list(map(lambda c: c.value, PICKABLE_CLASSES)),
+                "numToPick": self.config.num_to_pick,
+                "maxPerSameClass": self.config.max_per_same_class,
+            },
+        )
+
+        try:
+            choices = dict(
+                map(lambda x: (CharacterClassType[x[0]], x[1]), response.items())
+            )
+        except (AttributeError, KeyError):
+            self.report.unusable_responses += 1
+            choices = dict()
+
+        simulator.choose_classes(choices)
+
+    def _play_phase(self, simulator: Simulator, phase: str) -> None:
+        if phase == MOVE:
+            possible = simulator.possible_moves()
+        elif phase == ATTACK:
+            possible = simulator.possible_attacks()
+        else:
+            possible = simulator.possible_abilities()
+
+        key, decode = PHASE_ACTIONS[phase]
+        message = self._state(simulator)
+        message[key] = dict(
+            map(
+                lambda x: (x[0], list(map(lambda a: a.serialize(), x[1]))),
+                possible.items(),
+            )
+        )
+
+        response = self._round_trip(phase, message)
+
+        try:
+            actions = list(map(decode, response))
+        except Exception:
+            self.report.unusable_responses += 1
+            actions = []
+
+        if phase == MOVE:
+            simulator.apply_moves(actions)
+        elif phase == ATTACK:
+            simulator.apply_attacks(actions)
+        else:
+            simulator.apply_abilities(actions)
+
+    def run(self) -> MockEngineReport:
+        """
+        Waits for a bot to connect, plays the game with it, and returns what was measured
+        """
+        self.connection, _ = self.server.accept()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.connection.makefile("rb")
+        start = time.perf_counter()
+
+        simulator = Simulator(self.seed, self.config)
+        self._choose_classes(simulator)
+
+        turns_played = 0
+        while not simulator.finished and turns_played < self.turns:
+            if simulator.is_zombie_turn() == self.is_zombie:
+                for phase in simulator.phases():
+                    if phase in self.phases:
+                        self._play_phase(simulator, phase)
+
+                turns_played += 1
+
+            simulator.end_turn()
+
+        self._round_trip(FINISH, simulator.finish_message())
+        self.report.seconds = time.perf_counter() - start
+
+        self.reader.close()
+        self.connection.close()
+        self.server.close()
+
+        return self.report
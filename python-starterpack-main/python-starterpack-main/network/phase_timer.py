@@ -0,0 +1,230 @@
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+import time
+from typing import Callable, Optional, TypeVar
+from network.latency import LatencyStats
+
+Result = TypeVar("Result")
+
+# Every span a phase is split into, in the order they happen
+SPANS = [
+    "json_loads",
+    "deserialize",
+    "decode_actions",
+    "strategy",
+    "serialize",
+    "write",
+]
+
+# The upper bounds of the histogram buckets, in milliseconds, the last bucket has no bound
+HISTOGRAM_BOUNDS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+
+def parse_turns(raw: Optional[str]) -> set[int]:
+    """
+    Reads a list of turns like "10,20-25" into the set of turns it contains
+    """
+    turns = set()
+
+    for part in filter(None, map(str.strip, (raw or "").split(","))):
+        first, _, last = part.partition("-")
+        turns.update(range(int(first), int(last or first) + 1))
+
+    return turns
+
+
+def histogram(stats: LatencyStats) -> list[int]:
+    """
+    Returns how many samples fall into each HISTOGRAM_BOUNDS_MS bucket, and the unbounded one
+    """
+    counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    for seconds in stats.samples:
+        ms = seconds * 1000
+        bucket = 0
+        while bucket < len(HISTOGRAM_BOUNDS_MS) and ms > HISTOGRAM_BOUNDS_MS[bucket]:
+            bucket += 1
+        counts[bucket] += 1
+
+    return counts
+
+
+class PhaseTimer:
+    """
+    Splits the time a session spends on each phase into SPANS, to show where it goes
+
+    Recording is a few perf_counter calls per phase, so it's always on. Call begin when a
+    message arrives, lap at the end of each span and end once the response is ready. The
+    time to write the response can still be added after that.
+
+    profile_turns: The turns to run cProfile on, from the moment their phases are decoded until
+        the response is serialized
+    """
+
+    def __init__(self, profile_turns: Optional[set[int]] = None) -> None:
+        self.profile_turns = profile_turns if profile_turns is not None else set()
+        self.profiler: Optional[cProfile.Profile] = None
+        self.profiling = False
+        # One row per phase, with the turn, the phase and the seconds of each span
+        self.rows: list[dict[str, object]] = []
+        self.row: Optional[dict[str, object]] = None
+        self.last = 0.0
+        # Time spent in timed functions during the current span, which the span doesn't count
+        self.excluded = 0.0
+
+    def begin(self) -> None:
+        self.row = {"turn": None, "phase": None}
+        self.last = time.perf_counter()
+        self.excluded = 0.0
+
+    def phase(self, turn: int, phase: str) -> None:
+        """
+        Names the phase being timed, once the message has been decoded
+        """
+        self.row["turn"] = turn
+        self.row["phase"] = phase
+
+        if turn in self.profile_turns and not self.profiling:
+            if self.profiler is None:
+                self.profiler = cProfile.Profile()
+
+            try:
+                self.profiler.enable()
+                self.profiling = True
+            except ValueError:
+                # Only one profiler can run at a time, like when serving both sides at once
+                pass
+
+    def lap(self, span: str) -> None:
+        """
+        Ends span, which started at the end of the last one
+        """
+        now = time.perf_counter()
+        self.add(span, now - self.last - self.excluded)
+        self.last = now
+        self.excluded = 0.0
+
+    def skip(self) -> None:
+        """
+        Starts the next span now, without counting the time since the last one
+        """
+        self.last = time.perf_counter()
+        self.excluded = 0.0
+
+    def add(self, span: str, seconds: float) -> None:
+        if self.row is not None:
+            self.row[span] = self.row.get(span, 0.0) + seconds
+
+    def timed(
+        self, span: str, function: Callable[[object], Result]
+    ) -> Callable[[object], Result]:
+        """
+        Wraps function so the time spent in it counts towards span instead of the span it's
+        called from, like actions decoded lazily while the strategy runs
+        """
+
+        def timed_function(argument: object) -> Result:
+            start = time.perf_counter()
+            result = function(argument)
+            took = time.perf_counter() - start
+            self.add(span, took)
+            self.excluded += took
+
+            return result
+
+        return timed_function
+
+    def stop_profiling(self) -> None:
+        if self.profiling:
+            self.profiler.disable()
+            self.profiling = False
+
+    def end(self) -> None:
+        """
+        Ends the phase, dropping it if the message couldn't be decoded
+        """
+        self.stop_profiling()
+
+        if self.row is not None and self.row["phase"] is not None:
+            self.rows.append(self.row)
+
+    def stats(self) -> dict[str, dict[str, LatencyStats]]:
+        """
+        Returns the samples of every span, by span and then by phase
+        """
+        stats: dict[str, dict[str, LatencyStats]] = dict(
+            map(lambda span: (span, dict()), SPANS)
+        )
+
+        for row in self.rows:
+            for span in SPANS:
+                if span in row:
+                    stats[span].setdefault(row["phase"], LatencyStats()).add(row[span])
+
+        return dict(filter(lambda x: x[1], stats.items()))
+
+    def summary(self) -> str:
+        lines = ["Time spent by span and phase:"]
+
+        for [span, by_phase] in self.stats().items():
+            lines.append(f"  {span}:")
+            for [phase, stats] in by_phase.items():
+                lines.append(f"    {phase}: {stats.summary()}")
+
+        return "\n".join(lines)
+
+    def dump(self, directory: str, name: str) -> None:
+        """
+        Writes every phase's spans to name.csv, and their percentiles and histograms to
+        name.json, in directory
+
+        If any turns were profiled, their profile is written to name.prof too, which
+        python -m pstats can read.
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, f"{name}.csv"), "w", newline="") as file:
+            writer = csv.DictWriter(file, ["turn", "phase"] + SPANS)
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+        serialized = dict()
+        for [span, by_phase] in self.stats().items():
+            serialized[span] = dict()
+            for [phase, stats] in by_phase.items():
+                serialized[span][phase] = {
+                    "count": len(stats),
+                    "meanMs": stats.mean() * 1000,
+                    "p50Ms": stats.percentile(50) * 1000,
+                    "p95Ms": stats.percentile(95) * 1000,
+                    "p99Ms": stats.percentile(99) * 1000,
+                    "maxMs": stats.percentile(100) * 1000,
+                    "histogram": histogram(stats),
+                }
+
+        with open(os.path.join(directory, f"{name}.json"), "w") as file:
+            json.dump(
+                {"histogramBoundsMs": HISTOGRAM_BOUNDS_MS, "spans": serialized},
+                file,
+                indent=2,
+            )
+
+        if self.profiler is not None:
+            self.profiler.dump_stats(os.path.join(directory, f"{name}.prof"))
+
+    def profile_summary(self, lines: int = 20) -> Optional[str]:
+        """
+        Returns the functions the profiled turns spent the most time in, if any were profiled
+        """
+        if self.profiler is None:
+            return None
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(lines)
+
+        return stream.getvalue()
@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+import gzip
+import os
+import sys
+import time
+from typing import IO, Iterator, Optional, Union
+import zlib
+
+# Every line of a session file starts with one of these, then the seconds since recording
+# started, then the message. Each recording starts with a BEGIN line without a message.
+BEGIN = b"B"
+RECEIVED = b"R"
+SENT = b"S"
+
+
+@dataclass
+class RecordedPhase:
+    """
+    One message received from the engine and the response the bot sent to it, if any
+
+    received_at, responded_at: Seconds since recording started
+    """
+
+    received: bytes
+    received_at: float
+    response: Optional[str] = None
+    responded_at: Optional[float] = None
+
+
+class SessionRecorder:
+    """
+    Writes every message received from the engine and every response to a gzipped session file,
+    one line each, so a game can be replayed later without the engine
+
+    The file is only ever appended to and is flushed after every line, so everything up to a
+    crash is kept. Recording to a file that already exists adds another session after it, which
+    replay plays in a fresh BotSession of its own. A file a crash cut off is first trimmed to
+    its complete lines, since nothing after the cut could be read otherwise.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if os.path.exists(path):
+            _trim_cut_off(path)
+
+        self.file = gzip.open(path, "ab")
+        self.start = time.monotonic()
+        self._write(BEGIN, b"")
+
+    def _write(self, kind: bytes, message: bytes) -> None:
+        self.file.write(
+            kind
+            + b" "
+            + f"{time.monotonic() - self.start:.6f}".encode()
+            + b" "
+            + message
+            + b"\n"
+        )
+        self.file.flush()
+
+    def received(self, raw_received: Union[str, bytes]) -> None:
+        if isinstance(raw_received, str):
+            raw_received = raw_received.encode()
+
+        self._write(RECEIVED, raw_received)
+
+    def sent(self, response: str) -> None:
+        self._write(SENT, response.encode())
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _complete_lines(file: IO[bytes]) -> Iterator[bytes]:
+    """
+    Yields every complete line of an open session file, then raises EOFError if a crash cut
+    the file off, which gzip only notices once it reaches the end
+    """
+    try:
+        for line in file:
+            if not line.endswith(b"\n"):
+                raise EOFError("Session file ends halfway through a line")
+
+            yield line
+    except zlib.error as e:
+        raise EOFError(f"Session file is corrupt: {e}")
+
+
+def _trim_cut_off(path: str) -> None:
+    """
+    Rewrites a session file a crash cut off with only its complete lines, leaving a file that
+    ended cleanly as it is
+    """
+    try:
+        with gzip.open(path, "rb") as file:
+            for _ in _complete_lines(file):
+                pass
+        return
+    except EOFError:
+        pass
+
+    trimmed = path + ".part"
+    with gzip.open(path, "rb") as file, gzip.open(trimmed, "wb") as trimmed_file:
+        try:
+            for line in _complete_lines(file):
+                trimmed_file.write(line)
+        except EOFError:
+            pass
+
+    os.replace(trimmed, path)
+
+
+def read_sessions(path: str) -> list[list[RecordedPhase]]:
+    """
+    Returns the phases of every session recorded in a session file, in order
+
+    A file a crash cut off gives everything recorded before the crash.
+    """
+    sessions: list[list[RecordedPhase]] = []
+
+    with gzip.open(path, "rb") as file:
+        try:
+            for line in _complete_lines(file):
+                kind, at, message = line.rstrip(b"\n").split(b" ", 2)
+
+                if kind == BEGIN:
+                    sessions.append([])
+                elif kind == RECEIVED and sessions:
+                    sessions[-1].append(RecordedPhase(message, float(at)))
+                elif kind == SENT and sessions and sessions[-1]:
+                    sessions[-1][-1].response = message.decode()
+                    sessions[-1][-1].responded_at = float(at)
+                else:
+                    raise ValueError(
+                        f"Unknown line in session file {path}: {line[:40]!r}"
+                    )
+        except EOFError as e:
+            print(
+                f"{e}, probably cut off by a crash, using what was recorded before it",
+                file=sys.stderr,
+            )
+
+    return list(filter(None, sessions))
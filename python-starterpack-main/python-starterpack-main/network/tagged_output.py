@@ -0,0 +1,55 @@
+import threading
+from typing import Optional, TextIO
+import weakref
+
+# The tag of every thread that has one, dropped along with the thread
+TAGS: "weakref.WeakKeyDictionary[threading.Thread, str]" = weakref.WeakKeyDictionary()
+
+
+def tag_thread(tag: Optional[str], thread: Optional[threading.Thread] = None) -> None:
+    """
+    Tags every line thread writes to a TaggedOutput, the current thread if not given
+    """
+    thread = thread if thread is not None else threading.current_thread()
+
+    if tag is None:
+        TAGS.pop(thread, None)
+    else:
+        TAGS[thread] = tag
+
+
+class TaggedOutput:
+    """
+    Wraps an output stream like sys.stdout so every line written to it starts with the tag of
+    the thread that wrote it, to tell apart several sessions served from one process
+
+    Lines are kept per thread until they end and then written whole, so lines written by
+    different threads at the same time never mix. Threads without a tag write as usual.
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.pending = threading.local()
+
+    def write(self, text: str) -> int:
+        tag = TAGS.get(threading.current_thread())
+        if tag is None:
+            with self.lock:
+                return self.stream.write(text)
+
+        pending = getattr(self.pending, "text", "") + text
+        *lines, self.pending.text = pending.split("\n")
+
+        if lines:
+            with self.lock:
+                self.stream.write("".join(map(lambda line: f"[{tag}] {line}\n", lines)))
+
+        return len(text)
+
+    def flush(self) -> None:
+        with self.lock:
+            self.stream.flush()
+
+    def __getattr__(self, name: str) -> object:
+        return getattr(self.stream, name)
@@ -0,0 +1,101 @@
+from dataclasses import dataclass, field
+from typing import Optional
+from game.character.action.ability_action_type import AbilityActionType
+from game.character.character_class_type import CharacterClassType
+from game.util.position import BOARD_SIZE
+
+
+@dataclass
+class ClassStats:
+    """
+    How a character class plays in the simulator
+
+    speed: How many cells the class can walk in one move
+    attack_range: How far away (Manhattan distance) the class can attack
+    attack_damage: How much health an attack takes from a character
+    terrain_damage: How much health an attack takes from terrain
+    moves_over_terrain: Whether the class can pass over terrain while moving
+    ability: The ability the class can use, if any
+    ability_range: How far away the ability can target
+    ability_cooldown: How many of its side's turns the class waits between abilities
+    """
+
+    health: int
+    speed: int
+    attack_range: int
+    attack_damage: int = 1
+    terrain_damage: int = 1
+    moves_over_terrain: bool = False
+    ability: Optional[AbilityActionType] = None
+    ability_range: int = 0
+    ability_cooldown: int = 0
+
+
+# These approximate the engine's rules closely enough for testing and search, but they are
+# not the engine's exact numbers, so always check a strategy against the real engine too
+CLASS_STATS: dict[CharacterClassType, ClassStats] = {
+    CharacterClassType.NORMAL: ClassStats(health=3, speed=3, attack_range=2),
+    CharacterClassType.ZOMBIE: ClassStats(health=1, speed=5, attack_range=1),
+    CharacterClassType.MARKSMAN: ClassStats(health=3, speed=3, attack_range=4),
+    CharacterClassType.TRACEUR: ClassStats(
+        health=3, speed=4, attack_range=2, moves_over_terrain=True
+    ),
+    CharacterClassType.MEDIC: ClassStats(
+        health=3,
+        speed=3,
+        attack_range=2,
+        ability=AbilityActionType.HEAL,
+        ability_range=4,
+        ability_cooldown=5,
+    ),
+    CharacterClassType.BUILDER: ClassStats(
+        health=3,
+        speed=3,
+        attack_range=2,
+        ability=AbilityActionType.BUILD_BARRICADE,
+        ability_range=1,
+        ability_cooldown=3,
+    ),
+    CharacterClassType.DEMOLITIONIST: ClassStats(
+        health=3, speed=3, attack_range=2, terrain_damage=10
+    ),
+}
+
+# The classes humans can pick from, every human not picked plays as NORMAL
+PICKABLE_CLASSES = [
+    CharacterClassType.MARKSMAN,
+    CharacterClassType.TRACEUR,
+    CharacterClassType.MEDIC,
+    CharacterClassType.BUILDER,
+    CharacterClassType.DEMOLITIONIST,
+]
+
+
+@dataclass
+class SimConfig:
+    """
+    The setup of a simulated game
+
+    board_size: The width and height of the board, bots are built for BOARD_SIZE
+    terrain_count: How many cells of terrain the map starts with
+    see_through_chance: The chance that a piece of terrain can be attacked through
+    zombie_spawn_radius: How far from the center of the board zombies start
+    human_spawn_distance: How far from the center of the board humans start, at least
+    """
+
+    humans: int = 20
+    zombies: int = 5
+    num_to_pick: int = 16
+    max_per_same_class: int = 5
+    max_turns: int = 200
+    board_size: int = BOARD_SIZE
+    terrain_count: int = 600
+    terrain_health: int = 3
+    see_through_chance: float = 0.3
+    barricade_health: int = 3
+    heal_amount: int = 1
+    zombie_spawn_radius: int = 3
+    human_spawn_distance: int = 20
+    class_stats: dict[CharacterClassType, ClassStats] = field(
+        default_factory=lambda: dict(CLASS_STATS)
+    )
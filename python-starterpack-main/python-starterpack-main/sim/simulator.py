@@ -0,0 +1,664 @@
+from dataclasses import replace
+import random
+import sys
+import traceback
+from typing import Optional
+from game.character.action.ability_action import AbilityAction
+from game.character.action.ability_action_type import AbilityActionType
+from game.character.action.attack_action import AttackAction
+from game.character.action.attack_action_type import AttackActionType
+from game.character.action.lazy_action_map import LazyActionMap
+from game.character.action.move_action import MoveAction
+from game.character.character import Character
+from game.character.character_class_type import CharacterClassType
+from game.game_state import GameState
+from game.occupancy_grid import OccupancyGrid
+from game.pathfinding import FieldCache
+from game.spatial_index import SpatialIndex
+from game.terrain.terrain import Terrain
+from game.util.position import Position
+from sim.rules import PICKABLE_CLASSES, SimConfig
+from strategy.strategy import Strategy
+
+MOVE = "MOVE"
+ATTACK = "ATTACK"
+ABILITY = "ABILITY"
+
+
+class Simulator:
+    """
+    A stand-in for the engine that plays a game in this process, using the same game state
+    and actions your strategy gets from the engine
+
+    Humans act on odd turns and zombies on even turns, each with a MOVE, ATTACK and (for
+    humans) ABILITY phase. For every phase, ask for the possible actions of the side whose
+    turn it is, then apply the actions it picked. Picked actions that aren't possible are
+    skipped and recorded as errors, like the engine does.
+
+    A human whose health runs out is infected and becomes a zombie. A zombie that is attacked
+    is stunned, and can't move or attack on its next turn. The numbers behind these rules are
+    in sim/rules.py, and only approximate the engine's.
+
+    seed: Seeds the map and spawns, the same seed always gives the same game
+    """
+
+    def __init__(self, seed: Optional[int] = None, config: SimConfig = None) -> None:
+        self.config = config if config is not None else SimConfig()
+        self.random = random.Random(seed)
+        self.turn = 0
+        self.characters: dict[str, Character] = dict()
+        self.terrains: dict[str, Terrain] = dict()
+        # Maps a position to the id of the terrain on it
+        self.terrain_at: dict[Position, str] = dict()
+        # Only the terrain, kept up to date as it changes and copied into every game state
+        self.size = self.config.board_size
+        self.grid = OccupancyGrid(self.size, self.size)
+        self.cooldowns: dict[str, int] = dict()
+        self.infected = 0
+        self.built = 0
+        self.errors: dict[bool, list[str]] = {False: [], True: []}
+        # The possible actions of the current phase, to check picked actions against
+        self.possible: dict[str, set] = dict()
+
+        self._generate()
+
+    def _generate(self) -> None:
+        config = self.config
+        size = self.size
+        center = size // 2
+
+        distance = lambda x, y: abs(x - center) + abs(y - center)
+        distances = list(
+            map(lambda i: distance(i % size, i // size), range(size * size))
+        )
+
+        # Places are picked at random until enough are found, which would never end without
+        # enough of them
+        terrain_cells = len(
+            list(filter(lambda d: d > config.zombie_spawn_radius, distances))
+        )
+        if config.terrain_count > terrain_cells:
+            raise ValueError(
+                f"terrain_count is {config.terrain_count}, but a board of {size} only has "
+                + f"{terrain_cells} cells outside the zombie spawn for terrain"
+            )
+
+        while len(self.terrains) < config.terrain_count:
+            position = Position.at(
+                self.random.randrange(size), self.random.randrange(size)
+            )
+            near_center = distance(position.x, position.y) <= config.zombie_spawn_radius
+
+            if position in self.terrain_at or near_center:
+                continue
+
+            self._add_terrain(
+                f"terrain{len(self.terrains)}",
+                position,
+                config.terrain_health,
+                self.random.random() < config.see_through_chance,
+            )
+
+        # Terrain is never in the zombie spawn, so only the humans can run out of places
+        zombie_cells = len(
+            list(filter(lambda d: d <= config.zombie_spawn_radius, distances))
+        )
+        human_cells = len(
+            list(filter(lambda d: d >= config.human_spawn_distance, distances))
+        ) - len(
+            list(
+                filter(
+                    lambda p: distance(p.x, p.y) >= config.human_spawn_distance,
+                    self.terrain_at,
+                )
+            )
+        )
+        if (config.zombies > 0 and zombie_cells == 0) or (
+            config.humans > 0 and human_cells == 0
+        ):
+            raise ValueError(
+                f"No free cell for {'zombies' if zombie_cells == 0 else 'humans'} to start "
+                + f"on, with zombie_spawn_radius {config.zombie_spawn_radius} and "
+                + f"human_spawn_distance {config.human_spawn_distance}"
+            )
+
+        for i in range(config.zombies + config.humans):
+            is_zombie = i < config.zombies
+
+            while True:
+                position = Position.at(
+                    self.random.randrange(size), self.random.randrange(size)
+                )
+
+                if position in self.terrain_at:
+                    continue
+
+                spawn_distance = distance(position.x, position.y)
+                if is_zombie and spawn_distance <= config.zombie_spawn_radius:
+                    break
+                if not is_zombie and spawn_distance >= config.human_spawn_distance:
+                    break
+
+            class_type = (
+                CharacterClassType.ZOMBIE if is_zombie else CharacterClassType.NORMAL
+            )
+            self.characters[str(i)] = Character(
+                str(i),
+                position,
+                is_zombie,
+                class_type,
+                config.class_stats[class_type].health,
+                False,
+            )
+
+    def _add_terrain(
+        self, id: str, position: Position, health: int, can_attack_through: bool
+    ) -> None:
+        self.terrains[id] = Terrain(id, position, health, can_attack_through)
+        self.terrain_at[position] = id
+        self.grid.set_terrain(position.x, position.y, can_attack_through)
+
+    def _error(self, is_zombie: bool, message: str) -> None:
+        self.errors[is_zombie].append(f"Turn {self.turn}: {message}")
+
+    def is_zombie_turn(self) -> bool:
+        return self.turn % 2 == 0
+
+    def phases(self) -> list[str]:
+        """
+        Returns the phases of the current turn, in order
+        """
+        return [MOVE, ATTACK] if self.is_zombie_turn() else [MOVE, ATTACK, ABILITY]
+
+    def game_state(self, field_cache: Optional[FieldCache] = None) -> GameState:
+        """
+        Returns the current state, which stays valid as the game goes on
+
+        Characters and terrain are replaced rather than changed, so a state can be kept.
+        """
+        grid = self.grid.copy_terrain()
+        for character in self.characters.values():
+            grid.add_occupant(
+                character.position.x, character.position.y, character.is_zombie
+            )
+
+        return GameState(
+            self.turn,
+            dict(self.characters),
+            dict(self.terrains),
+            grid=grid,
+            field_cache=field_cache,
+        )
+
+    @property
+    def finished(self) -> bool:
+        humans_left = any(map(lambda c: not c.is_zombie, self.characters.values()))
+
+        return self.turn > self.config.max_turns or not humans_left
+
+    def choose_classes(self, choices: dict[CharacterClassType, int]) -> None:
+        """
+        Applies the humans' class choices, like decide_character_classes returns them
+        """
+        humans = list(filter(lambda c: not c.is_zombie, self.characters.values()))
+        picked = 0
+
+        for [class_type, count] in choices.items():
+            if class_type not in PICKABLE_CLASSES:
+                self._error(False, f"Can't pick class {class_type}")
+                continue
+            if count > self.config.max_per_same_class:
+                self._error(False, f"Picked {count} of {class_type}, which is too many")
+                count = self.config.max_per_same_class
+
+            count = max(0, min(count, self.config.num_to_pick - picked))
+            for human in humans[picked : picked + count]:
+                self.characters[human.id] = replace(
+                    human,
+                    class_type=class_type,
+                    health=self.config.class_stats[class_type].health,
+                )
+
+            picked += count
+
+        self.turn = 1
+
+    def possible_moves(self) -> dict[str, list[MoveAction]]:
+        """
+        Returns the moves of every character whose turn it is, staying in place included
+        """
+        moves: dict[str, list[MoveAction]] = dict()
+
+        for character in self._acting():
+            moves[character.id] = (
+                []
+                if character.is_stunned
+                else list(
+                    map(
+                        lambda position: MoveAction(character.id, position),
+                        self._reachable(character),
+                    )
+                )
+            )
+
+        self.possible = {MOVE: set(map(_move_key, _flatten(moves)))}
+
+        return moves
+
+    def possible_attacks(self) -> dict[str, list[AttackAction]]:
+        """
+        Returns the attacks every character whose turn it is can make on characters of the other
+        side and on terrain in range
+        """
+        attacks: dict[str, list[AttackAction]] = dict()
+        index = SpatialIndex(self.characters.values())
+
+        for character in self._acting():
+            attacks[character.id] = []
+
+            if character.is_stunned:
+                continue
+
+            attack_range = self.config.class_stats[character.class_type].attack_range
+
+            for target in index.within_radius(
+                character.position, not character.is_zombie, attack_range
+            ):
+                attacks[character.id].append(
+                    AttackAction(character.id, target.id, AttackActionType.CHARACTER)
+                )
+
+            for position in _diamond(character.position, attack_range, self.size):
+                terrain_id = self.terrain_at.get(position)
+
+                if terrain_id is not None:
+                    attacks[character.id].append(
+                        AttackAction(character.id, terrain_id, AttackActionType.TERRAIN)
+                    )
+
+        self.possible = {ATTACK: set(map(_attack_key, _flatten(attacks)))}
+
+        return attacks
+
+    def possible_abilities(self) -> dict[str, list[AbilityAction]]:
+        """
+        Returns the abilities of every character whose turn it is, if they have one and it's
+        not cooling down
+        """
+        abilities: dict[str, list[AbilityAction]] = dict()
+        occupied = set(map(lambda c: c.position, self.characters.values()))
+        index = SpatialIndex(self.characters.values())
+
+        for character in self._acting():
+            abilities[character.id] = []
+            stats = self.config.class_stats[character.class_type]
+
+            if stats.ability is None or self.cooldowns.get(character.id, 0) > 0:
+                continue
+
+            if stats.ability == AbilityActionType.HEAL:
+                for target in index.within_radius(
+                    character.position, False, stats.ability_range
+                ):
+                    abilities[character.id].append(
+                        AbilityAction(
+                            character.id, target.id, None, AbilityActionType.HEAL
+                        )
+                    )
+            elif stats.ability == AbilityActionType.BUILD_BARRICADE:
+                for position in _diamond(
+                    character.position, stats.ability_range, self.size
+                ):
+                    if position in self.terrain_at or position in occupied:
+                        continue
+
+                    abilities[character.id].append(
+                        AbilityAction(
+                            character.id,
+                            None,
+                            position,
+                            AbilityActionType.BUILD_BARRICADE,
+                        )
+                    )
+
+        self.possible = {ABILITY: set(map(_ability_key, _flatten(abilities)))}
+
+        return abilities
+
+    def _acting(self) -> list[Character]:
+        is_zombie = self.is_zombie_turn()
+
+        return list(
+            filter(lambda c: c.is_zombie == is_zombie, self.characters.values())
+        )
+
+    def _reachable(self, character: Character) -> list[Position]:
+        stats = self.config.class_stats[character.class_type]
+        terrain = self.grid.terrain
+        size = self.size
+        start = character.position.y * size + character.position.x
+        seen = {start}
+        frontier = [start]
+
+        # Searched on flat cell indices, like DistanceField, and only turned into positions at
+        # the end
+        for _ in range(stats.speed):
+            next_frontier = []
+
+            for index in frontier:
+                x = index % size
+                neighbors = []
+                if x > 0:
+                    neighbors.append(index - 1)
+                if x < size - 1:
+                    neighbors.append(index + 1)
+                if index >= size:
+                    neighbors.append(index - size)
+                if index < size * (size - 1):
+                    neighbors.append(index + size)
+
+                for neighbor in neighbors:
+                    if neighbor in seen:
+                        continue
+                    if terrain[neighbor] and not stats.moves_over_terrain:
+                        continue
+
+                    seen.add(neighbor)
+                    next_frontier.append(neighbor)
+
+            frontier = next_frontier
+
+        return list(
+            map(
+                lambda index: Position.at(index % size, index // size),
+                sorted(filter(lambda index: not terrain[index], seen)),
+            )
+        )
+
+    def _check(self, phase: str, key: tuple, executing_id: str, acted: set) -> bool:
+        is_zombie = self.is_zombie_turn()
+
+        if executing_id in acted:
+            self._error(is_zombie, f"{executing_id} already acted this {phase} phase")
+            return False
+        if key not in self.possible.get(phase, ()):
+            self._error(is_zombie, f"{phase} action {key} isn't possible")
+            return False
+
+        acted.add(executing_id)
+
+        return True
+
+    def apply_moves(self, moves: list[MoveAction]) -> None:
+        acted = set()
+
+        for move in moves:
+            if not self._check(
+                MOVE, _move_key(move), move.executing_character_id, acted
+            ):
+                continue
+
+            character = self.characters[move.executing_character_id]
+            self.characters[character.id] = replace(
+                character, position=Position.at(move.destination.x, move.destination.y)
+            )
+
+        self.possible = dict()
+
+    def apply_attacks(self, attacks: list[AttackAction]) -> None:
+        acted = set()
+
+        for attack in attacks:
+            key = _attack_key(attack)
+            if not self._check(ATTACK, key, attack.executing_character_id, acted):
+                continue
+
+            attacker = self.characters[attack.executing_character_id]
+            stats = self.config.class_stats[attacker.class_type]
+
+            if attack.type == AttackActionType.TERRAIN:
+                terrain = self.terrains.get(attack.attacking_id)
+
+                # Someone else may have destroyed it already this phase
+                if terrain is None:
+                    continue
+
+                health = terrain.health - stats.terrain_damage
+                if health <= 0:
+                    del self.terrains[terrain.id]
+                    del self.terrain_at[terrain.position]
+                    self.grid.clear_terrain(terrain.position.x, terrain.position.y)
+                else:
+                    self.terrains[terrain.id] = replace(terrain, health=health)
+
+                continue
+
+            target = self.characters[attack.attacking_id]
+
+            # Someone else may have infected it already this phase
+            if target.is_zombie == attacker.is_zombie:
+                continue
+
+            if target.is_zombie:
+                self.characters[target.id] = replace(target, is_stunned=True)
+                continue
+
+            health = target.health - stats.attack_damage
+            if health <= 0:
+                self.infected += 1
+                self.characters[target.id] = replace(
+                    target,
+                    is_zombie=True,
+                    class_type=CharacterClassType.ZOMBIE,
+                    health=self.config.class_stats[CharacterClassType.ZOMBIE].health,
+                    is_stunned=False,
+                )
+                self.cooldowns.pop(target.id, None)
+            else:
+                self.characters[target.id] = replace(target, health=health)
+
+        self.possible = dict()
+
+    def apply_abilities(self, abilities: list[AbilityAction]) -> None:
+        acted = set()
+
+        for ability in abilities:
+            key = _ability_key(ability)
+            if not self._check(ABILITY, key, ability.executing_character_id, acted):
+                continue
+
+            character = self.characters[ability.executing_character_id]
+            stats = self.config.class_stats[character.class_type]
+            self.cooldowns[character.id] = stats.ability_cooldown
+
+            if ability.type == AbilityActionType.HEAL:
+                target = self.characters[ability.character_id_target]
+                max_health = self.config.class_stats[target.class_type].health
+                self.characters[target.id] = replace(
+                    target,
+                    health=min(max_health, target.health + self.config.heal_amount),
+                )
+            elif ability.type == AbilityActionType.BUILD_BARRICADE:
+                position = Position.at(
+                    ability.positional_target.x, ability.positional_target.y
+                )
+
+                # Two builders may have picked the same cell
+                if position in self.terrain_at:
+                    continue
+
+                self.built += 1
+                self._add_terrain(
+                    f"barricade{self.built}",
+                    position,
+                    self.config.barricade_health,
+                    False,
+                )
+
+        self.possible = dict()
+
+    def end_turn(self) -> None:
+        """
+        Ends the current side's turn: its stuns wear off and its cooldowns tick down
+        """
+        for character in self._acting():
+            if character.is_stunned:
+                self.characters[character.id] = replace(character, is_stunned=False)
+
+            cooldown = self.cooldowns.get(character.id, 0)
+            if cooldown > 0:
+                self.cooldowns[character.id] = cooldown - 1
+
+        self.turn += 1
+
+    def finish_message(self) -> dict:
+        """
+        Returns the message of the FINISH phase, in the same shape as the engine's
+        """
+        humans_left = len(
+            list(filter(lambda c: not c.is_zombie, self.characters.values()))
+        )
+
+        return {
+            "turn": self.turn,
+            "scores": {"humans": humans_left, "zombies": self.infected},
+            "stats": {
+                "turns": min(self.turn, self.config.max_turns),
+                "humansLeft": humans_left,
+                "zombiesLeft": len(self.characters) - humans_left,
+            },
+            "errors": {
+                "humanErrors": list(self.errors[False]),
+                "zombieErrors": list(self.errors[True]),
+            },
+        }
+
+
+def _flatten(actions: dict[str, list]) -> list:
+    return [
+        action for character_actions in actions.values() for action in character_actions
+    ]
+
+
+def _move_key(move: MoveAction) -> tuple:
+    destination = move.destination
+
+    return (
+        move.executing_character_id,
+        (destination.x, destination.y) if destination is not None else None,
+    )
+
+
+def _attack_key(attack: AttackAction) -> tuple:
+    return (attack.executing_character_id, attack.attacking_id, attack.type)
+
+
+def _ability_key(ability: AbilityAction) -> tuple:
+    target = ability.positional_target
+
+    return (
+        ability.executing_character_id,
+        ability.character_id_target,
+        (target.x, target.y) if target is not None else None,
+        ability.type,
+    )
+
+
+def _diamond(center: Position, radius: int, size: int) -> list[Position]:
+    """
+    Returns every position on a board of size within Manhattan distance radius of center
+    """
+    positions = []
+
+    for dy in range(-radius, radius + 1):
+        y = center.y + dy
+        if not 0 <= y < size:
+            continue
+
+        width = radius - abs(dy)
+        for x in range(max(0, center.x - width), min(size, center.x + width + 1)):
+            positions.append(Position.at(x, y))
+
+    return positions
+
+
+def _same(action: object) -> object:
+    return action
+
+
+def _decide(strategy: Strategy, method: str, *args) -> list:
+    try:
+        decided = getattr(strategy, method)(*args)
+    except Exception as e:
+        print(f"Strategy failed to {method}: {e}", file=sys.stderr)
+        traceback.print_exc(file=sys.stderr)
+        return []
+
+    return decided if decided is not None else []
+
+
+def play(
+    human: Strategy,
+    zombie: Strategy,
+    seed: Optional[int] = None,
+    config: SimConfig = None,
+) -> dict:
+    """
+    Plays a whole game between two strategies in this process, calling them directly with no
+    json or sockets in between, and returns the FINISH message
+
+    A strategy that raises or returns None for a phase does nothing that phase, like a bot
+    whose response the engine can't use.
+    """
+    simulator = Simulator(seed, config)
+    config = simulator.config
+    # One cache per side, like two bots each with their own session
+    field_caches = {False: FieldCache(), True: FieldCache()}
+    strategies = {False: human, True: zombie}
+
+    human.on_game_start(False)
+    zombie.on_game_start(True)
+
+    choices = _decide(
+        human,
+        "decide_character_classes",
+        list(PICKABLE_CLASSES),
+        config.num_to_pick,
+        config.max_per_same_class,
+    )
+    simulator.choose_classes(choices if isinstance(choices, dict) else dict())
+
+    while not simulator.finished:
+        is_zombie = simulator.is_zombie_turn()
+        strategy = strategies[is_zombie]
+        strategy.on_turn_start(
+            simulator.turn, simulator.game_state(field_caches[is_zombie])
+        )
+
+        for phase in simulator.phases():
+            game_state = simulator.game_state(field_caches[is_zombie])
+
+            # Wrapped like main.py does, so strategies get the same has_actions helpers
+            if phase == MOVE:
+                possible = LazyActionMap(simulator.possible_moves(), _same)
+                simulator.apply_moves(
+                    _decide(strategy, "decide_moves", possible, game_state)
+                )
+            elif phase == ATTACK:
+                possible = LazyActionMap(simulator.possible_attacks(), _same)
+                simulator.apply_attacks(
+                    _decide(strategy, "decide_attacks", possible, game_state)
+                )
+            else:
+                possible = LazyActionMap(simulator.possible_abilities(), _same)
+                simulator.apply_abilities(
+                    _decide(strategy, "decide_abilities", possible, game_state)
+                )
+
+        simulator.end_turn()
+
+    finish_message = simulator.finish_message()
+    human.on_game_end(finish_message)
+    zombie.on_game_end(finish_message)
+
+    return finish_message
@@ -5,70 +5,28 @@
 # If a Medic's ability is available, heal a human in range with the least health
 
 import random
+from typing import Optional
 from game.character.action.ability_action import AbilityAction
 from game.character.action.ability_action_type import AbilityActionType
 from game.character.action.attack_action import AttackAction
 from game.character.action.attack_action_type import AttackActionType
+from game.character.action.lazy_action_map import LazyActionMap
 from game.character.action.move_action import MoveAction
 from game.character.character_class_type import CharacterClassType
 from game.game_state import GameState
 from game.util.position import Position
+from strategy.idle_worker import IdleWorker
 from strategy.strategy import Strategy
+from strategy.turn_budget import TurnBudget
 
+# Where our humans run to, shared by the moves and by the paths found ahead of time
+SETUP_TRACEUR_GOALS = [Position(28, 48), Position(95, 57), Position(0, 99)]
+SETUP_RUN_GOAL = Position(64, 75)
+TRACEUR_GOALS = [Position(0, 0), Position(95, 57), Position(0, 99)]
+DEMOLITIONIST_GOALS = [Position(85, 91), Position(99, 99)]
 
-class TestSetupStrategy(Strategy):
-    def find_obstacles( # returns a set with all coordinates in coord_str format with obstacles
-        self,
-        game_state: GameState
-    ) -> set[str]:
-        obstacle_set = set({})
-        for [terrain_id, terrain_obj] in game_state.terrains.items():
-            pos = terrain_obj.position
-            obstacle_set.add(f"{pos.x},{pos.y}")
-        return obstacle_set
-
-    def simple_bfs( # returns the next value that the start position should move to reach the goal given a move speed of step
-        self,
-        goal: Position,
-        start: Position,
-        game_state: GameState,
-        move_speed: int
-    ) -> Position:
-
-        if (goal.x == start.x) and (goal.y == start.y): # if we are already on the goal, return the goal itself
-            return goal
-        obstacle_set = self.find_obstacles(game_state)
-        position_queue = [tuple([goal if i == 0 else None for i in range(move_speed + 1)])] # format of tuple (curr, 1 before curr, 2 before curr, 3 before curr, etc depending on move_speed)
-
-        visited_set = {f"{goal.x},{goal.y}"}
-
-        return_position = None
-        while position_queue and return_position == None:
-            node_tuple = position_queue.pop(0)
-            curr = node_tuple[0]
-            p_left = Position(curr.x - 1, curr.y)
-            p_right = Position(curr.x + 1, curr.y)
-            p_up = Position(curr.x, curr.y + 1)
-            p_down = Position(curr.x, curr.y - 1)
-            p_list = [p_left, p_right, p_up, p_down]
-            for p in p_list:
-                new_tuple = tuple([p if i == 0 else node_tuple[i - 1] for i in range(move_speed + 1)])
-                if p.x == start.x and p.y == start.y:
-                    offset = 0
-                    return_position = new_tuple[move_speed - offset]
-                    while return_position == None:
-                        offset += 1
-                        return_position = node_tuple[move_speed - offset]
-                    break
-                coord_str = f"{p.x},{p.y}"
-                has_visited = coord_str in visited_set
-                is_obstacle = coord_str in obstacle_set
-                valid_coords = p.x >= 0 and p.x < 100 and p.y >= 0 and p.y < 100 
-                if (not has_visited) and (not is_obstacle) and (valid_coords):
-                    position_queue.append(new_tuple)
-                    visited_set.add(coord_str)
-        return return_position
 
+class TestSetupStrategy(Strategy):
     def decide_character_classes(
             self,
             possible_classes: list[CharacterClassType],
@@ -89,14 +47,11 @@ class TestSetupStrategy(Strategy):
 
     def set_up_initial_barricade(
             self, 
-            possible_moves: dict[str, list[MoveAction]], 
+            possible_moves: LazyActionMap[MoveAction], 
             game_state: GameState
     ) -> list[MoveAction]:
 
-        t1 = Position(28, 48)
-        t2 = Position(95, 57)
-        t3 = Position(0, 99)
-        traceur_list = [t1, t2, t3]
+        traceur_list = list(SETUP_TRACEUR_GOALS)
 
         p1 = Position(41, 44)
         p2 = Position(50, 44)
@@ -106,16 +61,15 @@ class TestSetupStrategy(Strategy):
 
         dummy_list = [p1, p2, p3, p4, p5]
         barricade_list = []
-        obstacle_set = self.find_obstacles(game_state)
+        grid = game_state.grid
         builder_to_barricade = {} # maps the barricade object to a given builder
         for barricade in dummy_list:
-            str_pos = f"{barricade.x},{barricade.y - 1}"
-            if not(str_pos in obstacle_set):
+            if not grid.has_terrain(barricade.x, barricade.y - 1):
                 barricade_list.append(barricade)
                 closest_builder_id = -1
                 min_distance = 1234
-                for [character_id, moves] in possible_moves.items():
-                    if len(moves) == 0 or (not game_state.characters[character_id].class_type == CharacterClassType.BUILDER):
+                for character_id in possible_moves:
+                    if not possible_moves.has_actions(character_id) or (not game_state.characters[character_id].class_type == CharacterClassType.BUILDER):
                         continue
                     pos = game_state.characters[character_id].position
                     distance = abs(barricade.x - pos.x) + abs(barricade.y - pos.y)
@@ -125,8 +79,8 @@ class TestSetupStrategy(Strategy):
                 builder_to_barricade[closest_builder_id] = barricade
          
         choices = []
-        for [character_id, moves] in possible_moves.items():
-            if len(moves) == 0:
+        for character_id in possible_moves:
+            if not possible_moves.has_actions(character_id):  # checked without decoding the moves we never look at
                 continue
             pos = game_state.characters[character_id].position
 
@@ -140,16 +94,15 @@ class TestSetupStrategy(Strategy):
                         min_distance = distance
                         closest_goal = p
                 traceur_list.remove(closest_goal)
-                new_pos = self.simple_bfs(closest_goal, pos, game_state, 4)
+                new_pos = game_state.pathfinder.next_step(closest_goal, pos, 4)
                 new_action = MoveAction(character_id, new_pos)
                 choices.append(new_action)
             elif character_id in builder_to_barricade:
-                new_pos = self.simple_bfs(builder_to_barricade[character_id], pos, game_state, 3)
+                new_pos = game_state.pathfinder.next_step(builder_to_barricade[character_id], pos, 3)
                 new_action = MoveAction(character_id, new_pos)
                 choices.append(new_action)
             else: # run to bottom right if not traceur
-                bot_right = Position(64, 75)
-                new_pos = self.simple_bfs(bot_right, pos, game_state, 3)
+                new_pos = game_state.pathfinder.next_step(SETUP_RUN_GOAL, pos, 3)
                 new_action = MoveAction(character_id, new_pos)
                 choices.append(new_action)
 
@@ -166,16 +119,13 @@ class TestSetupStrategy(Strategy):
     
     def simple_run(
             self, 
-            possible_moves: dict[str, list[MoveAction]], 
+            possible_moves: LazyActionMap[MoveAction], 
             game_state: GameState
             ) -> MoveAction:
         
         choices = []
 
-        t1 = Position(0, 0)
-        t2 = Position(95, 57)
-        t3 = Position(0, 99)
-        traceur_list = [t1, t2, t3]
+        traceur_list = list(TRACEUR_GOALS)
 
         for [character_id, moves] in possible_moves.items():
             if len(moves) == 0:  # No choices... Next!
@@ -188,26 +138,19 @@ class TestSetupStrategy(Strategy):
             closest_zombie_distance =  1234  # large number, map isn't big enough to reach this distance
             
 
-            # Iterate through every zombie to find the closest one
-            for c in game_state.characters.values():
-                if not c.is_zombie:
-                    continue  # Fellow humans are frens :D, ignore them
-
-                distance = abs(c.position.x - pos.x) + abs(c.position.y - pos.y)  # calculate manhattan distance between human and zombie
-                if distance < closest_zombie_distance:  # If distance is closer than current closest, replace it!
-                    closest_zombie_pos = c.position
-                    closest_zombie_distance = distance
+            # Look up the closest zombie in the state's spatial index
+            closest_zombie = game_state.spatial_index.nearest(pos, True)
+            if closest_zombie:
+                closest_zombie_pos = closest_zombie.position
+                closest_zombie_distance = abs(closest_zombie_pos.x - pos.x) + abs(closest_zombie_pos.y - pos.y)  # calculate manhattan distance between human and zombie
             if is_demo:
-                obstacle_set = self.find_obstacles(game_state)
-                wall_1 = "85,92"
-                wall_2 = "86,92"
-                goal = Position(50, 83)
-                if (wall_1 in obstacle_set) or wall_2 in obstacle_set: #bfs to 85, 91
-                    goal = Position(85, 91)
+                grid = game_state.grid
+                if grid.has_terrain(85, 92) or grid.has_terrain(86, 92): #bfs to 85, 91
+                    goal = DEMOLITIONIST_GOALS[0]
                     
                 else:
-                    goal = Position(99, 99)
-                new_pos = self.simple_bfs(goal, pos, game_state, 3)
+                    goal = DEMOLITIONIST_GOALS[1]
+                new_pos = game_state.pathfinder.next_step(goal, pos, 3)
                 new_action = MoveAction(character_id, new_pos)
                 choices.append(new_action)
             if is_traceur and closest_zombie_distance > 15:
@@ -219,7 +162,7 @@ class TestSetupStrategy(Strategy):
                         min_distance = distance
                         closest_goal = p
                 traceur_list.remove(closest_goal)
-                new_pos = self.simple_bfs(closest_goal, pos, game_state, 4)
+                new_pos = game_state.pathfinder.next_step(closest_goal, pos, 4)
                 new_action = MoveAction(character_id, new_pos)
                 choices.append(new_action)
 
@@ -240,10 +183,29 @@ class TestSetupStrategy(Strategy):
 
         return choices
 
+    def on_idle(self, game_state: GameState, worker: IdleWorker) -> None:
+        # Find the paths to where our humans run to while the engine is busy, so the next move
+        # just looks them up. They're only good for the current terrain, if a barricade goes
+        # up or comes down before then, the move searches again
+        if game_state.turn < 20:
+            goals = SETUP_TRACEUR_GOALS + [SETUP_RUN_GOAL]
+        else:
+            goals = TRACEUR_GOALS + DEMOLITIONIST_GOALS
+
+        pathfinder = game_state.pathfinder
+        terrain_version = game_state.grid.terrain_version
+        for goal in goals:
+            worker.submit(
+                goal,
+                lambda goal=goal: pathfinder.distance_field(goal),
+                terrain_version,
+            )
+
     def decide_moves(
             self, 
-            possible_moves: dict[str, list[MoveAction]], 
-            game_state: GameState
+            possible_moves: LazyActionMap[MoveAction], 
+            game_state: GameState,
+            budget: Optional[TurnBudget] = None
             ) -> list[MoveAction]:
         choices = []
         is_in_setup = (game_state.turn < 20)
@@ -256,8 +218,9 @@ class TestSetupStrategy(Strategy):
 
     def decide_attacks(
             self, 
-            possible_attacks: dict[str, list[AttackAction]], 
-            game_state: GameState
+            possible_attacks: LazyActionMap[AttackAction], 
+            game_state: GameState,
+            budget: Optional[TurnBudget] = None
             ) -> list[AttackAction]:
         choices = []
 
@@ -293,7 +256,7 @@ class TestSetupStrategy(Strategy):
 
     def set_up_initial_barricade_abilities(
             self, 
-            possible_abilities: dict[str, list[AbilityAction]], 
+            possible_abilities: LazyActionMap[AbilityAction], 
             game_state: GameState
     ) -> list[AbilityAction]:
         choices = []
@@ -306,12 +269,11 @@ class TestSetupStrategy(Strategy):
         dummy_list = [p1, p2, p3, p4, p5]
 
         barricade_list = [p1, p2, p3, p4, p5]
-        barr_str_list = []
-        obstacle_set = self.find_obstacles(game_state)
+        open_barricade_list = []
+        grid = game_state.grid
         for barricade in barricade_list:
-            str_pos = f"{barricade.x},{barricade.y}"
-            if not (str_pos in obstacle_set):
-                barr_str_list.append(str_pos)
+            if not grid.has_terrain(barricade.x, barricade.y):
+                open_barricade_list.append(barricade)
 
 
         
@@ -331,7 +293,7 @@ class TestSetupStrategy(Strategy):
             if game_state.characters[character_id].class_type == CharacterClassType.BUILDER:
                 for a in abilities:
                     pos = a.positional_target
-                    if f"{pos.x},{pos.y}" in barr_str_list:
+                    if pos in open_barricade_list:
                         choices.append(a)
                         break
             
@@ -341,7 +303,7 @@ class TestSetupStrategy(Strategy):
     
     def medic_heal (
         self, 
-        possible_abilities: dict[str, list[AbilityAction]], 
+        possible_abilities: LazyActionMap[AbilityAction], 
         game_state: GameState
         ) -> list[AbilityAction]:
         choices = []
@@ -360,8 +322,9 @@ class TestSetupStrategy(Strategy):
 
     def decide_abilities(
             self, 
-            possible_abilities: dict[str, list[AbilityAction]], 
-            game_state: GameState
+            possible_abilities: LazyActionMap[AbilityAction], 
+            game_state: GameState,
+            budget: Optional[TurnBudget] = None
             ) -> list[AbilityAction]:
         choices = []
         is_in_setup = (game_state.turn < 20)
@@ -3,110 +3,94 @@
 # If there are no humans in attacking range but there are obstacles, attack a random obstacle.
 
 import random
+from typing import Optional
 from game.character.action.ability_action import AbilityAction
 from game.character.action.attack_action import AttackAction
+from game.character.action.lazy_action_map import LazyActionMap
 from game.character.action.move_action import MoveAction
 from game.game_state import GameState
+from game.pathfinding import UNREACHABLE, DistanceField
 from game.character.action.attack_action_type import AttackActionType
 from strategy.strategy import Strategy
+from strategy.turn_budget import TurnBudget
 from game.util.position import Position
 
 
-class VestZombieStrategy(Strategy):
+# How many zombies chase a different human each, before the rest go for whichever human is closest
+SPREAD_TARGETS = 13
 
 
-    def find_obstacles( # returns a set with all coordinates in coord_str format with obstacles
-        self,
-        game_state: GameState
-    ) -> set[str]:
-        obstacle_set = set({})
-        for [terrain_id, terrain_obj] in game_state.terrains.items():
-            pos = terrain_obj.position
-            obstacle_set.add(f"{pos.x},{pos.y}")
-        return obstacle_set
-
-    def simple_bfs( # returns the next value that the start position should move to reach the goal given a move speed of step
-        self,
-        goal: Position,
-        start: Position,
-        game_state: GameState,
-        move_speed: int
-    ) -> Position:
-
-        if (goal.x == start.x) and (goal.y == start.y): # if we are already on the goal, return the goal itself
-            return goal
-        obstacle_set = self.find_obstacles(game_state)
-        position_queue = [tuple([goal if i == 0 else None for i in range(move_speed + 1)])] # format of tuple (curr, 1 before curr, 2 before curr, 3 before curr, etc depending on move_speed)
-
-        visited_set = {f"{goal.x},{goal.y}"}
-
-        return_position = None
-        while position_queue and return_position == None:
-            node_tuple = position_queue.pop(0)
-            curr = node_tuple[0]
-            p_left = Position(curr.x - 1, curr.y)
-            p_right = Position(curr.x + 1, curr.y)
-            p_up = Position(curr.x, curr.y + 1)
-            p_down = Position(curr.x, curr.y - 1)
-            p_list = [p_left, p_right, p_up, p_down]
-            for p in p_list:
-                new_tuple = tuple([p if i == 0 else node_tuple[i - 1] for i in range(move_speed + 1)])
-                if p.x == start.x and p.y == start.y:
-                    offset = 0
-                    return_position = new_tuple[move_speed - offset]
-                    while return_position == None:
-                        offset += 1
-                        return_position = node_tuple[move_speed - offset]
-                    break
-                coord_str = f"{p.x},{p.y}"
-                has_visited = coord_str in visited_set
-                is_obstacle = coord_str in obstacle_set
-                valid_coords = p.x >= 0 and p.x < 100 and p.y >= 0 and p.y < 100
-                if (not has_visited) and (not is_obstacle) and valid_coords:
-                    position_queue.append(new_tuple)
-                    visited_set.add(coord_str)
-        return return_position
+class VestZombieStrategy(Strategy):
+
 
     def regular_move(
         self, 
-        possible_moves: dict[str, list[MoveAction]],
+        possible_moves: LazyActionMap[MoveAction],
         game_state: GameState
         ) -> list[MoveAction]:
         choices = []
-        character_id_set = set({})
-        for [character_id, moves] in possible_moves.items():
-            if len(moves) == 0:  # No choices... Next!
+        humans = [c for c in game_state.characters.values() if not c.is_zombie]
+
+        # One search seeded from every human gives each zombie the wall-aware walk to its closest human,
+        # and which human that is, so spreading zombies across humans needs no search of its own
+        flow_field = game_state.pathfinder.flow_field([c.position for c in humans])
+        claimed = set()  # Indexes into humans chased by a zombie, until SPREAD_TARGETS of them are
+
+        for character_id in possible_moves:
+            if not possible_moves.has_actions(character_id):  # No choices... Next! (checked without decoding the moves)
                 continue
 
             pos = game_state.characters[character_id].position  # position of the zombie
-            closest_human_pos = pos  # default position is zombie's pos
-            closest_human_distance = 1984  # large number, map isn't big enough to reach this distance
-            closest_human_id = "a"
-            # Iterate through every human to find the closest one
-            for c in game_state.characters.values():
-                if len(character_id_set) < 13:
-                    if c.is_zombie or c.id in character_id_set:
-                        continue  # Fellow zombies are frens :D, ignore them
+
+            if len(claimed) >= SPREAD_TARGETS:
+                new_pos = flow_field.next_step(pos, 5)
+            else:
+                closest = flow_field.sources[flow_field.grid.index(pos.x, pos.y)]
+                free = [i for i in range(len(humans)) if i not in claimed]
+
+                if closest != UNREACHABLE and closest not in claimed:
+                    # The closest human is nobody's yet, walk the flow field to it
+                    claimed.add(closest)
+                    new_pos = flow_field.next_step(pos, 5)
+                elif len(free) > 0:
+                    # Iterate through every human nobody chases yet to find the closest one, by manhattan distance
+                    target = min(free, key=lambda i: abs(humans[i].position.x - pos.x) + abs(humans[i].position.y - pos.y))
+                    claimed.add(target)
+                    new_pos = self.move_towards(possible_moves[character_id], flow_field, target, humans[target].position)
                 else:
-                    if c.is_zombie:
-                        continue
-
-                distance = abs(c.position.x - pos.x) + abs(c.position.y - pos.y) # calculate manhattan distance between human and zombie
-                if distance < closest_human_distance:  # If distance is closer than current closest, replace it!
-                    closest_human_pos = c.position
-                    closest_human_distance = distance
-                    closest_human_id = c.id
-            character_id_set.add(closest_human_id)
-            new_pos = self.simple_bfs(closest_human_pos, pos, game_state, 5)
+                    # Every human is taken, so wait. The first zombie to wait counts as one more chase
+                    claimed.add(None)
+                    new_pos = pos
+
+            if new_pos is None:  # No human can be reached, stay put
+                new_pos = pos
             new_action = MoveAction(character_id, new_pos)
 
             choices.append(new_action)  # add the choice to the list
 
         return choices
 
+    def move_towards(
+        self,
+        moves: list[MoveAction],
+        flow_field: DistanceField,
+        target: int,
+        target_pos: Position
+        ) -> Optional[Position]:
+        # Once in the cells closest to the target, the flow field leads there, so get into them as deep as possible
+        grid = flow_field.grid
+        in_reach = [m for m in moves if flow_field.sources[grid.index(m.destination.x, m.destination.y)] == target]
+        if len(in_reach) > 0:
+            return min(in_reach, key=lambda m: flow_field.distance(m.destination.x, m.destination.y)).destination
+
+        # Otherwise just get closer, by manhattan distance
+        if len(moves) == 0:
+            return None
+        return min(moves, key=lambda m: abs(m.destination.x - target_pos.x) + abs(m.destination.y - target_pos.y)).destination
+
     def set_up_initial_diamond(
                 self, 
-                possible_moves: dict[str, list[MoveAction]],
+                possible_moves: LazyActionMap[MoveAction],
                 game_state: GameState
         ) -> MoveAction:
             p1 = Position(64, 42)
@@ -146,8 +130,9 @@ class VestZombieStrategy(Strategy):
                             
     def decide_moves(
         self, 
-        possible_moves: dict[str, list[MoveAction]],
-        game_state: GameState,        
+        possible_moves: LazyActionMap[MoveAction],
+        game_state: GameState,
+        budget: Optional[TurnBudget] = None
         ) -> MoveAction:
         if game_state.turn < 20:
             choices = self.set_up_initial_diamond(possible_moves, game_state)
@@ -158,8 +143,9 @@ class VestZombieStrategy(Strategy):
 
     def decide_attacks(
                 self, 
-                possible_attacks: dict[str, list[AttackAction]], 
-                game_state: GameState
+                possible_attacks: LazyActionMap[AttackAction], 
+                game_state: GameState,
+                budget: Optional[TurnBudget] = None
                 ) -> list[AttackAction]:
 
             choices = []
@@ -1,11 +1,24 @@
+from typing import Callable
 from strategy.random_strategy import RandomStrategy
 from strategy.simple_human_strategy import SimpleHumanStrategy
 from strategy.simple_zombie_strategy import SimpleZombieStrategy
-from strategy.Jericho_strategy import TestSetupStrategy
 from strategy.strategy import Strategy
 from strategy.Jericho_strategy import TestSetupStrategy
 from strategy.VestZombie import VestZombieStrategy
 
+# Every strategy that can play each side, by name, so tools like the benchmarks can find them
+# Add your strategies here too when you write new ones
+HUMAN_STRATEGIES: dict[str, Callable[[], Strategy]] = {
+    "random": RandomStrategy,
+    "simple_human": SimpleHumanStrategy,
+    "jericho": TestSetupStrategy,
+}
+ZOMBIE_STRATEGIES: dict[str, Callable[[], Strategy]] = {
+    "random": RandomStrategy,
+    "simple_zombie": SimpleZombieStrategy,
+    "vest_zombie": VestZombieStrategy,
+}
+
 
 def choose_strategy(is_zombie: bool) -> Strategy:
     # Modify what is returned here to select the strategy your bot will use
@@ -16,4 +29,3 @@ def choose_strategy(is_zombie: bool) -> Strategy:
         return VestZombieStrategy()
     else:
         return TestSetupStrategy()
-
@@ -0,0 +1,141 @@
+from collections import deque
+import sys
+import threading
+import traceback
+from typing import Callable, Hashable, Optional
+
+
+class IdleTask:
+    """
+    One piece of work submitted to an IdleWorker
+
+    stamp: What the work was computed from, like a terrain version, so a result computed
+        from a state that no longer matches can be told apart from a fresh one
+    """
+
+    def __init__(
+        self, key: Hashable, work: Callable[[], object], stamp: Hashable
+    ) -> None:
+        self.key = key
+        self.work = work
+        self.stamp = stamp
+        self.done = False
+        self.result: object = None
+        self.failed = False
+
+
+class IdleWorker:
+    """
+    Runs work on a background thread while your bot is waiting for the engine, so heavy
+    computation for the next phase is done before that phase arrives
+
+    Submit work with a key and a stamp describing the state it was computed from, then poll
+    for it with the stamp of the state you have now. A result whose stamp doesn't match is
+    treated as missing, so stale work is thrown away instead of being used.
+
+    Work runs one task at a time, in the order it was submitted. Since it shares the
+    interpreter with your bot, cancel_pending is called as soon as a phase arrives, so queued
+    work doesn't slow down your response. Only the task that is already running finishes.
+    """
+
+    def __init__(self) -> None:
+        self.tasks: dict[Hashable, IdleTask] = dict()
+        self.queue: deque[IdleTask] = deque()
+        self.condition = threading.Condition()
+        self.running: Optional[IdleTask] = None
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="IdleWorker", daemon=True)
+        self.thread.start()
+
+    def submit(
+        self, key: Hashable, work: Callable[[], object], stamp: Hashable = None
+    ) -> None:
+        """
+        Queues work to run in the background, replacing any earlier result for key
+
+        work is called with no arguments, and whatever it returns can be polled with key.
+        """
+        task = IdleTask(key, work, stamp)
+
+        with self.condition:
+            if self.stopped:
+                return
+
+            self.tasks[key] = task
+            self.queue.append(task)
+            self.condition.notify()
+
+    def poll(self, key: Hashable, stamp: Hashable = None) -> Optional[object]:
+        """
+        Returns the result of the work submitted for key, or None if it isn't done yet, failed,
+        was cancelled, or was computed for a different stamp
+        """
+        with self.condition:
+            task = self.tasks.get(key)
+
+        if task is None or not task.done or task.failed or task.stamp != stamp:
+            return None
+
+        return task.result
+
+    def cancel_pending(self) -> None:
+        """
+        Drops every task that hasn't started yet
+        """
+        with self.condition:
+            for task in self.queue:
+                if self.tasks.get(task.key) is task:
+                    del self.tasks[task.key]
+
+            self.queue.clear()
+
+    def clear(self) -> None:
+        """
+        Drops every task that hasn't started yet and every result
+        """
+        with self.condition:
+            self.queue.clear()
+            self.tasks.clear()
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until every submitted task has run, returns False if timeout ran out first
+        """
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: len(self.queue) == 0 and self.running is None, timeout
+            )
+
+    def stop(self) -> None:
+        """
+        Drops every pending task and stops the thread once the running task is done
+        """
+        with self.condition:
+            self.stopped = True
+            self.queue.clear()
+            self.condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                self.running = None
+                self.condition.notify_all()
+                self.condition.wait_for(lambda: self.stopped or len(self.queue) > 0)
+
+                if self.stopped:
+                    return
+
+                task = self.queue.popleft()
+                self.running = task
+
+            try:
+                task.result = task.work()
+            except Exception:
+                task.failed = True
+                print(
+                    f"Background work {task.key!r} failed, it will be ignored",
+                    file=sys.stderr,
+                )
+                traceback.print_exc(file=sys.stderr)
+
+            task.done = True
@@ -1,13 +1,16 @@
 import random
+from typing import Optional
 from game.character.action.ability_action import AbilityAction
 from game.character.action.ability_action_type import AbilityActionType
 from game.character.action.attack_action import AttackAction
 from game.character.action.attack_action_type import AttackActionType
+from game.character.action.lazy_action_map import LazyActionMap
 from game.character.action.move_action import MoveAction
 from game.character.character_class_type import CharacterClassType
 from game.game_state import GameState
 from game.util.position import Position
 from strategy.strategy import Strategy
+from strategy.turn_budget import TurnBudget
 
 
 class RandomStrategy(Strategy):
@@ -33,7 +36,10 @@ class RandomStrategy(Strategy):
         return choices
 
     def decide_moves(
-        self, possible_moves: dict[str, list[MoveAction]], game_state: GameState
+        self,
+        possible_moves: LazyActionMap[MoveAction],
+        game_state: GameState,
+        budget: Optional[TurnBudget] = None,
     ) -> list[MoveAction]:
         choices = []
 
@@ -46,7 +52,10 @@ class RandomStrategy(Strategy):
         return choices
 
     def decide_attacks(
-        self, possible_attacks: dict[str, list[AttackAction]], game_state: GameState
+        self,
+        possible_attacks: LazyActionMap[AttackAction],
+        game_state: GameState,
+        budget: Optional[TurnBudget] = None,
     ) -> list[AttackAction]:
         choices = []
 
@@ -59,7 +68,10 @@ class RandomStrategy(Strategy):
         return choices
 
     def decide_abilities(
-        self, possible_abilities: dict[str, list[AbilityAction]], game_state: GameState
+        self,
+        possible_abilities: LazyActionMap[AbilityAction],
+        game_state: GameState,
+        budget: Optional[TurnBudget] = None,
     ) -> list[AbilityAction]:
         choices = []
 
@@ -5,15 +5,18 @@
 # If a Medic's ability is available, heal a human in range with the least health
 
 import random
+from typing import Optional
 from game.character.action.ability_action import AbilityAction
 from game.character.action.ability_action_type import AbilityActionType
 from game.character.action.attack_action import AttackAction
 from game.character.action.attack_action_type import AttackActionType
+from game.character.action.lazy_action_map import LazyActionMap
 from game.character.action.move_action import MoveAction
 from game.character.character_class_type import CharacterClassType
 from game.game_state import GameState
 from game.util.position import Position
 from strategy.strategy import Strategy
+from strategy.turn_budget import TurnBudget
 
 
 class SimpleHumanStrategy(Strategy):
@@ -35,8 +38,9 @@ class SimpleHumanStrategy(Strategy):
 
     def decide_moves(
             self, 
-            possible_moves: dict[str, list[MoveAction]], 
-            game_state: GameState
+            possible_moves: LazyActionMap[MoveAction], 
+            game_state: GameState,
+            budget: Optional[TurnBudget] = None
             ) -> list[MoveAction]:
         
         choices = []
@@ -50,15 +54,11 @@ class SimpleHumanStrategy(Strategy):
             closest_zombie_distance =  1234  # large number, map isn't big enough to reach this distance
             
 
-            # Iterate through every zombie to find the closest one
-            for c in game_state.characters.values():
-                if not c.is_zombie:
-                    continue  # Fellow humans are frens :D, ignore them
-
-                distance = abs(c.position.x - pos.x) + abs(c.position.y - pos.y)  # calculate manhattan distance between human and zombie
-                if distance < closest_zombie_distance:  # If distance is closer than current closest, replace it!
-                    closest_zombie_pos = c.position
-                    closest_zombie_distance = distance
+            # Look up the closest zombie in the state's spatial index
+            closest_zombie = game_state.spatial_index.nearest(pos, True)
+            if closest_zombie:
+                closest_zombie_pos = closest_zombie.position
+                closest_zombie_distance = abs(closest_zombie_pos.x - pos.x) + abs(closest_zombie_pos.y - pos.y)  # calculate manhattan distance between human and zombie
 
             # Move as far away from the zombie as possible
             move_distance = -1  # Distance between the move action's destination and the closest zombie
@@ -77,8 +77,9 @@ class SimpleHumanStrategy(Strategy):
 
     def decide_attacks(
             self, 
-            possible_attacks: dict[str, list[AttackAction]], 
-            game_state: GameState
+            possible_attacks: LazyActionMap[AttackAction], 
+            game_state: GameState,
+            budget: Optional[TurnBudget] = None
             ) -> list[AttackAction]:
         choices = []
 
@@ -108,8 +109,9 @@ class SimpleHumanStrategy(Strategy):
 
     def decide_abilities(
             self, 
-            possible_abilities: dict[str, list[AbilityAction]], 
-            game_state: GameState
+            possible_abilities: LazyActionMap[AbilityAction], 
+            game_state: GameState,
+            budget: Optional[TurnBudget] = None
             ) -> list[AbilityAction]:
         choices = []
 
@@ -3,20 +3,24 @@
 # If there are no humans in attacking range but there are obstacles, attack a random obstacle.
 
 import random
+from typing import Optional
 from game.character.action.ability_action import AbilityAction
 from game.character.action.attack_action import AttackAction
+from game.character.action.lazy_action_map import LazyActionMap
 from game.character.action.move_action import MoveAction
 from game.game_state import GameState
 from game.character.action.attack_action_type import AttackActionType
 from strategy.strategy import Strategy
+from strategy.turn_budget import TurnBudget
 
 
 class SimpleZombieStrategy(Strategy):
 
     def decide_moves(
             self, 
-            possible_moves: dict[str, list[MoveAction]], 
-            game_state: GameState
+            possible_moves: LazyActionMap[MoveAction], 
+            game_state: GameState,
+            budget: Optional[TurnBudget] = None
             ) -> list[MoveAction]:
         
         choices = []
@@ -29,15 +33,11 @@ class SimpleZombieStrategy(Strategy):
             closest_human_pos = pos  # default position is zombie's pos
             closest_human_distance = 1984  # large number, map isn't big enough to reach this distance
 
-            # Iterate through every human to find the closest one
-            for c in game_state.characters.values():
-                if c.is_zombie:
-                    continue  # Fellow zombies are frens :D, ignore them
-
-                distance = abs(c.position.x - pos.x) + abs(c.position.y - pos.y) # calculate manhattan distance between human and zombie
-                if distance < closest_human_distance:  # If distance is closer than current closest, replace it!
-                    closest_human_pos = c.position
-                    closest_human_distance = distance
+            # Look up the closest human in the state's spatial index
+            closest_human = game_state.spatial_index.nearest(pos, False)
+            if closest_human:
+                closest_human_pos = closest_human.position
+                closest_human_distance = abs(closest_human_pos.x - pos.x) + abs(closest_human_pos.y - pos.y) # calculate manhattan distance between human and zombie
 
             # Move as close to the human as possible
             move_distance = 1337  # Distance between the move action's destination and the closest human
@@ -56,8 +56,9 @@ class SimpleZombieStrategy(Strategy):
 
     def decide_attacks(
             self, 
-            possible_attacks: dict[str, list[AttackAction]], 
-            game_state: GameState
+            possible_attacks: LazyActionMap[AttackAction], 
+            game_state: GameState,
+            budget: Optional[TurnBudget] = None
             ) -> list[AttackAction]:
 
         choices = []
@@ -1,14 +1,59 @@
 # This defines the general layout your strategy method will inherit. Do not edit this.
 
+from typing import Optional
 from game.character.action.ability_action import AbilityAction
 from game.character.action.attack_action import AttackAction
+from game.character.action.lazy_action_map import LazyActionMap
 from game.character.action.move_action import MoveAction
 from game.character.character_class_type import CharacterClassType
 from game.game_state import GameState
 from game.util.position import Position
+from strategy.idle_worker import IdleWorker
+from strategy.turn_budget import TurnBudget
 
 
 class Strategy:
+    def on_game_start(self, is_zombie: bool) -> None:
+        """
+        Called once when your bot receives the first message of a game, before any decide method
+
+        A single strategy instance is kept for the whole game, so anything you save on self here
+        (or in any other method) is still there next phase and next turn.
+
+        is_zombie: Whether your bot is playing the zombies this game
+        """
+        pass
+
+    def on_turn_start(self, turn: int, game_state: GameState) -> None:
+        """
+        Called once per turn with the first game state of that turn, before any decide method
+
+        turn: The turn that is starting
+        game_state: The current state of all characters and terrain on the map
+        """
+        pass
+
+    def on_idle(self, game_state: GameState, worker: IdleWorker) -> None:
+        """
+        Called after your bot responds to a phase, while it waits for the engine to send the next
+
+        Submit work to worker here to have it run in the background, like computing distance
+        fields with game_state.pathfinder for goals you'll need next phase. Whatever is still
+        queued when the next phase arrives is dropped.
+
+        game_state: The last game state your bot received
+        worker: Runs submitted work on a background thread, poll it for the results
+        """
+        pass
+
+    def on_game_end(self, finish_message: dict) -> None:
+        """
+        Called once when the game is over
+
+        finish_message: The message of the FINISH phase, with the final scores, stats and errors
+        """
+        pass
+
     def decide_character_classes(
         self,
         possible_classes: list[CharacterClassType],
@@ -27,31 +72,48 @@ class Strategy:
         raise NotImplementedError("Must implement the decide_moves method!")
 
     def decide_moves(
-        self, possible_moves: dict[str, list[MoveAction]], game_state: GameState
+        self,
+        possible_moves: LazyActionMap[MoveAction],
+        game_state: GameState,
+        budget: Optional[TurnBudget] = None,
     ) -> list[MoveAction]:
         """
         Decide the moves for each character based on the current game state
 
         possible_moves: Maps character id to it's possible moves. You can use this to validate if a move is possible, or pick from this list.
+            A character's moves are only decoded the first time you access them, so use possible_moves.has_actions(id) if you only need to know whether there are any.
         game_state: The current state of all characters and terrain on the map
+        budget: How much time is left to respond, check it in long searches, see strategy/turn_budget.py
+            It's only passed if your method takes it, so you can leave it out if you don't need it.
         """
         raise NotImplementedError("Must implement the decide_moves method!")
 
     def decide_attacks(
-        self, possible_attacks: dict[str, list[AttackAction]], game_state: GameState
+        self,
+        possible_attacks: LazyActionMap[AttackAction],
+        game_state: GameState,
+        budget: Optional[TurnBudget] = None,
     ) -> list[AttackAction]:
         """
         Decide the attacks for each character based on the current game state
+
+        budget: How much time is left to respond, check it in long searches, see strategy/turn_budget.py
+            It's only passed if your method takes it, so you can leave it out if you don't need it.
         """
         raise NotImplementedError("Must implement the decide_attacks method!")
 
     def decide_abilities(
-        self, possible_abilities: dict[str, list[AbilityAction]], game_state: GameState
+        self,
+        possible_abilities: LazyActionMap[AbilityAction],
+        game_state: GameState,
+        budget: Optional[TurnBudget] = None,
     ) -> list[AbilityAction]:
         """
         Decide the moves for each character based on the current game state
 
         possible_abilities: Maps character id to it's possible abilities. You can use this to validate if a ability is possible, or pick from this list.
         game_state: The current state of all characters and terrain on the map
+        budget: How much time is left to respond, check it in long searches, see strategy/turn_budget.py
+            It's only passed if your method takes it, so you can leave it out if you don't need it.
         """
         raise NotImplementedError("Must implement the decide_abilities method!")
@@ -0,0 +1,137 @@
+import os
+import time
+from typing import Callable, Optional, TypeVar
+from network.client import SERVER_TURN_TIMEOUT
+
+# How long before the server's timeout we want to have responded, to leave room for
+# encoding and sending the response
+RESPONSE_SAFETY_MARGIN = 5
+
+# Set TURN_BUDGET to the number of seconds a phase may take, to override the default
+raw_turn_budget_env = os.environ.get("TURN_BUDGET")
+DEFAULT_TURN_BUDGET = (
+    float(raw_turn_budget_env)
+    if raw_turn_budget_env
+    else SERVER_TURN_TIMEOUT - RESPONSE_SAFETY_MARGIN
+)
+
+# How much longer we expect each iteration of an iterative deepening search to take than
+# the one before it, used to skip an iteration that won't finish in time
+DEEPENING_GROWTH_ESTIMATE = 3
+
+Result = TypeVar("Result")
+
+
+class BudgetExpired(Exception):
+    """
+    Raised by TurnBudget.check when the budget has run out
+    """
+
+    pass
+
+
+class TurnBudget:
+    """
+    How much time your bot has left to respond to the current phase
+
+    The budget starts as soon as the phase is received, so it also counts the time spent
+    decoding the game state before your strategy is called.
+
+    seconds: How long the whole phase may take
+    """
+
+    def __init__(self, seconds: float = DEFAULT_TURN_BUDGET) -> None:
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    def check(self) -> None:
+        """
+        Raises BudgetExpired if the budget has run out, call it inside long loops
+        """
+        if self.expired():
+            raise BudgetExpired()
+
+    def split(self, fraction: float) -> "TurnBudget":
+        """
+        Returns a budget for a part of the work, getting fraction of the time that's left
+
+        Useful to give each character or each search its share of the phase.
+        """
+        budget = TurnBudget(self.remaining() * fraction)
+        budget.started = self.started
+
+        return budget
+
+
+def iterative_deepening(
+    budget: TurnBudget,
+    search: Callable[[int], Result],
+    start_depth: int = 1,
+    max_depth: Optional[int] = None,
+) -> Optional[Result]:
+    """
+    Runs search at increasing depths until the budget runs out, returning the result of the
+    deepest search that finished, or None if not even the first one did
+
+    search can call budget.check() to give up partway, in which case the result of the depth
+    before it is returned. A depth is also skipped if it likely won't finish in time.
+    """
+    best = None
+    depth = start_depth
+
+    while max_depth is None or depth <= max_depth:
+        if budget.expired():
+            break
+
+        started = time.monotonic()
+
+        try:
+            best = search(depth)
+        except BudgetExpired:
+            break
+
+        took = time.monotonic() - started
+        if took * DEEPENING_GROWTH_ESTIMATE > budget.remaining():
+            break
+
+        depth += 1
+
+    return best
+
+
+def best_until_deadline(
+    budget: TurnBudget,
+    candidates: Callable[[], Optional[Result]],
+    score: Callable[[Result], float],
+) -> Optional[Result]:
+    """
+    Keeps asking candidates for a new candidate and keeps the highest scoring one, until the
+    budget runs out or candidates returns None
+
+    Use it for anytime searches like random restarts, where any answer is better than none.
+    """
+    best = None
+    best_score = None
+
+    while not budget.expired():
+        candidate = candidates()
+
+        if candidate is None:
+            break
+
+        candidate_score = score(candidate)
+        if best_score is None or candidate_score > best_score:
+            best = candidate
+            best_score = candidate_score
+
+    return best